@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Compare matching module names against a growing number of excluded names
+and --only prefixes, the old way (a list of one regex per name, and a loop
+over the prefixes) and with :mod:`pydeps.matcher`.
+
+Usage::
+
+    python benchmarks/bench_matcher.py [-n REPEAT] [SIZE ...]
+
+For every size N, N module names are matched against N/4 excluded names
+(and N/4 --only prefixes).  The script checks that both ways give the
+same answers, and prints the best time for each.  The old times grow with
+N * N, the matcher times with N.
+"""
+from __future__ import print_function
+import argparse
+import fnmatch
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pydeps.matcher import Matcher, PrefixMatcher   # noqa
+
+
+def module_names(n):
+    return ['pkg%d.sub%d.mod%d' % (i % 97, i % 13, i) for i in range(n)]
+
+
+def old_exclude(names, excluded):
+    skiplist = [re.compile(fnmatch.translate(name)) for name in excluded]
+    return [any(skip.match(name) for skip in skiplist) for name in names]
+
+
+def new_exclude(names, excluded):
+    m = Matcher(excluded)
+    return [m.match(name) for name in names]
+
+
+def old_only(names, prefixes):
+    return [any(name.startswith(p) for p in prefixes) for name in names]
+
+
+def new_only(names, prefixes):
+    only = PrefixMatcher(prefixes)
+    return [only.match(name) for name in names]
+
+
+def best_time(fn, repeat, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, res
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument('-n', '--repeat', type=int, default=3)
+    p.add_argument('size', nargs='*', type=int, default=[1000, 2000, 4000, 8000])
+    args = p.parse_args(argv)
+
+    print("%8s %12s %12s %12s %12s" % ('N', 'old exclude', 'exclude', 'old only', 'only'))
+    for n in args.size:
+        names = module_names(n)
+        excluded = names[::4]
+        prefixes = [name[:-1] for name in names[::4]]
+        oe, old = best_time(old_exclude, args.repeat, names, excluded)
+        ne, new = best_time(new_exclude, args.repeat, names, excluded)
+        if old != new:
+            print("MISMATCH exclude", n)
+        oo, old = best_time(old_only, args.repeat, names, prefixes)
+        no, new = best_time(new_only, args.repeat, names, prefixes)
+        if old != new:
+            print("MISMATCH only", n)
+        print("%8d %10.1fms %10.1fms %10.1fms %10.1fms" % (n, oe * 1000, ne * 1000, oo * 1000, no * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Measure :func:`pydeps.metrics.graph_metrics` on generated import graphs,
+with numpy and in plain Python.
+
+Usage::
+
+    python benchmarks/bench_metrics.py [-n REPEAT] [--no-numpy] [SIZE ...]
+
+Every graph of N modules looks like a package tree: a module imports a
+few modules "below" it (with higher numbers) and, now and then, one above
+it, which makes import cycles.  The script checks that both ways give the
+same metrics, and prints the best time for each.
+"""
+from __future__ import print_function
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pydeps import metrics   # noqa
+
+
+def import_graph(n, seed=0):
+    rnd = random.Random(seed)
+    succ = []
+    for i in range(n):
+        below = {rnd.randrange(i + 1, n) for _ in range(rnd.randint(0, 6)) if i + 1 < n}
+        if i and rnd.random() < 0.01:
+            below.add(rnd.randrange(i))     # an import cycle
+        succ.append(sorted(below))
+    return succ
+
+
+def best_time(fn, repeat, *args, **kw):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = fn(*args, **kw)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, res
+
+
+def same(a, b):
+    return all(
+        all(abs(x - y) <= 1e-9 * max(1.0, abs(x)) for x, y in zip(a[name], b[name]))
+        for name in a
+    )
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument('-n', '--repeat', type=int, default=1)
+    p.add_argument('--no-numpy', action='store_true', help="only time the plain Python version")
+    p.add_argument('size', nargs='*', type=int, default=[5000, 20000])
+    args = p.parse_args(argv)
+
+    use_numpy = metrics.HAVE_NUMPY and not args.no_numpy
+    print("%8s %8s %12s %12s" % ('N', 'edges', 'python', 'numpy' if use_numpy else ''))
+    for n in args.size:
+        succ = import_graph(n)
+        edges = sum(len(children) for children in succ)
+        py, old = best_time(metrics.graph_metrics, args.repeat, succ, use_numpy=False)
+        if use_numpy:
+            npt, new = best_time(metrics.graph_metrics, args.repeat, succ, use_numpy=True)
+            if not same(old, new):
+                print("MISMATCH", n)
+            print("%8d %8d %11.2fs %11.2fs" % (n, edges, py, npt))
+        else:
+            print("%8d %8d %11.2fs" % (n, edges, py))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Measure pruning of standard library modules in the module finder (see
+:meth:`pydeps.py2depgraph.MyModuleFinder.is_pylib_module`).
+
+Usage::
+
+    python benchmarks/bench_pylib.py [-n REPEAT] [TARGET ...]
+
+Every target (default: a small generated app that imports asyncio, email
+and http) is analysed without --pylib, with and without pruning.  The
+script checks that both find the same imports between non-stdlib modules,
+and prints the best time and the number of modules the finder loaded for
+each.
+"""
+from __future__ import print_function
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pydeps.dummymodule import DummyModule      # noqa
+from pydeps.py2depgraph import MyModuleFinder   # noqa
+from pydeps.pystdlib import pystdlib            # noqa
+from pydeps.target import Target                # noqa
+
+APP = {
+    '__init__.py': '',
+    'server.py': 'import asyncio\nimport http.server\nfrom . import mail\n',
+    'mail.py': 'import email.mime.text\nfrom email import policy\nimport http.client\n',
+}
+
+
+def make_app(directory):
+    pkg = os.path.join(directory, 'benchapp')
+    os.mkdir(pkg)
+    for fname, txt in APP.items():
+        with open(os.path.join(pkg, fname), 'w') as fp:
+            fp.write(txt)
+    return pkg
+
+
+def analyse(fname, prune):
+    """Run the finder on ``fname``, returns (seconds, #modules loaded,
+       edges between non-stdlib modules).
+    """
+    t = Target(fname)
+    with t.chdir_work():
+        dummy = DummyModule(t)
+        start = time.perf_counter()
+        mf = MyModuleFinder([t.syspath_dir] + sys.path, excludes=['migrations'], no_cache=True)
+        mf.prune_pylib = prune
+        mf.run_script(dummy.fname)
+        elapsed = time.perf_counter() - start
+    pylib = pystdlib()
+    edges = {(k, v) for k, vals in mf._depgraph.items() if k not in pylib
+             for v in vals if v not in pylib}
+    return elapsed, len(mf.modules), edges
+
+
+def best_time(fname, prune, repeat):
+    best = None
+    for _ in range(repeat):
+        elapsed, nmodules, edges = analyse(fname, prune)
+        best = elapsed if best is None else min(best, elapsed)
+    return best, nmodules, edges
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument('-n', '--repeat', type=int, default=3)
+    p.add_argument('target', nargs='*')
+    args = p.parse_args(argv)
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        targets = [os.path.abspath(t) for t in args.target] or [make_app(tmpdir)]
+        for fname in targets:
+            full, full_n, full_edges = best_time(fname, False, args.repeat)
+            pruned, pruned_n, pruned_edges = best_time(fname, True, args.repeat)
+            if full_edges != pruned_edges:
+                print("MISMATCH", fname, sorted(full_edges ^ pruned_edges))
+            print(fname)
+            print("  no pruning: %8.1f ms  %5d modules loaded" % (full * 1000, full_n))
+            print("  pruning:    %8.1f ms  %5d modules loaded  (%.1fx)" % (
+                pruned * 1000, pruned_n, full / pruned))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
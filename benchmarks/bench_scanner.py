@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Compare the ``bytecode`` and ``ast`` scanner engines (see
+:mod:`pydeps.importscan`).
+
+Usage::
+
+    python benchmarks/bench_scanner.py [-n REPEAT] [DIRECTORY ...]
+
+Every .py file below the given directories (default: the pydeps package
+and its tests) is scanned with both engines.  The script checks that the
+engines find the same imports, and prints the best time for each.
+"""
+from __future__ import print_function
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pydeps import importscan   # noqa
+
+
+def sources_below(directories):
+    for directory in directories:
+        for root, dirs, files in os.walk(directory):
+            for fname in files:
+                if fname.endswith('.py'):
+                    path = os.path.join(root, fname)
+                    with open(path, 'rb') as fp:
+                        yield path, fp.read() + b'\n'
+
+
+def bytecode_scan(path, txt):
+    co = compile(txt, path, 'exec', dont_inherit=True)
+    return importscan.code_imports(co)
+
+
+def ast_scan(path, txt):
+    return importscan.source_imports(txt, path)
+
+
+def imports_only(records):
+    return {r for r in records if r[0] != 'store'}
+
+
+def best_time(scan, corpus, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path, txt in corpus:
+            scan(path, txt)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument('-n', '--repeat', type=int, default=5)
+    p.add_argument('directory', nargs='*', default=[
+        os.path.join(root, 'pydeps'),
+        os.path.join(root, 'tests'),
+    ])
+    args = p.parse_args(argv)
+
+    corpus = []
+    for path, txt in sources_below(args.directory):
+        try:
+            bytecode = bytecode_scan(path, txt)
+        except (SyntaxError, ValueError):
+            continue
+        # the ast engine can only find more imports (in code the compiler
+        # removes as unreachable).
+        missing = imports_only(bytecode) - imports_only(ast_scan(path, txt))
+        if missing:
+            print("MISMATCH", path, sorted(missing))
+        corpus.append((path, txt))
+
+    nbytes = sum(len(txt) for _path, txt in corpus)
+    print("%d files, %.1f KB" % (len(corpus), nbytes / 1024.0))
+    bc = best_time(bytecode_scan, corpus, args.repeat)
+    at = best_time(ast_scan, corpus, args.repeat)
+    print("bytecode: %8.1f ms" % (bc * 1000))
+    print("ast:      %8.1f ms  (%.1fx)" % (at * 1000, bc / at))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Read Python modules straight out of zip archives (wheels, eggs, zipapps,
+and zip files on ``sys.path``), without unpacking them.
+
+A file inside an archive is named by the archive's path followed by the
+member name, e.g. ``/tmp/foo-1.0-py3-none-any.whl/foo/__init__.py``, which
+is also what :mod:`zipimport` uses for ``__file__``.
+
+An archive is memory mapped, and its central directory is read once (by
+:mod:`zipfile`), so listing a directory in the archive doesn't touch the
+file, and reading a member is a slice of the map (stored members) or a
+decompression straight from it (deflated members).
+
+The archives are cached (by file name) for the length of a run, and
+:func:`close_archives` closes them when the run is done.
+"""
+import io
+import mmap
+import os
+import struct
+import zipfile
+import zlib
+
+#: file name suffixes of the archives pydeps accepts as targets.
+ARCHIVE_SUFFIXES = ('.whl', '.egg', '.zip', '.pyz', '.pyzw')
+
+# the fixed part of a zip local file header, ending with the lengths of the
+# file name and extra field that precede the member data.
+_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+
+_archives = {}      # filename -> ((mtime_ns, size), Archive or None)
+
+
+class Archive(object):
+    """A memory mapped zip archive.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        with zipfile.ZipFile(filename) as zf:
+            infos = zf.infolist()
+        #: member name -> ZipInfo (files only)
+        self.members = {}
+        self._dirs = {'': (set(), set())}   # dirname -> (files, subdirs)
+        for info in infos:
+            name = info.filename.rstrip('/')
+            if not name:
+                continue
+            if not info.is_dir():
+                self.members[name] = info
+            self._add(name, info.is_dir())
+        with open(filename, 'rb') as fp:
+            self._map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        """Close the memory map (the archive can't be read after this).
+        """
+        self._map.close()
+
+    def _add(self, name, is_dir):
+        # add name (and the directories it is in) to the directory listings
+        if is_dir:
+            self._dirs.setdefault(name, (set(), set()))
+        while name:
+            dirname, _, base = name.rpartition('/')
+            files, dirs = self._dirs.setdefault(dirname, (set(), set()))
+            (dirs if is_dir else files).add(base)
+            name, is_dir = dirname, True
+
+    def listing(self, dirname):
+        """Return ``(files, dirs)``, the names of the files and directories
+           in the directory ``dirname`` of the archive ('' for the root).
+        """
+        files, dirs = self._dirs.get(dirname, ((), ()))
+        return frozenset(files), frozenset(dirs)
+
+    def read(self, name):
+        """Return the contents of the member ``name``.
+        """
+        info = self.members.get(name)
+        if info is None:
+            raise FileNotFoundError("No member %r in %s" % (name, self.filename))
+        header = _LOCAL_HEADER.unpack_from(self._map, info.header_offset)
+        if header[0] != b'PK\x03\x04':
+            raise zipfile.BadZipFile("Bad local header for %r in %s" % (name, self.filename))
+        start = info.header_offset + _LOCAL_HEADER.size + header[-2] + header[-1]
+        with memoryview(self._map) as data:
+            with data[start:start + info.compress_size] as member:
+                if info.compress_type == zipfile.ZIP_STORED:
+                    return bytes(member)
+                if info.compress_type == zipfile.ZIP_DEFLATED:
+                    return zlib.decompress(member, -zlib.MAX_WBITS)
+        with zipfile.ZipFile(self.filename) as zf:  # pragma: nocover (bzip2, lzma)
+            return zf.read(info)
+
+    def open(self, name):
+        """Return a binary file object with the contents of member ``name``.
+        """
+        return io.BytesIO(self.read(name))
+
+    def modules(self):
+        """Return the names of the modules and packages in the archive (the
+           same ones :func:`pydeps.dummymodule.python_sources_below` finds
+           in a directory): the top level modules, and the packages with
+           their modules and subpackages.
+        """
+        res = []
+        stack = [('', '')]      # (dirname, package name)
+        while stack:
+            dirname, package = stack.pop()
+            files, dirs = self.listing(dirname)
+            for fname in files:
+                modname, ext = os.path.splitext(fname)
+                if ext not in ('.py', '.pyw') or fname.startswith('.') or fname == '__main__.py' and not package:
+                    continue
+                if modname == '__init__':
+                    res.append(package)
+                elif '.' not in modname:
+                    res.append(package + '.' + modname if package else modname)
+            for d in dirs:
+                if d.startswith('.') or d == 'migrations' or '.' in d:
+                    continue
+                subdir = dirname + '/' + d if dirname else d
+                if '__init__.py' in self.listing(subdir)[0]:
+                    stack.append((subdir, package + '.' + d if package else d))
+        return sorted(res)
+
+
+def is_archive(filename):
+    """Is ``filename`` a zip archive pydeps can analyse?
+    """
+    return (os.path.splitext(filename)[1].lower() in ARCHIVE_SUFFIXES
+            and zipfile.is_zipfile(filename))
+
+
+def open_archive(filename):
+    """Return the (cached) :class:`Archive` for ``filename``, or None if
+       it isn't a zip archive.
+    """
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return None
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _archives.get(filename)
+    if cached is not None:
+        if cached[0] == stamp:
+            return cached[1]
+        if cached[1] is not None:
+            cached[1].close()   # the file has changed
+    try:
+        res = Archive(filename)
+    except (OSError, ValueError, zipfile.BadZipFile):
+        res = None
+    _archives[filename] = (stamp, res)
+    return res
+
+
+def close_archives():
+    """Close the cached archives and forget them (the next run opens them
+       again).
+    """
+    for _stamp, arc in _archives.values():
+        if arc is not None:
+            arc.close()
+    _archives.clear()
+
+
+def split(path):
+    """Split the absolute ``path`` of a file or directory inside a zip
+       archive into ``(Archive, member name)`` (the member name is '' for
+       the archive itself).  Returns ``(None, None)`` if ``path`` isn't
+       inside an archive.
+    """
+    head, tail = path, []
+    while not os.path.exists(head):
+        newhead, part = os.path.split(head)
+        if newhead == head:
+            return None, None
+        head = newhead
+        tail.append(part)
+    if not os.path.isfile(head):
+        return None, None
+    arc = open_archive(head)
+    if arc is None:
+        return None, None
+    return arc, '/'.join(reversed(tail))
+
+
+def open_file(pathname):
+    """Open ``pathname``, which can be inside a zip archive, for reading
+       bytes.
+    """
+    try:
+        return open(pathname, 'rb')
+    except (FileNotFoundError, NotADirectoryError):
+        arc, name = split(os.path.abspath(pathname))
+        if arc is None or name not in arc.members:
+            raise
+        return arc.open(name)
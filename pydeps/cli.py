@@ -156,9 +156,12 @@ def parse_args(argv=()):
     args.add('--nodot', '--no-dot', action='store_true', default=False, dest='no_dot', help="skip dot conversion")
     args.add('--no-output', action='store_true', help="don't create .svg/.png file, implies --no-show (-t/-o will be ignored)")
     args.add('--show-cycles', action='store_true', help="show only import cycles")
+    args.add('--cycles-output', dest='cycles_out', default=None, kind="FNAME:output", help="write the import cycles (strongly connected components and their elementary cycles) as json to 'file'")
+    args.add('--max-cycles', default=100, type=int, metavar="INT", help="list at most INT elementary import cycles in --cycles-output (default=100)")
     args.add('--debug-mf', default=0, type=int, metavar="INT", help="set the ModuleFinder.debug flag to this value")
     args.add('--noise-level', default=200, type=int, metavar="INT", help="exclude sources or sinks with degree greater than noise-level")
     args.add('--max-bacon', default=2, type=int, metavar="INT", help="exclude nodes that are more than n hops away (default=2, 0 -> infinite)")
+    args.add('--bacon-roots', default=[], nargs="+", metavar="MODULE", help="count --max-bacon from the nearest of these modules (or the modules in these packages) instead of from the target")
     args.add('--max-module-depth', default=0, type=int, metavar="INT", help="coalesce deep modules to at most n levels")
     args.add('--pylib', action='store_true', help="include python std lib modules")
     args.add('--pylib-all', action='store_true', help="include python all std lib modules (incl. C modules)")
@@ -177,6 +180,30 @@ def parse_args(argv=()):
     args.add('--collapse-target-cluster', action='store_true', help="collapse target module (--keep-target-cluster will be ignored)")
     args.add('--rmprefix', default=[], nargs="+", metavar="PREFIX", help="remove PREFIX from the displayed name of the nodes")
     args.add('--start-color', default=0, type=int, metavar="INT", help="starting value for hue from 0 (red/default) to 360.")
+    args.add('--cache-dir', default=None, metavar="DIR", help="directory for cached import scans of unchanged files (default ~/.cache/pydeps)")
+    args.add('--no-cache', action='store_true', help="don't read or write cached import scans")
+    args.add('-j', '--jobs', default=1, type=int, metavar="INT", help="read and scan source files in INT worker processes (default=1)")
+    args.add('--scanner', default='bytecode', type=str, choices=['bytecode', 'ast'], help="how imports are found in source files: compile to bytecode (default) or only parse the syntax tree (faster)")
+    args.add('--watch', action='store_true', help="keep running, and re-analyse changed files and update the output whenever the graph changes")
+    args.add('--watch-interval', default=1.0, type=float, metavar="SECONDS", help="how often --watch looks for changed files (default=1.0)")
+    args.add('--cost', default=None, type=str, choices=['importtime', 'static', 'memory'], help="measure what each module costs and show it in the graph (importtime: run the target with python -X importtime, static: estimate it from the size of the bytecode, without running anything, memory: import the modules with tracemalloc and measure the memory they retain)")
+    args.add('--importtime-log', default=None, metavar="FILE", help="read the output of python -X importtime from FILE instead of running the target (implies --cost importtime)")
+    args.add('--show-cost', action='store_true', help="print the modules sorted by cost (with --cost)")
+    args.add('--lazy-imports', action='store_true', help="instead of drawing the graph, list the imports that would keep the most modules from being loaded at start-up if they were lazy")
+    args.add('--startup-module', default=None, metavar="MODULE", help="the module whose start-up --lazy-imports analyses (default: the target script, or the package's __main__)")
+    args.add('--why', default=None, metavar="MODULE", help="instead of drawing the graph, print the shortest chains of imports that import MODULE")
+    args.add('--why-paths', default=5, type=int, metavar="INT", help="the number of chains --why prints (default=5)")
+    args.add('--why-graph', action='store_true', help="also draw the graph of the --why chains (only)")
+    args.add('--query', default=[], nargs="+", metavar="QUERY", help="instead of drawing the graph, print the answers to the queries as json: A->B (does A transitively import B?), A->* (everything A imports), *->B (everything that imports B)")
+    args.add('--changed', default=[], nargs="+", metavar="PATH", help="instead of drawing the graph, print the modules (and test files) affected by changes to the files PATH as json")
+    args.add('--changed-since', default=None, metavar="REF", help="like --changed, with the files git diff --name-status REF lists (including the deleted files) and the untracked files")
+    args.add('--impact-format', default='json', type=str, choices=['json', 'tests'], help="the output of --changed/--changed-since: json (default), or tests: the affected test files, one per line (for pytest)")
+    args.add('--diff-against', default=None, metavar="FILE", help="instead of the graph, print what changed since the graph in FILE (written by --deps-output) as json, and draw only the changed modules")
+    args.add('--diff-context', default=0, type=int, metavar="INT", help="also draw the unchanged modules at most INT imports away from the changes (with --diff-against, default=0)")
+    args.add('--check-contracts', action='store_true', help="instead of drawing the graph, check the contracts in the config file ([tool.pydeps.contracts]), print the imports that break them, and exit with an error if any are broken")
+    args.add('--metrics-output', dest='metrics_out', default=None, kind="FNAME:output", help="write the graph metrics of the modules (fan-in/out, instability, transitive fan-in/out, depth, pagerank, betweenness) to 'file' (csv if it ends with .csv, json otherwise)")
+    args.add('--color-metric', default=None, type=str, choices=['fan_in', 'fan_out', 'instability', 'transitive_fan_in', 'transitive_fan_out', 'depth', 'pagerank', 'betweenness'], help="color the modules by this graph metric (from cool to hot)")
+    args.add('--noise-metric', default='degree', type=str, choices=['degree', 'fan_in', 'fan_out', 'transitive_fan_in', 'transitive_fan_out'], help="the metric of the sources and sinks --noise-level limits (default=degree)")
 
     # args.write_default_config()
     _args = args.parse_args(argv)
@@ -219,3 +246,33 @@ def parse_args(argv=()):
         _args.show_dot = True
 
     return vars(_args)
+
+
+def parse_diff_args(argv=()):
+    """Parse the arguments of ``pydeps-diff OLD NEW``, and return a dict.
+    """
+    _p, _args, argv = base_argparser(argv)
+    p = argparse.ArgumentParser(
+        prog='pydeps-diff',
+        description="compare two dependency graphs written by --deps-output",
+        parents=[_p],
+    )
+    p.add_argument('old', help="the graph before the change (json)")
+    p.add_argument('new', help="the graph after the change (json)")
+    p.add_argument('-o', default=None, dest='output', metavar="file", help="draw the changed modules to 'file'")
+    p.add_argument('-T', default='svg', dest='format', help="output format (svg|png)")
+    p.add_argument('--dot-output', dest='dot_out', default=None, help="write the dot code of the changed modules to 'file'")
+    p.add_argument('--diff-context', default=0, type=int, metavar="INT", help="also draw the unchanged modules at most INT imports away from the changes (default=0)")
+    p.add_argument('--display', default=None, metavar="PROGRAM", help="program to use to display the graph")
+    p.add_argument('--show', action='store_true', help="display the graph (with -o)")
+    p.add_argument('--reverse', action='store_true', help="draw arrows to (instead of from) imported modules")
+    p.add_argument('--rankdir', default='TB', type=str, choices=['TB', 'BT', 'LR', 'RL'], help="set the direction of the graph")
+    _args = p.parse_args(argv)
+
+    if _args.output:
+        _args.output = os.path.abspath(_args.output)
+    _args.no_dot = False
+    _args.no_output = _args.output is None
+    _args.show = _args.show and not _args.no_output
+    _args.show_dot = _args.dot_out is not None
+    return vars(_args)
@@ -114,3 +114,15 @@ def rgb2css(rgb):
     """Convert rgb to hex.
     """
     return '#%02x%02x%02x' % rgb
+
+
+def heatmap(fraction):
+    """Return the (bg, fg) colors for a value that is ``fraction`` [0..1]
+       of the maximum, from light yellow (cold) to dark red (hot).
+    """
+    fraction = min(1.0, max(0.0, fraction))
+    hue = (1 - fraction) * 60 / 360.
+    lightness = 0.85 - 0.45 * fraction
+    bg = rgb2eightbit(colorsys.hls_to_rgb(hue, lightness, 0.9))
+    fg = foreground(bg, (0, 0, 0), (255, 255, 255))
+    return bg, fg
@@ -184,6 +184,13 @@ class Config(object):
     #: show only import cycles
     show_cycles = False
 
+    #: write the import cycles (strongly connected components and their
+    #: elementary cycles) as json to 'file'
+    cycles_out = None
+
+    #: list at most this many elementary import cycles in cycles_out
+    max_cycles = 100
+
     #: set the ModuleFinder.debug flag to this value
     debug_mf = 0
 
@@ -193,6 +200,10 @@ class Config(object):
     #: exclude nodes that are more than n hops away (default=2, 0 -> infinite)
     max_bacon = 2
 
+    #: count max_bacon from the nearest of these modules (or the modules in
+    #: these packages) instead of from the target
+    bacon_roots = []
+
     #: coalesce deep modules to at most n levels
     max_module_depth = 0
 
@@ -249,6 +260,103 @@ class Config(object):
     #: starting value for hue from 0 (red/default) to 360.
     start_color = 0
 
+    #: directory for cached import scans of unchanged files (default
+    #: ~/.cache/pydeps)
+    cache_dir = None
+
+    #: don't read or write cached import scans
+    no_cache = False
+
+    #: read and scan source files in INT worker processes (default=1)
+    jobs = 1
+
+    #: how imports are found in source files: compile to bytecode (default)
+    #: or only parse the syntax tree (faster)
+    scanner = 'bytecode'
+
+    #: keep running, and re-analyse changed files and update the output
+    #: whenever the graph changes
+    watch = False
+
+    #: how often --watch looks for changed files (default=1.0)
+    watch_interval = 1.0
+
+    #: measure what each module costs and show it in the graph
+    #: (importtime: run the target with python -X importtime, static:
+    #: estimate it from the size of the bytecode, without running anything,
+    #: memory: import the modules with tracemalloc and measure the memory
+    #: they retain)
+    cost = None
+
+    #: read the output of python -X importtime from this file instead of
+    #: running the target (implies cost = importtime)
+    importtime_log = None
+
+    #: print the modules sorted by cost (with cost)
+    show_cost = False
+
+    #: instead of drawing the graph, list the imports that would keep the
+    #: most modules from being loaded at start-up if they were lazy
+    lazy_imports = False
+
+    #: the module whose start-up lazy_imports analyses (default: the target
+    #: script, or the package's __main__)
+    startup_module = None
+
+    #: instead of drawing the graph, print the shortest chains of imports
+    #: that import this module
+    why = None
+
+    #: the number of chains why prints
+    why_paths = 5
+
+    #: also draw the graph of the why chains (only)
+    why_graph = False
+
+    #: instead of drawing the graph, print the answers to the queries as json:
+    #: A->B (does A transitively import B?), A->* (everything A imports),
+    #: *->B (everything that imports B)
+    query = []
+
+    #: instead of drawing the graph, print the modules (and test files)
+    #: affected by changes to these files as json
+    changed = []
+
+    #: like changed, with the files git diff --name-status lists for this
+    #: git ref (including the deleted files) and the untracked files
+    changed_since = None
+
+    #: the output of changed/changed_since: json, or tests (the affected
+    #: test files, one per line)
+    impact_format = 'json'
+
+    #: instead of the graph, print what changed since the graph in this file
+    #: (written by deps_out) as json, and draw only the changed modules
+    diff_against = None
+
+    #: also draw the unchanged modules at most this many imports away from
+    #: the changes (with diff_against)
+    diff_context = 0
+
+    #: instead of drawing the graph, check the contracts, print the imports
+    #: that break them, and exit with an error if any are broken
+    check_contracts = False
+
+    #: the architectural contracts check_contracts checks (only from config
+    #: files, e.g. [tool.pydeps.contracts] in pyproject.toml)
+    contracts = {}
+
+    #: write the graph metrics of the modules (fan-in/out, instability,
+    #: transitive fan-in/out, depth, pagerank, betweenness) to this file
+    #: (csv if it ends with .csv, json otherwise)
+    metrics_out = None
+
+    #: color the modules by this graph metric (from cool to hot)
+    color_metric = None
+
+    #: the metric of the sources and sinks noise_level limits
+    noise_metric = 'degree'
+
     def __init__(self, **kwargs):
         for key in dir(self.__class__):
             if not key.startswith('_'):
@@ -297,12 +405,18 @@ class Config(object):
             self.no_output = boolval(value)
         if field == 'show_cycles':
             self.show_cycles = boolval(value)
+        if field == 'cycles_out':
+            self.cycles_out = identity(value)
+        if field == 'max_cycles':
+            self.max_cycles = int(value)
         if field == 'debug_mf':
             self.debug_mf = int(value)
         if field == 'noise_level':
             self.noise_level = int(value)
         if field == 'max_bacon':
             self.max_bacon = int(value)
+        if field == 'bacon_roots':
+            self.bacon_roots = listval(value)
         if field == 'max_module_depth':
             self.max_module_depth = int(value)
         if field == 'pylib':
@@ -337,6 +451,56 @@ class Config(object):
             self.rmprefix = listval(value)
         if field == 'start_color':
             self.start_color = int(value)
+        if field == 'cache_dir':
+            self.cache_dir = identity(value)
+        if field == 'no_cache':
+            self.no_cache = boolval(value)
+        if field == 'jobs':
+            self.jobs = int(value)
+        if field == 'scanner':
+            self.scanner = str(value)
+        if field == 'watch':
+            self.watch = boolval(value)
+        if field == 'watch_interval':
+            self.watch_interval = float(value)
+        if field == 'cost':
+            self.cost = str(value)
+        if field == 'importtime_log':
+            self.importtime_log = identity(value)
+        if field == 'show_cost':
+            self.show_cost = boolval(value)
+        if field == 'lazy_imports':
+            self.lazy_imports = boolval(value)
+        if field == 'startup_module':
+            self.startup_module = identity(value)
+        if field == 'why':
+            self.why = identity(value)
+        if field == 'why_paths':
+            self.why_paths = int(value)
+        if field == 'why_graph':
+            self.why_graph = boolval(value)
+        if field == 'query':
+            self.query = listval(value)
+        if field == 'changed':
+            self.changed = listval(value)
+        if field == 'changed_since':
+            self.changed_since = identity(value)
+        if field == 'impact_format':
+            self.impact_format = identity(value)
+        if field == 'diff_against':
+            self.diff_against = identity(value)
+        if field == 'diff_context':
+            self.diff_context = int(value)
+        if field == 'check_contracts':
+            self.check_contracts = boolval(value)
+        if field == 'contracts':
+            self.contracts = identity(value)
+        if field == 'metrics_out':
+            self.metrics_out = identity(value)
+        if field == 'color_metric':
+            self.color_metric = identity(value)
+        if field == 'noise_metric':
+            self.noise_metric = identity(value)
 
     def __iter__(self):
         return iter(self.__dict__.items())
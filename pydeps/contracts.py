@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Check architectural contracts on the dependency graph
+(``pydeps --check-contracts``).
+
+The contracts are tables in the ``[tool.pydeps.contracts]`` section of
+``pyproject.toml`` (or a ``contracts`` mapping in the other config
+files), e.g.::
+
+    [tool.pydeps.contracts.core-is-not-web]
+    type = "forbidden"
+    source = ["app.core"]
+    forbidden = ["app.web"]
+
+A module name stands for the module and everything below it.  The types
+of contracts are
+
+``forbidden``
+    the ``source`` modules must not import the ``forbidden`` modules,
+    directly or through other modules.
+``allowed``
+    the ``source`` modules may only import (directly) each other and the
+    ``allowed`` modules.
+``layers``
+    the ``layers`` are listed from the top: a module must not import a
+    module in a layer above its own, directly or through other modules.
+``independence``
+    the ``modules`` must not import each other, directly or through other
+    modules.
+
+Every contract is checked with one breadth first search from all its
+source modules (one per layer for ``layers``, one per module for
+``independence``), which finds the shortest chain of imports to every
+module it must not reach.
+"""
+import collections
+
+from .configs import listval
+
+#: contract type -> the fields it needs (the modules it is about first)
+CONTRACT_TYPES = {
+    'forbidden': ('source', 'forbidden'),
+    'allowed': ('source', 'allowed'),
+    'layers': ('layers',),
+    'independence': ('modules',),
+}
+
+
+def _under(name, packages):
+    """Is ``name`` one of the ``packages``, or in one of them?
+    """
+    while name:
+        if name in packages:
+            return True
+        name = name.rpartition('.')[0]
+    return False
+
+
+def _modules(dep_graph, packages):
+    return sorted(name for name in dep_graph.sources if _under(name, packages))
+
+
+def _chains(dep_graph, sources, targets):
+    """The shortest chain of imports from any of the ``sources`` to every
+       module in the ``targets`` packages it reaches (a breadth first
+       search, that doesn't continue past the targets).
+    """
+    parent = {}
+    if '__main__' in dep_graph.sources:
+        # importing __main__ (like pdb does) doesn't load anything
+        parent[dep_graph.sources['__main__'].id] = None
+    queue = collections.deque()
+    for name in sources:
+        i = dep_graph.sources[name].id
+        parent[i] = None
+        queue.append(i)
+    res = []
+    while queue:
+        i = queue.popleft()
+        for j in sorted(dep_graph.import_ids(i)):
+            if j in parent:
+                continue
+            parent[j] = i
+            if _under(dep_graph.name_of(j), targets):
+                chain = [j]
+                while parent[chain[-1]] is not None:
+                    chain.append(parent[chain[-1]])
+                res.append([dep_graph.name_of(k) for k in reversed(chain)])
+            else:
+                queue.append(j)
+    return res
+
+
+def _check_forbidden(dep_graph, contract):
+    sources = _modules(dep_graph, contract['source'])
+    return _chains(dep_graph, sources, set(contract['forbidden']))
+
+
+def _check_allowed(dep_graph, contract):
+    source = set(contract['source'])
+    allowed = source | set(contract['allowed'])
+    res = []
+    for name in _modules(dep_graph, source):
+        src = dep_graph.sources[name]
+        for imp in sorted(dep_graph.name_of(i) for i in dep_graph.import_ids(src.id)):
+            # importing a module imports its packages too
+            if not _under(imp, allowed) and not name.startswith(imp + '.'):
+                res.append([name, imp])
+    return res
+
+
+def _check_layers(dep_graph, contract):
+    layers = contract['layers']
+    res = []
+    for i, layer in enumerate(layers[1:], 1):
+        res += _chains(dep_graph, _modules(dep_graph, {layer}), set(layers[:i]))
+    return res
+
+
+def _check_independence(dep_graph, contract):
+    modules = contract['modules']
+    res = []
+    for module in modules:
+        others = set(modules) - {module}
+        res += _chains(dep_graph, _modules(dep_graph, {module}), others)
+    return res
+
+
+_CHECKS = {
+    'forbidden': _check_forbidden,
+    'allowed': _check_allowed,
+    'layers': _check_layers,
+    'independence': _check_independence,
+}
+
+
+def parse_contracts(contracts):
+    """Validate the ``contracts`` config (``{name: {'type': ..., field:
+       [module names]}}``), returns ``[(name, contract)]`` with the fields
+       as lists.
+    """
+    res = []
+    for name, contract in sorted(contracts.items()):
+        kind = contract.get('type')
+        if kind not in CONTRACT_TYPES:
+            raise RuntimeError("The contract %r has an unknown type %r (use one of %s)" % (
+                name, kind, ', '.join(sorted(CONTRACT_TYPES))))
+        parsed = dict(type=kind)
+        for field in CONTRACT_TYPES[kind]:
+            if field not in contract:
+                raise RuntimeError("The %s contract %r needs %r" % (kind, name, field))
+            parsed[field] = listval(contract[field])
+        res.append((name, parsed))
+    return res
+
+
+def check(dep_graph, contracts):
+    """Check the ``contracts`` config against ``dep_graph``, returns
+       ``[(name, type, violations)]``, where the violations are chains of
+       imports (lists of module names).
+    """
+    res = []
+    for name, contract in parse_contracts(contracts):
+        kind = contract['type']
+        # the modules the contract is about must be in the graph, or it is
+        # trivially kept (e.g. because of a misspelling)
+        for module in contract[CONTRACT_TYPES[kind][0]]:
+            if not _modules(dep_graph, {module}):
+                raise RuntimeError("The module %r in the contract %r is not in the graph" % (module, name))
+        res.append((name, kind, _CHECKS[kind](dep_graph, contract)))
+    return res
+
+
+def report(results):
+    """Return the ``--check-contracts`` report of the :func:`check`
+       ``results``.
+    """
+    broken = [r for r in results if r[2]]
+    lines = ['Contracts: %d kept, %d broken' % (len(results) - len(broken), len(broken)), '']
+    for name, kind, violations in results:
+        lines.append('%-6s %s (%s)' % ('BROKEN' if violations else 'KEPT', name, kind))
+        for chain in violations:
+            lines.append('    ' + ' -> '.join(chain))
+    return '\n'.join(lines)
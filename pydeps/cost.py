@@ -0,0 +1,382 @@
+# -*- coding: utf-8 -*-
+"""
+Attach what the modules cost to the dependency graph (``pydeps --cost``),
+so the graph shows which modules are expensive, not only how they are
+connected.
+
+``importtime``
+    run the target in a subprocess with ``python -X importtime`` (or read
+    the output of such a run from ``--importtime-log``), and use the self
+    and cumulative import time of each module (in microseconds).
+
+``static``
+    don't run anything, but estimate the cost of loading a module by the
+    size of its bytecode (the other static metrics the scanner records,
+    see :data:`pydeps.importscan.METRICS`, are in the report and the
+    ``--show-deps`` output).  The cumulative cost is the sum over every
+    module in the graph the module (transitively) imports.
+
+``memory``
+    import the modules of the graph in a subprocess with :mod:`tracemalloc`
+    running, the modules a module imports before the module itself, and use
+    the memory that is still allocated after each import (in bytes).  The
+    cumulative cost is computed as for ``static``.  The modules that retain
+    the most memory are the ones to preload in a server that forks its
+    workers (so the memory is shared), or to defer if they are not always
+    needed.
+
+Every node gets a ``cost`` (the module itself) and a ``cumulative_cost``
+(the module and the modules it imports), which are drawn as a heat map and
+added to the node labels, and listed by :func:`report`.
+"""
+import logging
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import textwrap
+
+from . import reachability
+from .dummymodule import target_modules
+
+log = logging.getLogger(__name__)
+
+#: the kinds of cost that can be measured
+COSTS = ('importtime', 'static', 'memory')
+
+#: the unit of each kind of cost
+UNITS = {
+    'importtime': 'us',
+    'static': 'B',
+    'memory': 'B',
+}
+
+# written to stderr before the target's imports start (everything imported
+# before it is the interpreter starting up).
+_START_MARKER = 'pydeps: importtime start'
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$')
+
+
+def parse_importtime(lines):
+    """Parse the output of ``python -X importtime``.  Returns a list of
+       ``(module name, self us, cumulative us, nesting level)``, in the
+       order the imports finished.  If the output contains the start marker
+       written by :func:`importtime_script`, only the imports after it are
+       returned.
+    """
+    res = []
+    for line in lines:
+        if line.strip() == _START_MARKER:
+            del res[:]
+            continue
+        m = _IMPORTTIME_LINE.match(line)
+        if m:
+            selftime, cumulative, indent, name = m.groups()
+            res.append((name, int(selftime), int(cumulative), (len(indent) - 1) // 2))
+    return res
+
+
+def importtime_script(target):
+    """Return the Python code that imports what ``target`` imports when it
+       is run (without running its ``if __name__ == '__main__'`` block), or
+       the modules of a package, archive, or directory target.
+    """
+    # import what runpy.run_path needs before the marker, so it is not counted
+    res = "import pkgutil, runpy, sys\nsys.stderr.write(%r)\nsys.stderr.flush()\n" % (_START_MARKER + '\n')
+    if target.is_pysource or target.archive_main:
+        return res + "runpy.run_path(%r, run_name='__pydeps_importtime__')\n" % target.path
+    # -X importtime only times the import statement (i.e. __import__),
+    # and importing a __main__ module would run the program.
+    names = [name for name in target_modules(target) if name.split('.')[-1] != '__main__']
+    return res + textwrap.dedent("""\
+        for name in %r:
+            try:
+                __import__(name)
+            except (Exception, SystemExit):
+                pass
+    """) % (names,)
+
+
+def run_python(target, code, *options):
+    """Run ``code`` with ``python *options -c code`` in a subprocess that
+       can import the target's modules, and return its stderr output (as a
+       list of lines).
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [target.syspath_dir] + ([env['PYTHONPATH']] if env.get('PYTHONPATH') else []))
+    proc = subprocess.run(
+        [sys.executable] + list(options) + ['-c', code],
+        cwd=target.calling_dir, env=env,
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    if proc.returncode:
+        log.warning("importing %s failed (exit status %d)", target.fname, proc.returncode)
+    return proc.stderr.splitlines()
+
+
+def run_importtime(target):
+    """Run the imports of ``target`` with ``python -X importtime`` in a
+       subprocess, and return its stderr output (as a list of lines).
+    """
+    return run_python(target, importtime_script(target), '-X', 'importtime')
+
+
+def importtime_costs(target, **kw):
+    """Return ``{module name: (self us, cumulative us)}`` for ``target``,
+       and the total import time of the target.
+    """
+    logname = kw.get('importtime_log')
+    if logname:
+        with open(os.path.join(target.calling_dir, logname)) as fp:
+            records = parse_importtime(fp)
+    else:
+        records = run_importtime(target)
+        records = parse_importtime(records)
+    costs = {name: (selftime, cumulative) for name, selftime, cumulative, _level in records}
+    total = sum(cumulative for _name, _selftime, cumulative, level in records if level == 0)
+    return costs, total
+
+
+def _imports(dep_graph, name):
+    """The sources of ``dep_graph`` that are loaded when ``name`` is loaded
+       (what it imports, and its package).
+    """
+    src = dep_graph.sources[name]
+    res = sorted(dep_graph.name_of(i) for i in dep_graph.import_ids(src.id))
+    parent = name.rpartition('.')[0]
+    if parent in dep_graph.sources:
+        res.append(parent)
+    return res
+
+
+def _import_lists(dep_graph):
+    """``{module name: _imports(dep_graph, module name)}`` for every source.
+    """
+    return {name: _imports(dep_graph, name) for name in dep_graph.sources}
+
+
+def _cumulative_costs(dep_graph, own):
+    """Return ``{module name: (own cost, own cost of the module and
+       everything it imports)}`` for the modules in ``own``.
+    """
+    # (the modules of an import cycle load each other, so the costs are
+    # summed once per strongly connected component)
+    reach = reachability.Reachability(_import_lists(dep_graph))
+    cumulative = reach.descendant_sums(own)
+    return {name: (own[name], cumulative[name]) for name in own}
+
+
+def static_costs(target, dep_graph):
+    """Return ``{module name: (bytecode bytes, bytecode bytes of the module
+       and everything it imports)}`` for the sources in ``dep_graph``
+       that have static metrics, and the total for the target.
+    """
+    own = {name: src.metrics['bytecode_bytes']
+           for name, src in dep_graph.sources.items() if src.metrics}
+    return _cumulative_costs(dep_graph, own), sum(own.values())
+
+
+def import_order(dep_graph):
+    """The modules of ``dep_graph`` in the order they should be imported to
+       measure them one at a time, i.e. every module after the modules it
+       imports (except in import cycles).  The target script and
+       ``__main__`` modules are left out.
+    """
+    main = dep_graph.source_name('__main__')
+    imports = _import_lists(dep_graph)
+    res = []
+    visited = set()
+    for root in sorted(dep_graph.sources):
+        if root in visited:
+            continue
+        visited.add(root)
+        stack = [(root, iter(imports[root]))]
+        while stack:
+            node, pending = stack[-1]
+            for imp in pending:
+                if imp not in visited:
+                    visited.add(imp)
+                    stack.append((imp, iter(imports[imp])))
+                    break
+            else:
+                stack.pop()
+                res.append(node)
+    return [name for name in res if name != main and name.split('.')[-1] != '__main__']
+
+
+def memory_script(target, names, outname):
+    """Return the Python code that imports ``names`` one at a time (and then
+       runs the target script, as ``__main__``, for a script or zipapp),
+       and writes the memory each of them retained to ``outname``, one
+       ``module<TAB>bytes`` line each.
+    """
+    script = None
+    if target.is_pysource or target.archive_main:
+        script = target.path
+    return textwrap.dedent("""\
+        # (imported before tracing starts, so they are not counted)
+        import gc, runpy, sys, tracemalloc
+
+        def measure(load):
+            gc.collect()
+            before = tracemalloc.get_traced_memory()[0]
+            try:
+                load()
+            except (Exception, SystemExit):
+                pass
+            gc.collect()
+            return max(0, tracemalloc.get_traced_memory()[0] - before)
+
+        res = {}
+        tracemalloc.start()
+        for name in %r:
+            res[name] = measure(lambda: __import__(name))
+        if %r:
+            res['__main__'] = measure(lambda: runpy.run_path(%r, run_name='__pydeps_memory__'))
+        tracemalloc.stop()
+        with open(%r, 'w') as fp:
+            for name, size in res.items():
+                fp.write('%%s\\t%%d\\n' %% (name, size))
+    """) % (names, script is not None, script, outname)
+
+
+def run_memory(target, names):
+    """Import ``names`` (and run the target script) in a subprocess, and
+       return ``{module name: bytes retained}``.
+    """
+    fd, outname = tempfile.mkstemp(suffix='.txt', prefix='pydeps-memory-')
+    os.close(fd)
+    try:
+        run_python(target, memory_script(target, names, outname))
+        with open(outname) as fp:
+            lines = [line.split('\t') for line in fp if '\t' in line]
+        return {name: int(size) for name, size in lines}
+    finally:
+        os.remove(outname)
+
+
+def memory_costs(target, dep_graph):
+    """Return ``{module name: (bytes retained by importing the module,
+       bytes retained by the module and everything it imports)}`` for the
+       sources in ``dep_graph``, and the total for the target.
+    """
+    own = {}
+    for name, size in run_memory(target, import_order(dep_graph)).items():
+        # with --max-module-depth several modules are one source
+        name = dep_graph.source_name(name)
+        if name in dep_graph.sources:
+            own[name] = own.get(name, 0) + size
+    return _cumulative_costs(dep_graph, own), sum(own.values())
+
+
+def cost_kind(**kw):
+    """The kind of cost requested in ``kw`` (None if no cost is wanted).
+    """
+    if kw.get('cost'):
+        return kw['cost']
+    if kw.get('importtime_log'):
+        return 'importtime'
+    return None
+
+
+def add_costs(target, dep_graph, **kw):
+    """Measure the cost requested in ``kw`` and set the ``cost`` and
+       ``cumulative_cost`` of the sources in ``dep_graph``.
+    """
+    kind = cost_kind(**kw)
+    if kind == 'static':
+        costs, total = static_costs(target, dep_graph)
+    elif kind == 'memory':
+        costs, total = memory_costs(target, dep_graph)
+    else:
+        costs, total = importtime_costs(target, **kw)
+
+    dep_graph.cost_kind = kind
+    dep_graph.cost_unit = UNITS[kind]
+    dep_graph.total_cost = total
+    for name, (selfcost, cumulative) in costs.items():
+        # with --max-module-depth several modules are one source
+        src = dep_graph.sources.get(dep_graph.source_name(name))
+        if src is None:
+            continue
+        src.cost = (src.cost or 0) + selfcost
+        src.cumulative_cost = max(src.cumulative_cost or 0, cumulative)
+    main = dep_graph.sources.get(dep_graph.source_name('__main__'))
+    if main is not None and main.cumulative_cost is None:
+        main.cumulative_cost = total
+
+
+def format_cost(value, unit):
+    """Format the cost ``value`` (in ``unit``) for humans.
+    """
+    if unit == 'us':
+        if value >= 1000000:
+            return '%.2fs' % (value / 1000000.0)
+        return '%.1fms' % (value / 1000.0)
+    if unit == 'B':
+        if value >= 1024 * 1024:
+            return '%.1fMB' % (value / 1024.0 / 1024.0)
+        return '%.1fKB' % (value / 1024.0)
+    return '%d%s' % (value, unit)  # pragma: nocover
+
+
+def label(src, unit):
+    """The cost part of the label of the node for ``src``, e.g.
+       ``12.3ms (45.6ms)`` for the module's own and cumulative cost.
+    """
+    parts = []
+    if src.cost is not None:
+        parts.append(format_cost(src.cost, unit))
+    if src.cumulative_cost is not None and src.cumulative_cost != src.cost:
+        parts.append('(%s)' % format_cost(src.cumulative_cost, unit))
+    return ' '.join(parts)
+
+
+def report(dep_graph):
+    """Return a text report of the sources in ``dep_graph``, the most
+       expensive first, and the total cost of the target.
+    """
+    if dep_graph.cost_kind == 'static':
+        return static_report(dep_graph)
+    unit = dep_graph.cost_unit
+    sources = sorted(
+        (src for src in dep_graph.sources.values() if src.cost is not None),
+        key=lambda src: (-src.cost, -src.cumulative_cost, src.name)
+    )
+    lines = ['%12s %12s  %s' % ('self', 'cumulative', 'module')]
+    for src in sources:
+        lines.append('%12s %12s  %s' % (
+            format_cost(src.cost, unit), format_cost(src.cumulative_cost, unit), src.name,
+        ))
+    lines.append('%12s %12s  %s' % ('', format_cost(dep_graph.total_cost, unit), 'total'))
+    return '\n'.join(lines)
+
+
+def static_report(dep_graph):
+    """Return a text report of the static metrics of the sources in
+       ``dep_graph``, the heaviest transitive imports (i.e. the largest
+       cumulative bytecode size) first.
+    """
+    sources = sorted(
+        (src for src in dep_graph.sources.values() if src.metrics),
+        key=lambda src: (-src.cumulative_cost, -src.cost, src.name)
+    )
+    fmt = '%12s %10s %10s %8s %10s %10s  %s'
+    lines = [fmt % ('cumulative', 'bytecode', 'source', 'code', 'statements', 'constants', 'module')]
+    for src in sources:
+        m = src.metrics
+        lines.append(fmt % (
+            format_cost(src.cumulative_cost, 'B'),
+            format_cost(m['bytecode_bytes'], 'B'),
+            format_cost(m['source_bytes'], 'B'),
+            m['code_objects'],
+            m['statements'],
+            format_cost(m['constants_bytes'], 'B'),
+            src.name,
+        ))
+    lines.append(fmt % (format_cost(dep_graph.total_cost, 'B'), '', '', '', '', '', 'total'))
+    return '\n'.join(lines)
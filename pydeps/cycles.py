@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Import cycles as strongly connected components.
+
+Every import cycle lies within a strongly connected component (SCC) of the
+import graph, i.e. a maximal set of modules where every module (indirectly)
+imports every other module, so the modules and imports that are part of a
+cycle are found in linear time with Tarjan's algorithm.  Listing the
+cycles themselves (the elementary cycles, Johnson's algorithm) can take
+exponential time on a dense component, so it is bounded by a maximum
+number of cycles.
+
+Both are iterative, so deep import chains don't hit the recursion limit.
+"""
+import collections
+
+
+def strongly_connected_components(edges):
+    """Return the strongly connected components of the graph ``edges``
+       (``{node: [nodes it has an edge to]}``), as lists of nodes, in
+       reverse topological order (a component comes after the components
+       it has edges to).
+    """
+    index = {}
+    low = {}
+    stack = []
+    onstack = set()
+    res = []
+    for root in edges:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        onstack.add(root)
+        work = [(root, iter(edges[root]))]
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = len(index)
+                    stack.append(child)
+                    onstack.add(child)
+                    work.append((child, iter(edges[child])))
+                    break
+                if child in onstack:
+                    low[node] = min(low[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        onstack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    res.append(component)
+    return res
+
+
+def is_cyclic(edges, component):
+    """Is ``component`` (a strongly connected component of ``edges``) a
+       cycle, i.e. more than one node or a node with an edge to itself?
+    """
+    return len(component) > 1 or component[0] in edges[component[0]]
+
+
+def _unblock(node, blocked, blockers):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node in blocked:
+            blocked.remove(node)
+            stack.extend(blockers.pop(node, ()))
+
+
+def elementary_cycles(edges, component, limit):
+    """Return at most ``limit`` of the elementary cycles (cycles that don't
+       visit a node twice) in ``component``, a strongly connected component
+       of ``edges``, as lists of nodes where the first node is repeated at
+       the end (e.g. ``['a', 'b', 'a']``).
+    """
+    res = []
+    todo = [sorted(component)]
+    while todo and len(res) < limit:
+        nodes = todo.pop()
+        members = set(nodes)
+        subgraph = {n: sorted((m for m in edges[n] if m in members), reverse=True) for n in nodes}
+        start = nodes[0]
+
+        # Johnson's circuit search from ``start``, within ``members``
+        path = [start]
+        blocked = {start}
+        blockers = collections.defaultdict(set)
+        closed = set()
+        stack = [(start, list(subgraph[start]))]
+        while stack and len(res) < limit:
+            node, children = stack[-1]
+            if children:
+                child = children.pop()
+                if child == start:
+                    res.append(path + [start])
+                    closed.update(path)
+                elif child not in blocked:
+                    path.append(child)
+                    stack.append((child, list(subgraph[child])))
+                    closed.discard(child)
+                    blocked.add(child)
+                    continue
+            if not children:
+                if node in closed:
+                    _unblock(node, blocked, blockers)
+                else:
+                    for child in subgraph[node]:
+                        blockers[child].add(node)
+                stack.pop()
+                path.pop()
+
+        # the remaining cycles don't go through ``start``
+        del subgraph[start]
+        rest = {n: [m for m in children if m != start] for n, children in subgraph.items()}
+        for comp in strongly_connected_components(rest):
+            if is_cyclic(rest, comp):
+                todo.append(sorted(comp))
+    return res
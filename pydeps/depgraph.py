@@ -1,15 +1,14 @@
 # -*- coding: utf-8 -*-
 from __future__ import print_function
-from collections import defaultdict
-import fnmatch
+import array
+import collections
 from .pycompat import zip_longest
 import json
 import os
 import pprint
-import re
 import enum
 
-from . import colors, cli
+from . import colors, cli, cycles, importscan, matcher, metrics, reachability
 import sys
 import logging
 log = logging.getLogger(__name__)
@@ -22,6 +21,25 @@ PYLIB_PATH = {
 }
 
 
+_ID_MASK = 0xffffffff
+
+
+def _csr(count, edges):
+    """Return ``(offsets, targets)``, the compressed sparse row form of
+       ``edges`` (a set of ``from id << 32 | to id``) between ``count``
+       nodes: node ``i`` has edges to ``targets[offsets[i]:offsets[i + 1]]``
+       (in id order).
+    """
+    offsets = array.array('i', bytes(4 * (count + 1)))
+    targets = array.array('i')
+    for edge in sorted(edges):
+        offsets[(edge >> 32) + 1] += 1
+        targets.append(edge & _ID_MASK)
+    for i in range(count):
+        offsets[i + 1] += offsets[i]
+    return offsets, targets
+
+
 class imp(enum.Enum):
     C_BUILTIN = 6
     C_EXTENSION = 3
@@ -39,17 +57,42 @@ class Source(object):
     """A node (contained) in the dependency graph.
 
        It contains info about which modules are imported by this source,
-       and which modules import this source.
+       and which modules import this source.  The imports are stored in the
+       graph (by module id), so a source is only a light view of its node.
     """
-    def __init__(self, name, path=None, imports=(), exclude=False, args=None):
-        self.args = args or {}
+    __slots__ = ('graph', 'id', 'name', 'path', 'bacon', 'bacon_root', 'excluded',
+                 'cost', 'cumulative_cost', 'metrics')
+
+    def __init__(self, graph, id, name, path=None, exclude=False):
+        self.graph = graph
+        self.id = id                 # index of the module in graph
         self.name = name
         # self.kind = kind
         self.path = path             # needed here..?
-        self.imports = set(imports)  # modules we import
-        self.imported_by = set()     # modules that import us
         self.bacon = sys.maxsize      # bacon distance
+        self.bacon_root = None        # ..from this root (with --bacon-roots)
         self.excluded = exclude
+        self.cost = None             # what the module itself costs (--cost)
+        self.cumulative_cost = None  # ..including what it imports
+        self.metrics = None          # static cost metrics (--cost static)
+
+    @property
+    def args(self):
+        return self.graph.args
+
+    @property
+    def imports(self):
+        """The names of the modules we import (a new set on every access,
+           loops should use ``graph.import_ids(src.id)``).
+        """
+        return {self.graph.name_of(i) for i in self.graph.import_ids(self.id)}
+
+    @property
+    def imported_by(self):
+        """The names of the modules that import us (a new set on every
+           access, loops should use ``graph.importer_ids(src.id)``).
+        """
+        return {self.graph.name_of(i) for i in self.graph.importer_ids(self.id)}
 
     @property
     def name_parts(self):
@@ -66,29 +109,33 @@ class Source(object):
 
     @property
     def in_degree(self):
-        """Number of incoming arrows.
+        """Number of incoming arrows (the arrows point from the imported
+           modules, so this is the number of imports, the fan_out of
+           :mod:`pydeps.metrics`).
         """
-        return len(self.imports)
+        return len(self.graph.import_ids(self.id))
 
     @property
     def out_degree(self):
-        """Number of outgoing arrows.
+        """Number of outgoing arrows (the number of modules that import us,
+           the fan_in of :mod:`pydeps.metrics`).
         """
-        return len(self.imported_by)
+        return len(self.graph.importer_ids(self.id))
 
     @property
     def degree(self):
         return self.in_degree + self.out_degree
 
-    def is_noise(self):
+    def is_noise(self, value=None):
         """
         Is this module just noise?  (too common either at top or bottom of the graph).
+        ``value`` is the --noise-metric of the module (default: its degree).
         当該ライブラリに入る矢印と出る矢印の和をdegreeとして、
         それがnoise-levelより大きいかを判定する（矢印が多すぎるものは一般的すぎて邪魔という思想？）
         """
         noise = self.args['noise_level']
         if not (self.in_degree and self.out_degree):
-            return self.degree > noise
+            return (self.degree if value is None else value) > noise
         return False
 
     def __json__(self):
@@ -98,12 +145,22 @@ class Source(object):
             # kind=str(self.kind),
             bacon=self.bacon,
         )
+        if self.bacon_root is not None:
+            res['bacon_root'] = self.bacon_root
         if self.excluded:
             res['excluded'] = 'EXCLUDED'
-        if self.imports:
-            res['imports'] = list(sorted(self.imports))
-        if self.imported_by:
-            res['imported_by'] = list(sorted(self.imported_by))
+        imports = self.graph.import_ids(self.id)
+        if len(imports):
+            res['imports'] = sorted(self.graph.name_of(i) for i in imports)
+        imported_by = self.graph.importer_ids(self.id)
+        if len(imported_by):
+            res['imported_by'] = sorted(self.graph.name_of(i) for i in imported_by)
+        if self.cost is not None:
+            res['cost'] = self.cost
+        if self.cumulative_cost is not None:
+            res['cumulative_cost'] = self.cumulative_cost
+        if self.metrics is not None:
+            res['metrics'] = self.metrics
         return res
 
     def __str__(self):
@@ -130,22 +187,6 @@ class Source(object):
     def __repr__(self):
         return json.dumps(self.__json__(), indent=4)
 
-    def __iadd__(self, other):
-        """Merge other into self.
-        """
-        if self.name == other.name and self.imports == other.imports and self.bacon == other.bacon:
-            return self
-        log.debug("iadd lhs: %r", self)
-        log.debug("iadd rhs: %r", other)
-        assert self.name == other.name
-        self.path = self.path or other.path
-        self.imports |= other.imports
-        self.imported_by |= other.imported_by
-        self.bacon = min(self.bacon, other.bacon)
-        self.excluded = self.excluded or other.excluded
-        log.debug("iadd result: %r", self)
-        return self
-
     def get_label(self, splitlength=0, rmprefix=None):
         name = self.name
         if rmprefix:
@@ -181,44 +222,62 @@ class DepGraph(object):
 
         self.curhue = 150  # start with a green-ish color
         self.colors = {}
+        #: elementary import cycles (at most --max-cycles of them)
         self.cycles = []
+        #: strongly connected components with import cycles, largest first
+        self.sccs = []
         self.cyclenodes = set()
         self.cyclerelations = set()
         self.max_module_depth = args.get('max_module_depth', 0)
         self.target = target
+        #: the kind of the sources' costs (see :data:`pydeps.cost.COSTS`)
+        self.cost_kind = None
+        #: the unit of the sources' costs (None if there are no costs)
+        self.cost_unit = None
+        #: the cost of the target, including everything it imports
+        self.total_cost = None
+        #: {metric: {module name: value}} (see :mod:`pydeps.metrics`), with
+        #: --metrics-output or --color-metric
+        self.module_metrics = None
 
         self.args = args
 
         #: dict[module_name] -> Source object
         self.sources = {}
-        self.skiplist = [re.compile(fnmatch.translate(arg)) for arg in args['exclude']]
-        self.skiplist += [re.compile('^%s$' % fnmatch.translate(arg)) for arg in args['exclude_exact']]
+        #: Source objects by module id
+        self._nodes = []
+        #: the --exclude and --exclude-exact modules
+        self.skip = matcher.Matcher(args['exclude'], args['exclude_exact'])
         # depgraf = {name: imports for (name, imports) in depgraf.items()}
 
+        # the imports, as importer id << 32 | imported id
+        edges = set()
+        imported = {}   # imported module name -> id (once it has a path)
         for name, imports in depgraf.items():
             log.debug("depgraph name=%r imports=%r", name, imports)
-            src = Source(
-                name=self.source_name(name),
-                imports=[self.source_name(n) for n in imports.keys()],  # values handled below
-                args=args,
-                exclude=self._exclude(name),
-            )
-            log.debug("depgraph src=%r", src)
-            self.add_source(src)
+            a = self._add_node(self.source_name(name), exclude=self._exclude(name))
             for iname, path in imports.items():
-                src = Source(
-                    name=self.source_name(iname, path),
-                    path=path,
-                    args=args,
-                    exclude=self._exclude(iname)
-                )
-                self.add_source(src)
+                b = imported.get(iname)
+                if b is None:
+                    b = self._add_node(self.source_name(iname))
+                    self._add_node(self.source_name(iname, path), path, self._exclude(iname))
+                    if path:
+                        imported[iname] = b
+                edges.add(a << 32 | b)
+        #: the imports in compressed sparse row form: module i imports the
+        #: modules _imports[_import_offsets[i]:_import_offsets[i + 1]]
+        self._import_offsets, self._imports = _csr(len(self._nodes), edges)
+        #: ..and is imported by the modules in _importers (likewise)
+        self._importer_offsets, self._importers = _csr(
+            len(self._nodes), {(e & _ID_MASK) << 32 | e >> 32 for e in edges})
+        #: 1 for the modules that are still in the graph (see remove_excluded)
+        self._alive = bytearray(b'\x01') * len(self._nodes)
+        self._reachability = None
 
         self.module_count = len(self.sources)
         cli.verbose(1, "there are", self.module_count, "total modules")
 
-        self.connect_generations()
-        if self.args['show_cycles']:
+        if self.args['show_cycles'] or self.args.get('cycles_out'):
             self.find_import_cycles()
         self.calculate_bacon()
         if self.args['show_raw_deps']:
@@ -245,9 +304,9 @@ class DepGraph(object):
         """Returns the module name, possibly limited by --max-module-depth.
         """
         res = name
-        if name == "__main__" and self.target.is_pysource:
+        if name == "__main__" and (self.target.is_pysource or self.target.archive_main):
             # use the target file name directly if we're working on a
-            # single file
+            # single file (or a zipapp)
             return self.target.fname
 
         if name == "__main__" and path:
@@ -319,16 +378,58 @@ class DepGraph(object):
                 break
         return 4 if res > 4 else res
 
+    def add_metrics(self, metrics):
+        """Set the static cost metrics of the sources from ``metrics``,
+           ``{module name: values}`` (see :data:`pydeps.importscan.METRICS`).
+           The metrics of modules that are merged into one source (with
+           --max-module-depth) are added up.
+        """
+        for name, values in metrics.items():
+            src = self.sources.get(self.source_name(name))
+            if src is None:
+                continue
+            if src.metrics is None:
+                src.metrics = dict.fromkeys(importscan.METRICS, 0)
+            for key, value in zip(importscan.METRICS, values):
+                src.metrics[key] += value
+
     def _exclude(self, name):
-        return any(skip.match(name) for skip in self.skiplist)
+        return self.skip.match(name)
 
-    def add_source(self, src):
-        if src.name in self.sources:
-            log.debug("ADD-SOURCE[+=]\n%r", src)
-            self.sources[src.name] += src   # merge
+    def _add_node(self, name, path=None, exclude=False):
+        """Return the id of the module ``name``, adding it to the graph if
+           it isn't there already.
+        """
+        src = self.sources.get(name)
+        if src is None:
+            src = Source(self, len(self._nodes), name, path, exclude)
+            self._nodes.append(src)
+            self.sources[name] = src
         else:
-            log.debug("ADD-SOURCE[=]\n%r", src)
-            self.sources[src.name] = src
+            src.path = src.path or path
+            src.excluded = src.excluded or exclude
+        return src.id
+
+    def name_of(self, i):
+        """The name of the module with id ``i``.
+        """
+        return self._nodes[i].name
+
+    def import_ids(self, i):
+        """The ids of the modules (in the graph) that module ``i`` imports.
+        """
+        res = self._imports[self._import_offsets[i]:self._import_offsets[i + 1]]
+        if len(self.sources) < len(self._nodes):
+            return [j for j in res if self._alive[j]]
+        return res
+
+    def importer_ids(self, i):
+        """The ids of the modules (in the graph) that import module ``i``.
+        """
+        res = self._importers[self._importer_offsets[i]:self._importer_offsets[i + 1]]
+        if len(self.sources) < len(self._nodes):
+            return [j for j in res if self._alive[j]]
+        return res
 
     def __getitem__(self, item):
         return self.sources[item]
@@ -336,105 +437,171 @@ class DepGraph(object):
     def __iter__(self):
         visited = set(self.skip_modules) | set(self.args['exclude'])
 
-        def visit(src):
+        for src in self.sources.values():
             if src.name in visited:
-                return
+                continue
             visited.add(src.name)
-            for name in src.imports:
-                impmod = self.sources[name]
+            for i in self.import_ids(src.id):
+                impmod = self._nodes[i]
 
                 # FIXME: why do we want to exclude **/*/__init__.py? This line
                 # causes `collections` package in py3 to be excluded.
                 # if impmod.path and not impmod.path.endswith('__init__.py'):
                 if not src.name.startswith(impmod.name + "."):
+                    cli.verbose(4, "Yielding", impmod, src)
                     yield impmod, src
-                visit(impmod)
-
-        for _src in self.sources.values():
-            for source in visit(_src):
-                cli.verbose(4, "Yielding", source[0], source[1])
-                yield source
 
     def __repr__(self):
         return json.dumps(self.sources, indent=4, sort_keys=True,
                           default=lambda obj: obj.__json__() if hasattr(obj, '__json__') else obj)
 
+    def reachability(self):
+        """The reachability index of the graph (by module id), built the
+           first time it is needed.
+        """
+        if self._reachability is None:
+            self._reachability = reachability.Reachability({
+                src.id: self.import_ids(src.id) for src in self.sources.values()
+            })
+        return self._reachability
+
+    def reaches(self, a, b):
+        """Does module ``a`` (transitively) import module ``b``?
+        """
+        return self.reachability().reaches(self.sources[a].id, self.sources[b].id)
+
+    def descendants(self, name):
+        """The names of the modules ``name`` (transitively) imports.
+        """
+        return {self.name_of(i) for i in self.reachability().descendants(self.sources[name].id)}
+
+    def ancestors(self, name):
+        """The names of the modules that (transitively) import ``name``.
+        """
+        return {self.name_of(i) for i in self.reachability().ancestors(self.sources[name].id)}
+
     def find_import_cycles(self):
-        def traverse(node, path):
-            if node.name in self.cyclenodes:
-                return
-
-            if node.name in path:
-                # found cycle
-                cycle = path[path.index(node.name):] + [node.name]
-                self.cycles.append(cycle)
-                for nodename in cycle:
-                    self.cyclenodes.add(nodename)
-                for i in range(len(cycle) - 1):
-                    self.cyclerelations.add(
-                        (cycle[i], cycle[i + 1])
-                    )
-                # return
-
-            for impmod in sorted(node.imports):
-                traverse(self.sources[impmod], list(path + [node.name]))
-
-        for src in sorted(self.sources.values(), key=lambda x: x.name.lower()):
-            traverse(src, [])
-
-    def connect_generations(self):
-        """Traverse depth-first adding imported_by.
+        """Find the strongly connected components of the import graph that
+           contain cycles, the modules (``cyclenodes``) and imports
+           (``cyclerelations``) in them, and list up to --max-cycles of
+           their elementary cycles (``cycles``).
         """
-        for src in self.sources.values():
-            for _child in src.imports:
-                if _child in self.sources:
-                    child = self.sources[_child]
-                    child.imported_by.add(src.name)
+        edges = {
+            name: sorted(self.name_of(i) for i in self.import_ids(src.id))
+            for name, src in sorted(self.sources.items())
+        }
+        components = [
+            sorted(comp) for comp in cycles.strongly_connected_components(edges)
+            if cycles.is_cyclic(edges, comp)
+        ]
+        self.sccs = sorted(components, key=lambda comp: (-len(comp), comp[0]))
+        for comp in self.sccs:
+            members = set(comp)
+            self.cyclenodes |= members
+            for name in comp:
+                self.cyclerelations.update((name, imp) for imp in edges[name] if imp in members)
+
+        limit = self.args.get('max_cycles', 100)
+        for comp in self.sccs:
+            if len(self.cycles) >= limit:
+                cli.verbose(1, "only listing the first", limit, "import cycles")
+                break
+            self.cycles += cycles.elementary_cycles(edges, comp, limit - len(self.cycles))
 
-    def calculate_bacon(self):
+    def cycles_json(self):
+        """The import cycles as JSON: a summary of each strongly connected
+           component (its size, members, and the imports between them), and
+           the elementary cycles in it (see --max-cycles).
+        """
+        res = []
+        for comp in self.sccs:
+            members = set(comp)
+            res.append(dict(
+                size=len(comp),
+                members=comp,
+                internal_edges=sum(
+                    1 for name in comp for i in self.import_ids(self.sources[name].id)
+                    if self.name_of(i) in members
+                ),
+                cycles=[cycle for cycle in self.cycles if cycle[0] in members],
+            ))
+        return json.dumps(res, indent=4)
+
+    def bacon_roots(self):
+        """The sources the bacon distance is counted from: the modules
+           (and the modules in the packages) given with --bacon-roots, or
+           __main__ (or the dummy module).
         """
-        __main__.pyからのimportの階数を計算する？
-        （__main__.pyでしか実質発動しないのでは？）
+        names = self.args.get('bacon_roots')
+        if not names:
+            for name in ('__main__', self.args['dummyname']):
+                if name in self.sources:
+                    return [self.sources[name]]
+            return []
+        res = []
+        for name in names:
+            found = [src for src in self.sources.values()
+                     if src.name == name or src.name.startswith(name + '.')]
+            if not found:
+                log.warning("--bacon-roots: there is no module %s in the graph", name)
+            res += found
+        if not res:
+            raise RuntimeError("None of the --bacon-roots are in the graph: %s" % ' '.join(names))
+        return sorted(set(res), key=lambda src: src.name)
+
+    def calculate_bacon(self):
+        """Set the bacon distance of every source, i.e. the number of
+           imports between it and the nearest root (see :meth:`bacon_roots`),
+           with a breadth first search from all the roots at once.
         """
-        count = defaultdict(int)
-
-        def bacon(src, n):
-            """
-            src: DepGraph.sources
-            """
-            count[src.name] += 1
-            if src.bacon <= n:
-                return
-            src.bacon = min(src.bacon, n)
-            for imp_mod in src.imports:
-                bacon(self.sources[imp_mod], n + 1)
-
-        if '__main__' in self.sources:
-            bacon(self.sources['__main__'], 0)
-        elif self.args['dummyname'] in self.sources:
-            bacon(self.sources[self.args['dummyname']], 0)
+        roots = self.bacon_roots()
+        multiroot = bool(self.args.get('bacon_roots'))
+        bacon = array.array('q', [sys.maxsize]) * len(self._nodes)
+        nearest = array.array('i', [-1]) * len(self._nodes)
+        queue = collections.deque()
+        for root in roots:
+            bacon[root.id] = 0
+            nearest[root.id] = root.id
+            queue.append(root.id)
+
+        while queue:
+            i = queue.popleft()
+            for j in self.import_ids(i):
+                if bacon[j] > bacon[i] + 1:
+                    bacon[j] = bacon[i] + 1
+                    nearest[j] = nearest[i]
+                    queue.append(j)
+
+        for src in self._nodes:
+            src.bacon = bacon[src.id]
+            if multiroot and nearest[src.id] >= 0:
+                src.bacon_root = self._nodes[nearest[src.id]].name
 
     def exclude_noise(self):
         """
         ノイズ除去？ degreeを計算することにより依存・非依存の多すぎるライブラリをスキップ登録する。
         """
+        metric = self.args.get('noise_metric') or 'degree'
+        values = {}
+        if metric != 'degree':
+            values = metrics.compute(self, [metric])[metric]
         for src in list(self.sources.values()):
             if src.excluded:
                 continue
-            if src.is_noise():
-                cli.verbose(2, "excluding", src, "because it is noisy:", src.degree)
+            value = values.get(src.name)
+            if src.is_noise(value):
+                cli.verbose(2, "excluding", src, "because it is noisy:", src.degree if value is None else value)
                 src.excluded = True
-                self._add_skip(src.name)
 
     def exclude_bacon(self, limit):
         """
-        Exclude modules that are more than `limit` hops away from __main__.
+        Exclude modules that are more than `limit` hops away from __main__
+        (or the nearest of the --bacon-roots).
         階層の深すぎるライブラリをスキップ登録する
         """
         for src in list(self.sources.values()):
             if src.bacon > limit:
                 src.excluded = True
-                self._add_skip(src.name)
 
     def only_filter(self, paths):
         """
@@ -444,35 +611,27 @@ class DepGraph(object):
         """
         if not paths:
             return
-        paths = set(paths)
-
-        def should_include(node):
-            """
-            そのソースの名前がpathsの要素で始まっていたらTrueを返す
-            pathsの要素で始まっているものがなかったらFalseを返す
-            """
-            for p in paths:
-                if node.name.startswith(p):
-                    return True
-            return False
+        only = matcher.PrefixMatcher(paths)
 
         for src in list(self.sources.values()):
-            if not should_include(src):
+            if not only.match(src.name):
                 # pathsの要素で始まっているものがなかったらexcludedをTrueにしてスキップ登録
                 src.excluded = True
                 # print "Excluding bacon:", src.name
-                self._add_skip(src.name)
 
     def remove_excluded(self):
         """Remove all sources marked as excluded.
         """
-        sources = list(self.sources.values())
-        for src in sources:
+        for src in list(self.sources.values()):
             if src.excluded:
                 del self.sources[src.name]
-            src.imports = [m for m in src.imports if not self._exclude(m)]
-            src.imported_by = [m for m in src.imported_by if not self._exclude(m)]
+                self._alive[src.id] = 0
+        self._reachability = None
 
-    def _add_skip(self, name):
-        # print 'add skip:', name
-        self.skiplist.append(re.compile(fnmatch.translate(name)))
+    def restrict(self, names):
+        """Remove all sources except ``names``.
+        """
+        for src in self.sources.values():
+            if src.name not in names:
+                src.excluded = True
+        self.remove_excluded()
@@ -20,7 +20,14 @@
 # TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 from .render_context import RenderBuffer
-from . import colors
+from . import colors, cost
+
+
+def _heat(value, maxvalue):
+    # a square root scale, so the cheaper modules are not all the same color
+    if not value or not maxvalue:
+        return 0.0
+    return (float(value) / maxvalue) ** 0.5
 
 
 class PyDepGraphDot(object):
@@ -62,17 +69,38 @@ class PyDepGraphDot(object):
                 visited.add(b)
 
             space = colors.ColorSpace(visited)
+            unit = depgraph.cost_unit
+            maxcost = max((src.cost or 0 for src in visited), default=0)
+            maxcumulative = max((src.cumulative_cost or 0 for src in visited), default=0)
+            colored = None     # --color-metric values
+            if self.kw.get('color_metric') and depgraph.module_metrics:
+                colored = depgraph.module_metrics[self.kw['color_metric']]
+            maxmetric = max((colored.get(src.name) or 0 for src in visited), default=0) if colored else 0
             for src in sorted(visited):
                 bg, fg = depgraph.get_colors(src, space)
                 kwargs = {}
+                label = src.get_label(splitlength=14,
+                                      rmprefix=self.kw.get('rmprefix'))
 
                 if src.name in depgraph.cyclenodes:
                     kwargs['shape'] = 'octagon'
 
+                if unit is not None:
+                    # --cost: the color shows what the module itself costs,
+                    # the size what it costs including its imports.
+                    bg, fg = colors.heatmap(_heat(src.cost, maxcost))
+                    heat = _heat(src.cumulative_cost, maxcumulative)
+                    kwargs['fontsize'] = 14 + int(round(10 * heat))
+                    costlabel = cost.label(src, unit)
+                    if costlabel:
+                        label += '\\n' + costlabel
+                elif colored is not None:
+                    # --color-metric: the color shows the module's metric
+                    bg, fg = colors.heatmap(_heat(colored.get(src.name), maxmetric))
+
                 ctx.write_node(
                     src.name,
-                    label=src.get_label(splitlength=14,
-                                        rmprefix=self.kw.get('rmprefix')),
+                    label=label,
                     fillcolor=colors.rgb2css(bg),
                     fontcolor=colors.rgb2css(fg),
                     **kwargs
@@ -4,7 +4,7 @@ import os
 import textwrap
 import logging
 
-from . import cli
+from . import archive, cli
 
 log = logging.getLogger(__name__)
 
@@ -45,6 +45,38 @@ def python_sources_below(directory, package=True):
                     yield os.path.abspath(os.path.join(root, fname))
 
 
+def target_modules(target):
+    """Return the names of the modules the dummy module for a package,
+       archive, or directory ``target`` imports.
+    """
+    res = []
+    if target.is_module:
+        cli.verbose(1, "target is a PACKAGE")
+        for fname in python_sources_below(target.package_root):
+            res.append(fname2modname(fname, target.syspath_dir))
+
+    elif target.is_archive:
+        cli.verbose(1, "target is an ARCHIVE")
+        res.extend(archive.open_archive(target.path).modules())
+
+    elif target.is_dir:
+        # FIXME?: not sure what the intended semantics was here, as it is
+        #         this will almost certainly not do the right thing...
+        cli.verbose(1, "target is a DIRECTORY")
+        log.debug('target.dirname: %r', target.dirname)
+        dirname = os.path.abspath(os.path.join(target.calling_dir, target.calling_fname))
+        for fname in os.listdir(dirname):
+            fname = os.path.join(dirname, fname)
+            log.debug("fname: %r", fname)
+            if is_pysource(fname):
+                res.append(fname2modname(fname, ''))
+            elif is_module(fname):
+                log.debug("fname is a module: %r", fname)
+                for fnamea in python_sources_below(fname):
+                    res.append(fname2modname(fnamea, target.syspath_dir))
+    return res
+
+
 class DummyModule(object):
     """We create a file that imports the module to be investigated.
     """
@@ -54,33 +86,18 @@ class DummyModule(object):
         self.fname = '_dummy_' + target.modpath.replace('.', '_') + '.py'
         self.absname = os.path.join(target.workdir, self.fname)
 
-        if target.is_module:
-            cli.verbose(1, "target is a PACKAGE")
-            with open(self.fname, 'w') as fp:
-                for fname in python_sources_below(target.package_root):
-                    modname = fname2modname(fname, target.syspath_dir)
-                    self.print_import(fp, modname)
+        if target.archive_main:
+            # a zipapp, analyse it the way it is run
+            cli.verbose(1, "target is a ZIPAPP")
+            self.fname = target.archive_main
+            self.absname = target.archive_main
 
-        elif target.is_dir:
-            # FIXME?: not sure what the intended semantics was here, as it is
-            #         this will almost certainly not do the right thing...
-            cli.verbose(1, "target is a DIRECTORY")
+        elif target.is_module or target.is_archive or target.is_dir:
             log.debug('curdir: %r', os.getcwd())
             log.debug('fname: %r', self.fname)
-            log.debug('target.dirname: %r', target.dirname)
-
             with open(self.fname, 'w') as fp:
-                dirname = os.path.abspath(os.path.join(target.calling_dir, target.calling_fname))
-                for fname in os.listdir(dirname):
-                    fname = os.path.join(dirname, fname)
-                    log.debug("fname: %r", fname)
-                    if is_pysource(fname):
-                        self.print_import(fp, fname2modname(fname, ''))
-                    elif is_module(fname):
-                        log.debug("fname is a module: %r", fname)
-                        for fnamea in python_sources_below(fname):
-                            modname = fname2modname(fnamea, target.syspath_dir)
-                            self.print_import(fp, modname)
+                for modname in target_modules(target):
+                    self.print_import(fp, modname)
 
         else:
             assert target.is_pysource
@@ -106,8 +123,8 @@ class DummyModule(object):
         # log.debug("sys.path: %r", sys.path)
         if self.fname.endswith('.pyc') or self.fname.endswith('.pyo'):
             return '<pyc file, no text>'
-        with open(self.fname) as fp:
-            return fp.read()
+        with archive.open_file(self.fname) as fp:
+            return fp.read().decode('utf-8', 'replace')
 
     def legal_module_name(self, name):
         """Legal module names are dotted strings where each part
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+What changed between two snapshots of the dependency graph (the json
+``--deps-output`` writes)?
+
+``pydeps-diff old.json new.json`` (or ``pydeps mypackage --diff-against
+old.json``) reports the added and removed modules and imports, the
+modules whose bacon distance changed, and the modules whose import
+cycle (strongly connected component) changed.  The graph it draws only
+contains the changed modules (and ``--diff-context`` levels of unchanged
+modules around them), so it stays small enough to lay out quickly even
+when the whole graph is not.
+"""
+import json
+import sys
+
+from . import cycles
+from .render_context import RenderContext, Rankdir
+
+#: fill colors of the nodes/colors of the edges, by change status
+COLORS = {
+    'added': '#b3e6b3',
+    'removed': '#f4b6b6',
+    'changed': '#fbe5a6',
+    'unchanged': '#ffffff',
+}
+EDGE_COLORS = {
+    'added': '#2e8b2e',
+    'removed': '#cc2222',
+    'unchanged': '#aaaaaa',
+}
+
+
+def load(fname):
+    """Read a ``--deps-output`` snapshot.
+    """
+    try:
+        with open(fname) as fp:
+            return json.load(fp)
+    except (OSError, ValueError) as cause:
+        raise RuntimeError("Can't read the dependency graph %r: %s" % (fname, cause))
+
+
+def graph_edges(snapshot):
+    """``{name: [the names it imports]}`` for the modules in ``snapshot``.
+    """
+    return {
+        name: sorted(imp for imp in src.get('imports', ()) if imp in snapshot)
+        for name, src in snapshot.items()
+    }
+
+
+def cycle_members(edges):
+    """``{name: the modules in its import cycle}`` for the modules that
+       are part of a cycle.
+    """
+    res = {}
+    for comp in cycles.strongly_connected_components(edges):
+        if cycles.is_cyclic(edges, comp):
+            members = frozenset(comp)
+            for name in comp:
+                res[name] = members
+    return res
+
+
+def _bacon(src):
+    bacon = src.get('bacon')
+    return None if bacon is None or bacon >= sys.maxsize else bacon
+
+
+def diff(old, new):
+    """Compare the snapshots ``old`` and ``new``, returns a dict with the
+       ``added_nodes``, ``removed_nodes``, ``added_edges`` and
+       ``removed_edges`` (``[a, b]`` where ``a`` imports ``b``), the
+       ``bacon_changes`` (``{name: [old, new]}``, None is unreachable), and
+       the ``scc_changes`` (``{name: {'old': [...], 'new': [...]}}``, the
+       members of the module's import cycle), all sorted.
+    """
+    old_edges, new_edges = graph_edges(old), graph_edges(new)
+    old_pairs = {(a, b) for a, imps in old_edges.items() for b in imps}
+    new_pairs = {(a, b) for a, imps in new_edges.items() for b in imps}
+    common = set(old) & set(new)
+
+    bacon_changes = {}
+    for name in common:
+        before, after = _bacon(old[name]), _bacon(new[name])
+        if before != after:
+            bacon_changes[name] = [before, after]
+
+    old_cycles, new_cycles = cycle_members(old_edges), cycle_members(new_edges)
+    scc_changes = {}
+    for name in set(old_cycles) | set(new_cycles):
+        before = old_cycles.get(name, frozenset())
+        after = new_cycles.get(name, frozenset())
+        if before != after:
+            scc_changes[name] = dict(old=sorted(before), new=sorted(after))
+
+    return dict(
+        added_nodes=sorted(set(new) - set(old)),
+        removed_nodes=sorted(set(old) - set(new)),
+        added_edges=sorted([a, b] for a, b in new_pairs - old_pairs),
+        removed_edges=sorted([a, b] for a, b in old_pairs - new_pairs),
+        bacon_changes=bacon_changes,
+        scc_changes=scc_changes,
+    )
+
+
+def is_empty(d):
+    return not any(d.values())
+
+
+def changed_nodes(d):
+    """The modules that were added or removed, gained or lost an import,
+       or whose import cycle changed.
+    """
+    res = set(d['added_nodes']) | set(d['removed_nodes']) | set(d['scc_changes'])
+    for a, b in d['added_edges'] + d['removed_edges']:
+        res.add(a)
+        res.add(b)
+    return res
+
+
+def neighbourhood(d, old, new, context=0):
+    """The changed modules, and the unchanged modules at most ``context``
+       imports away from them (in either graph, in either direction).
+    """
+    res = changed_nodes(d)
+    if context:
+        adjacent = {}
+        for snapshot in (old, new):
+            for name, imps in graph_edges(snapshot).items():
+                for imp in imps:
+                    adjacent.setdefault(name, set()).add(imp)
+                    adjacent.setdefault(imp, set()).add(name)
+        frontier = set(res)
+        for _ in range(context):
+            frontier = {n for name in frontier for n in adjacent.get(name, ())} - res
+            res |= frontier
+    return res
+
+
+def _status(d, name):
+    if name in d['added_nodes']:
+        return 'added'
+    if name in d['removed_nodes']:
+        return 'removed'
+    if name in d['scc_changes'] or name in d['bacon_changes']:
+        return 'changed'
+    return 'unchanged'
+
+
+def diff2dot(d, old, new, context=0, reverse=False, rankdir='TB'):
+    """Dot source of the changed neighbourhood (see :func:`neighbourhood`),
+       colored by change status.  Like the dependency graph, the arrows
+       point from the imported modules to the modules that import them.
+    """
+    nodes = neighbourhood(d, old, new, context)
+    kinds = {tuple(e): 'added' for e in d['added_edges']}
+    kinds.update((tuple(e), 'removed') for e in d['removed_edges'])
+    rules = {}
+    for snapshot in (old, new):
+        for name, imps in graph_edges(snapshot).items():
+            for imp in imps:
+                if name in nodes and imp in nodes:
+                    rules[name, imp] = kinds.get((name, imp), 'unchanged')
+
+    ctx = RenderContext(reverse=reverse, rankdir=Rankdir(rankdir))
+    with ctx.graph(concentrate=False):
+        for name in sorted(nodes, key=lambda x: x.lower()):
+            status = _status(d, name)
+            label = name
+            if name in d['bacon_changes']:
+                before, after = d['bacon_changes'][name]
+                label += '\\nbacon %s -> %s' % (
+                    '-' if before is None else before, '-' if after is None else after)
+            attrs = dict(label=label, fillcolor=COLORS[status])
+            if name in d['scc_changes']:
+                attrs['shape'] = 'octagon'
+            if status == 'removed':
+                attrs['style'] = 'filled,dashed'
+            ctx.write_node(name, **attrs)
+        for (name, imp), kind in sorted(rules.items()):
+            attrs = dict(color=EDGE_COLORS[kind])
+            if kind == 'removed':
+                attrs['style'] = 'dashed'
+            elif kind == 'added':
+                attrs['penwidth'] = '2'
+            ctx.write_rule(imp, name, **attrs)
+    return ctx.text()
+
+
+def report(d):
+    """The diff as json.
+    """
+    return json.dumps(d, indent=4, sort_keys=True)
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+Which modules, and which test files, are affected by changed files
+(``pydeps --changed PATH ...`` or ``pydeps --changed-since REF``)?
+
+The changed files are mapped to module names (like the dummy module
+does, see :func:`pydeps.dummymodule.fname2modname`), and every module that
+(transitively) imports a changed module is affected, found by a breadth
+first search over the reverse imports.  A module is also affected when its
+package is, since loading the module loads the package.
+
+A deleted (or renamed) module isn't in the graph anymore, but the
+modules that still import it are: the finder records them as importing a
+missing module (``ModuleFinder.badmodules``), and they are affected too.
+When nothing is recorded as importing a deleted module, pydeps can't
+tell what the deletion affects, and the module is listed as ``unknown``.
+
+The test files are the affected modules whose file name looks like a
+pytest test file (``test_*.py`` or ``*_test.py``), so CI can run only
+those, e.g.::
+
+    pytest $(pydeps tests --changed-since origin/master --impact-format tests)
+"""
+import collections
+import fnmatch
+import json
+import logging
+import os
+import subprocess
+
+from .dummymodule import fname2modname
+
+log = logging.getLogger(__name__)
+
+#: the file names pytest collects tests from (by default)
+TEST_FILES = ('test_*.py', '*_test.py')
+
+
+def _git(args, cwd):
+    try:
+        out = subprocess.check_output(['git'] + args, cwd=cwd, stderr=subprocess.PIPE)
+    except (OSError, subprocess.CalledProcessError) as cause:
+        msg = getattr(cause, 'stderr', None) or str(cause)
+        if isinstance(msg, bytes):
+            msg = msg.decode('utf-8', 'replace')
+        raise RuntimeError("git %s failed: %s" % (' '.join(args), msg.strip()))
+    return out.decode('utf-8').splitlines()
+
+
+def git_changed_files(ref, cwd):
+    """The files that are different from the commit ``ref`` (committed or
+       not, including the deleted files and both names of renamed files),
+       and the new files git doesn't know about, as absolute paths.
+    """
+    top = _git(['rev-parse', '--show-toplevel'], cwd)[0]
+    names = []
+    for line in _git(['diff', '--name-status', ref, '--'], cwd):
+        # status<TAB>path, or status<TAB>old path<TAB>new path (renames, copies)
+        names += line.split('\t')[1:]
+    names += _git(['ls-files', '--others', '--exclude-standard', '--full-name'], top)
+    return sorted({os.path.join(top, name) for name in names if name})
+
+
+def path2modname(target, path):
+    """The name of the module in the file ``path`` (an absolute path
+       below the target's sys.path directory, None otherwise).
+    """
+    root = target.syspath_dir
+    if not path.startswith(root.rstrip(os.path.sep) + os.path.sep):
+        return None
+    if os.path.splitext(path)[1] not in ('.py', '.pyw'):
+        return None
+    modname = fname2modname(path, root)
+    if modname.endswith('.__init__'):
+        modname = modname[:-len('.__init__')]
+    return modname
+
+
+def changed_modules(target, dep_graph, paths):
+    """Return ``(modules, deleted, ignored)``: the names of the sources in
+       ``dep_graph`` for the changed ``paths``, the names of the modules in
+       the paths that don't exist anymore, and the other paths (that aren't
+       a module in the graph).
+    """
+    by_path = {}
+    for src in dep_graph.sources.values():
+        if src.path:
+            by_path[os.path.realpath(src.path)] = src.name
+    modules, deleted, ignored = set(), set(), []
+    for path in paths:
+        path = os.path.realpath(os.path.join(target.calling_dir, path))
+        name = by_path.get(path)
+        modname = None
+        if name is None:
+            modname = path2modname(target, path)
+            name = dep_graph.source_name(modname) if modname else None
+        if name in dep_graph.sources:
+            modules.add(name)
+        elif modname and not os.path.exists(path):
+            deleted.add(modname)
+        else:
+            ignored.append(path)
+    return modules, deleted, ignored
+
+
+def missing_importers(dep_graph, deleted, missing):
+    """The sources in ``dep_graph`` that import one of the ``deleted``
+       modules (or a module in one of them), according to ``missing``
+       (``{missing module name: {importer name: 1}}``, the finder's
+       ``badmodules``).  Returns ``{deleted module: importer names}``.
+    """
+    res = {}
+    for modname in deleted:
+        importers = set()
+        for badname, callers in missing.items():
+            if badname == modname or badname.startswith(modname + '.'):
+                importers.update(dep_graph.source_name(caller) for caller in callers)
+        res[modname] = {name for name in importers if name in dep_graph.sources}
+    return res
+
+
+def affected_modules(dep_graph, names):
+    """The modules in ``names`` and the modules that (transitively) import
+       them, or are in a package that does.
+    """
+    children = collections.defaultdict(list)
+    for name, src in dep_graph.sources.items():
+        parent = name.rpartition('.')[0]
+        if parent in dep_graph.sources:
+            children[dep_graph.sources[parent].id].append(src.id)
+
+    seen = {dep_graph.sources[name].id for name in names}
+    queue = collections.deque(seen)
+    while queue:
+        i = queue.popleft()
+        for j in list(dep_graph.importer_ids(i)) + children[i]:
+            if j not in seen:
+                seen.add(j)
+                queue.append(j)
+    return {dep_graph.name_of(i) for i in seen}
+
+
+def is_test_file(path):
+    return any(fnmatch.fnmatch(os.path.basename(path), pattern) for pattern in TEST_FILES)
+
+
+def impact(target, dep_graph, paths, missing=None):
+    """The impact of changing the files ``paths``: returns a dict with the
+       ``changed`` and ``affected`` module names, the affected ``tests``
+       (file names, relative to the current directory if they are below
+       it), the ``deleted`` modules and the ones among them whose impact is
+       ``unknown`` (see :func:`missing_importers`, ``missing`` is the
+       finder's ``badmodules``), and the ``ignored`` paths (that aren't
+       modules in the graph), all sorted.
+    """
+    changed, deleted, ignored = changed_modules(target, dep_graph, paths)
+    importers = missing_importers(dep_graph, deleted, missing or {})
+    unknown = sorted(name for name, names in importers.items() if not names)
+    if unknown:
+        log.warning("nothing in the graph imports the deleted modules %s, "
+                    "so their impact is unknown", ', '.join(unknown))
+    affected = affected_modules(dep_graph, changed.union(*importers.values()))
+    if dep_graph.source_name('__main__') == '__main__':
+        affected.discard('__main__')    # the dummy module
+    tests = set()
+    for name in affected:
+        path = dep_graph.sources[name].path
+        if path and is_test_file(path):
+            relpath = os.path.relpath(path, target.calling_dir)
+            tests.add(path if relpath.startswith(os.pardir) else relpath)
+    return dict(
+        changed=sorted(changed),
+        affected=sorted(affected),
+        tests=sorted(tests),
+        deleted=sorted(deleted),
+        unknown=unknown,
+        ignored=sorted(os.path.relpath(p, target.calling_dir) for p in ignored),
+    )
+
+
+def report(res, fmt='json'):
+    """Format the result of :func:`impact` as json, or (``fmt='tests'``)
+       as the test files, one per line.
+    """
+    if fmt == 'tests':
+        return '\n'.join(res['tests'])
+    return json.dumps(res, indent=4)
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+Extract the import records that :class:`pydeps.mf27.ModuleFinder` acts on.
+
+The records have the same shape as the ones produced by
+``modulefinder.ModuleFinder.scan_opcodes``, i.e. ``(what, args)`` tuples
+where ``what`` is one of ``"store"``, ``"absolute_import"``, or
+``"relative_import"``.  They only contain strings, ints, tuples and
+None, so they can be marshalled (cached) and pickled (sent between
+processes).
+
+There are two scanner engines:
+
+``bytecode``
+    compile the module and look for import opcodes (this is what
+    modulefinder does).
+
+``ast``
+    parse the module and only walk the statement lists of the syntax
+    tree (an import is always a statement, so expressions, e.g. large
+    constant tables, are never visited).  The import records are the same
+    as for the bytecode engine (the order can differ, and imports in code
+    the compiler removes as unreachable, e.g. under ``if 0:``, are
+    included), but "store" records are only produced for names bound at
+    module level.
+
+With ``metrics=True`` the records end with a ``("metrics", values)``
+record with the static cost metrics of the module (see :data:`METRICS`),
+so they are cached and prescanned together with the imports.
+"""
+import ast
+import importlib.util
+import marshal
+import os
+import struct
+from modulefinder import ModuleFinder as NativeModuleFinder
+
+from . import archive
+
+SCANNERS = ('bytecode', 'ast')
+
+#: the static cost metrics of a module, in the order of the values of the
+#: ``"metrics"`` record: the size of the source and of the marshalled code
+#: object (i.e. the .pyc file) in bytes, the number of code objects nested
+#: in the module (functions, classes, lambdas, comprehensions), the number
+#: of statements that are run when the module is imported (i.e. not inside
+#: functions), and the marshalled size of the constants of all the code
+#: objects in bytes.
+METRICS = ('source_bytes', 'bytecode_bytes', 'code_objects', 'statements', 'constants_bytes')
+
+# fields of ast nodes that contain nested statements (``handlers`` and
+# ``cases`` contain ExceptHandler/match_case nodes, which have a ``body``).
+_STATEMENT_LISTS = ('body', 'orelse', 'finalbody', 'handlers', 'cases')
+
+
+def scan_opcodes(co):
+    """Return the import records for the code object ``co`` (not including
+       code objects nested inside it).
+    """
+    # scan_opcodes doesn't use any instance state, and this way we follow
+    # whatever the running Python's modulefinder knows about bytecode.
+    return NativeModuleFinder.scan_opcodes(None, co)
+
+
+def code_imports(co):
+    """Return the import records for ``co`` and all code objects nested
+       inside it, in the order ``ModuleFinder.scan_code`` would visit them.
+    """
+    res = []
+    codetype = type(co)
+    stack = [co]
+    while stack:
+        c = stack.pop()
+        res.extend(scan_opcodes(c))
+        # reversed, so nested code objects are popped in co_consts order
+        stack.extend(reversed([k for k in c.co_consts if isinstance(k, codetype)]))
+    return res
+
+
+def read_pyc_header(data):
+    """Parse the header of the .pyc file contents ``data``.
+
+       Returns ``(flags, source_hash, mtime, size, pos)``, where
+       ``source_hash`` is None for timestamp based pyc files, ``mtime``
+       and ``size`` are None for hash based pyc files, and ``pos`` is the
+       offset of the marshalled code object.
+    """
+    if data[:4] != importlib.util.MAGIC_NUMBER:
+        raise ImportError("Bad magic number in .pyc file")
+    flags = struct.unpack('<L', data[4:8])[0]
+    if flags & 0x01:  # hash based
+        return flags, data[8:16], None, None, 16
+    mtime, size = struct.unpack('<LL', data[8:16])
+    return flags, None, mtime, size, 16
+
+
+def fresh_pyc_code(pathname):
+    """Return the code object from the ``__pycache__`` .pyc file of the
+       source file ``pathname`` if it is up to date, otherwise None.
+
+       Up to date means the same mtime and size as the source for timestamp
+       based pyc files, and the same source hash for hash based pyc files
+       (which are always checked, even if they were compiled as unchecked).
+    """
+    try:
+        with open(importlib.util.cache_from_source(pathname), 'rb') as fp:
+            data = fp.read()
+        flags, source_hash, mtime, size, pos = read_pyc_header(data)
+        if source_hash is not None:
+            with open(pathname, 'rb') as fp:
+                if importlib.util.source_hash(fp.read()) != source_hash:
+                    return None
+        else:
+            st = os.stat(pathname)
+            if (mtime, size) != (int(st.st_mtime) & 0xFFFFFFFF, st.st_size & 0xFFFFFFFF):
+                return None
+        return marshal.loads(data[pos:])
+    except (OSError, ImportError, NotImplementedError, ValueError, EOFError, TypeError, struct.error):
+        return None
+
+
+def scan_file(pathname, scanner='bytecode', fp=None, metrics=False):
+    """Return the import records for the source file ``pathname`` (read
+       from ``fp`` if it is given), ending with a "metrics" record if
+       ``metrics`` is true.  ``pathname`` can be inside a zip archive.
+
+       The bytecode engine uses an up-to-date ``__pycache__`` .pyc file
+       instead of compiling the source when there is one (and the metrics
+       aren't needed).
+    """
+    if scanner == 'bytecode' and not metrics:
+        co = fresh_pyc_code(pathname)
+        if co is not None:
+            return code_imports(co)
+    if fp is None:
+        with archive.open_file(pathname) as fp:
+            return scan_source(fp.read(), pathname, scanner, metrics)
+    return scan_source(fp.read(), pathname, scanner, metrics)
+
+
+def scan_source(txt, pathname, scanner='bytecode', metrics=False):
+    """Return the import records for the source text ``txt`` of the file
+       ``pathname``, using the ``scanner`` engine (and ending with a
+       "metrics" record if ``metrics`` is true).
+    """
+    size = len(txt.encode('utf-8') if isinstance(txt, str) else txt)
+    txt += b'\n' if isinstance(txt, bytes) else '\n'
+    if metrics:
+        # parse once, for the statements, imports and code object
+        tree = ast.parse(txt, pathname)
+        co = compile(tree, pathname, 'exec', dont_inherit=True)
+        res = tree_imports(tree) if scanner == 'ast' else code_imports(co)
+        res.append(metrics_record(co, size, tree))
+        return res
+    if scanner == 'ast':
+        return source_imports(txt, pathname)
+    co = compile(
+        txt,
+        pathname,
+        'exec',            # compile code block
+        dont_inherit=True  # [pydeps] don't inherit future statements from current environment
+    )
+    return code_imports(co)
+
+
+def _import_time_statements(tree):
+    """The number of statements in ``tree`` that are run when the module
+       is imported (everything except the bodies of functions).
+    """
+    res = 0
+    stack = [tree.body]
+    while stack:
+        for node in stack.pop():
+            res += isinstance(node, ast.stmt)   # (not except handlers or match cases)
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            for field in _STATEMENT_LISTS:
+                stmtlist = getattr(node, field, None)
+                if stmtlist:
+                    stack.append(stmtlist)
+    return res
+
+
+def metrics_record(co, source_bytes=0, tree=None):
+    """Return the ``("metrics", values)`` record for the module code object
+       ``co`` (see :data:`METRICS`).  The statements are only counted if
+       the syntax ``tree`` is given.
+    """
+    code_objects = 0
+    constants_bytes = 0
+    codetype = type(co)
+    stack = [co]
+    while stack:
+        c = stack.pop()
+        for k in c.co_consts:
+            if isinstance(k, codetype):
+                code_objects += 1
+                stack.append(k)
+            else:
+                constants_bytes += len(marshal.dumps(k))
+    statements = _import_time_statements(tree) if tree is not None else 0
+    return ("metrics", (source_bytes, len(marshal.dumps(co)), code_objects, statements, constants_bytes))
+
+
+def _bound_names(node):
+    """Names bound by the (non-import) statement ``node``.
+    """
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return [node.name]
+    if isinstance(node, ast.Assign):
+        targets = node.targets
+    elif isinstance(node, (ast.AugAssign, ast.For, ast.AsyncFor)):
+        targets = [node.target]
+    elif isinstance(node, ast.AnnAssign) and node.value is not None:
+        targets = [node.target]
+    elif isinstance(node, (ast.With, ast.AsyncWith)):
+        targets = [item.optional_vars for item in node.items if item.optional_vars is not None]
+    else:
+        return []
+    return [n.id for t in targets for n in ast.walk(t)
+            if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Store)]
+
+
+def source_imports(source, filename='<unknown>'):
+    """Return the import records for the Python ``source`` (str or bytes),
+       in source order, without compiling it to bytecode.
+
+       Raises SyntaxError, like compile(), if ``source`` can't be parsed.
+    """
+    return tree_imports(ast.parse(source, filename))
+
+
+def tree_imports(tree):
+    """Return the import records for the syntax tree of a module.
+    """
+    res = []
+    # stack of (statement iterator, is-module-scope)
+    stack = [(iter(tree.body), True)]
+    while stack:
+        stmts, toplevel = stack[-1]
+        node = next(stmts, None)
+        if node is None:
+            stack.pop()
+            continue
+
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                res.append(("absolute_import", (None, alias.name)))
+                if toplevel:
+                    res.append(("store", (alias.asname or alias.name.split('.')[0],)))
+        elif isinstance(node, ast.ImportFrom):
+            fromlist = tuple(alias.name for alias in node.names)
+            if node.level == 0:
+                res.append(("absolute_import", (fromlist, node.module)))
+            else:
+                res.append(("relative_import", (node.level, fromlist, node.module or '')))
+            if toplevel:
+                res.extend(("store", (alias.asname or alias.name,))
+                           for alias in node.names if alias.name != '*')
+        else:
+            if toplevel:
+                res.extend(("store", (name,)) for name in _bound_names(node))
+            nested_toplevel = toplevel and not isinstance(
+                node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+            )
+            for field in reversed(_STATEMENT_LISTS):
+                stmtlist = getattr(node, field, None)
+                if stmtlist:
+                    stack.append((iter(stmtlist), nested_toplevel))
+    return res
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Match module names against the ``--exclude``, ``--exclude-exact`` and
+``--only`` arguments.
+
+Every module name (and every import) is matched, so the cost of a match
+should not grow with the number of arguments:
+
+- the arguments without wildcards are plain names, looked up in a set,
+- the fnmatch patterns with wildcards are combined into one regular
+  expression, and
+- the ``--only`` prefixes are stored in a trie, so finding out whether a
+  name starts with (or is the start of) any of them only looks at the
+  characters of the name.
+"""
+import fnmatch
+import re
+
+_WILDCARDS = re.compile(r'[*?[]')
+
+
+class Matcher(object):
+    """Match module names against fnmatch ``patterns`` (like ``--exclude``)
+       and ``exact`` patterns (like ``--exclude-exact``, which must match
+       the whole name).
+    """
+    def __init__(self, patterns=(), exact=()):
+        #: the names that match
+        self.names = set()
+        regexes = []
+        for pattern in patterns:
+            if _WILDCARDS.search(pattern):
+                regexes.append(fnmatch.translate(pattern))
+            else:
+                self.names.add(pattern)
+        for pattern in exact:
+            if _WILDCARDS.search(pattern):
+                regexes.append('^%s$' % fnmatch.translate(pattern))
+            else:
+                self.names.add(pattern)
+        #: the wildcard patterns, combined (None if there are none)
+        self.pattern = re.compile('|'.join(regexes)) if regexes else None
+
+    def __bool__(self):
+        return bool(self.names) or self.pattern is not None
+
+    def match(self, name):
+        """Does ``name`` match any of the patterns?
+        """
+        if name in self.names:
+            return True
+        return self.pattern is not None and self.pattern.match(name) is not None
+
+
+class PrefixMatcher(object):
+    """Match module names against a set of prefixes (like ``--only``).
+    """
+    def __init__(self, prefixes=()):
+        # a trie of the characters of the prefixes, '' marks the end of one
+        self.root = {}
+        for prefix in prefixes:
+            node = self.root
+            for ch in prefix:
+                node = node.setdefault(ch, {})
+            node[''] = {}
+
+    def __bool__(self):
+        return bool(self.root)
+
+    def match(self, name):
+        """Does ``name`` start with one of the prefixes?
+        """
+        node = self.root
+        for ch in name:
+            if '' in node:
+                return True
+            node = node.get(ch)
+            if node is None:
+                return False
+        return '' in node
+
+    def is_prefix(self, name):
+        """Does one of the prefixes start with ``name``?
+        """
+        node = self.root
+        for ch in name:
+            node = node.get(ch)
+            if node is None:
+                return False
+        return True
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+Graph metrics of the modules (``pydeps --metrics-output FILE``).
+
+``fan_in``, ``fan_out``
+    the number of modules that import the module, and that it imports.
+``instability``
+    Robert C. Martin's instability, ``fan_out / (fan_in + fan_out)``: 0 for
+    a module that only is imported (stable, hard to change), 1 for a module
+    that only imports (nothing breaks when it changes).
+``transitive_fan_in``, ``transitive_fan_out``
+    the number of modules that (transitively) import the module, and that
+    it (transitively) imports, counted with the bitsets of
+    :class:`pydeps.reachability.Reachability`.
+``depth``
+    the length of the longest chain of imports below the module (the
+    modules of an import cycle share their depth).
+``pagerank``
+    the PageRank of the module, where importing a module votes for it.
+``betweenness``
+    the (normalized) betweenness centrality: how many of the shortest
+    chains of imports between other modules go through the module.  With
+    more than :data:`SAMPLES` modules, it is estimated from the shortest
+    chains from :data:`SAMPLES` modules (picked at random, repeatably).
+
+PageRank and betweenness use numpy (with the import graph in compressed
+sparse row form) when it is installed, and plain Python otherwise.
+"""
+import collections
+import csv
+import io
+import json
+import random
+
+from . import reachability
+
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except ImportError:  # pragma: nocover
+    np = None
+    HAVE_NUMPY = False
+
+#: all the metrics, in output order
+METRICS = (
+    'fan_in', 'fan_out', 'instability',
+    'transitive_fan_in', 'transitive_fan_out',
+    'depth', 'pagerank', 'betweenness',
+)
+#: the metrics that count modules (they can be compared to --noise-level)
+COUNT_METRICS = ('fan_in', 'fan_out', 'transitive_fan_in', 'transitive_fan_out')
+
+#: the number of modules betweenness samples shortest chains from
+SAMPLES = 256
+#: the PageRank damping factor
+DAMPING = 0.85
+
+
+def _depth(reach):
+    res = [0] * len(reach.components)
+    for i, comp in enumerate(reach.components):
+        # the components imported by a component come before it
+        for node in comp:
+            for child in reach.edges[node]:
+                j = reach.component[child]
+                if j != i:
+                    res[i] = max(res[i], res[j] + 1)
+    return [res[reach.component[node]] for node in range(len(reach.edges))]
+
+
+def _pagerank_py(succ, iterations=100, tol=1e-10):
+    n = len(succ)
+    rank = [1.0 / n] * n
+    for _ in range(iterations):
+        new = [0.0] * n
+        dangling = 0.0
+        for v, children in enumerate(succ):
+            if children:
+                share = rank[v] / len(children)
+                for w in children:
+                    new[w] += share
+            else:
+                dangling += rank[v]
+        base = (1 - DAMPING) / n + DAMPING * dangling / n
+        new = [base + DAMPING * x for x in new]
+        done = sum(abs(a - b) for a, b in zip(new, rank)) < tol
+        rank = new
+        if done:
+            break
+    return rank
+
+
+def _pagerank_np(offsets, targets, iterations=100, tol=1e-10):
+    n = len(offsets) - 1
+    outdeg = np.diff(offsets)
+    sources = np.repeat(np.arange(n), outdeg)
+    dangling = outdeg == 0
+    weights = 1.0 / np.maximum(outdeg, 1)
+    rank = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        new = np.bincount(targets, weights=(rank * weights)[sources], minlength=n)
+        new = (1 - DAMPING) / n + DAMPING * (new + rank[dangling].sum() / n)
+        done = np.abs(new - rank).sum() < tol
+        rank = new
+        if done:
+            break
+    return rank.tolist()
+
+
+def _pivots(n, samples):
+    if n <= samples:
+        return list(range(n))
+    return sorted(random.Random(0).sample(range(n), samples))
+
+
+def _betweenness_py(succ, pivots):
+    # Brandes' algorithm, from the pivots only
+    n = len(succ)
+    res = [0.0] * n
+    for s in pivots:
+        sigma = [0] * n
+        dist = [-1] * n
+        preds = [[] for _ in range(n)]
+        sigma[s], dist[s] = 1, 0
+        order = []
+        queue = collections.deque([s])
+        while queue:
+            v = queue.popleft()
+            order.append(v)
+            for w in succ[v]:
+                if dist[w] < 0:
+                    dist[w] = dist[v] + 1
+                    queue.append(w)
+                if dist[w] == dist[v] + 1:
+                    sigma[w] += sigma[v]
+                    preds[w].append(v)
+        delta = [0.0] * n
+        for w in reversed(order):
+            for v in preds[w]:
+                delta[v] += sigma[v] / sigma[w] * (1 + delta[w])
+            if w != s:
+                res[w] += delta[w]
+    return res
+
+
+def _betweenness_np(offsets, targets, pivots):
+    # Brandes' algorithm, one breadth first search level at a time: the
+    # edges out of a level are gathered from the CSR arrays, and the path
+    # counts (and later the dependencies) are summed with bincount.
+    n = len(offsets) - 1
+    res = np.zeros(n)
+    for s in pivots:
+        dist = np.full(n, -1)
+        sigma = np.zeros(n)
+        dist[s], sigma[s] = 0, 1.0
+        frontier = np.array([s])
+        level = 0
+        dag = []     # the shortest path edges (v, w), one array pair per level
+        while frontier.size:
+            starts, counts = offsets[frontier], offsets[frontier + 1] - offsets[frontier]
+            total = counts.sum()
+            if not total:
+                break
+            first = np.repeat(np.cumsum(counts) - counts, counts)
+            v = np.repeat(frontier, counts)
+            w = targets[np.repeat(starts, counts) + np.arange(total) - first]
+            frontier = np.unique(w[dist[w] < 0])
+            dist[frontier] = level + 1
+            on_path = dist[w] == level + 1
+            v, w = v[on_path], w[on_path]
+            sigma += np.bincount(w, weights=sigma[v], minlength=n)
+            dag.append((v, w))
+            level += 1
+        delta = np.zeros(n)
+        for v, w in reversed(dag):
+            delta += np.bincount(v, weights=sigma[v] / sigma[w] * (1 + delta[w]), minlength=n)
+        delta[s] = 0.0
+        res += delta
+    return res.tolist()
+
+
+def graph_metrics(succ, names=METRICS, samples=SAMPLES, use_numpy=None):
+    """The ``names`` metrics of the graph ``succ`` (node ``i`` has edges to
+       the nodes ``succ[i]``, ``0 <= i < len(succ)``), returns ``{metric:
+       [value of node i]}``.
+    """
+    if use_numpy is None:
+        use_numpy = HAVE_NUMPY
+    n = len(succ)
+    res = {}
+    if not n:
+        return {name: [] for name in names}
+
+    fan_out = [len(children) for children in succ]
+    fan_in = [0] * n
+    for children in succ:
+        for w in children:
+            fan_in[w] += 1
+    res['fan_in'], res['fan_out'] = fan_in, fan_out
+    res['instability'] = [
+        float(o) / (i + o) if i + o else 0.0 for i, o in zip(fan_in, fan_out)
+    ]
+
+    if {'transitive_fan_in', 'transitive_fan_out', 'depth'} & set(names):
+        reach = reachability.Reachability(dict(enumerate(succ)))
+        if 'transitive_fan_out' in names:
+            counts = reach.descendant_counts()
+            res['transitive_fan_out'] = [counts[i] - reach.reaches(i, i) for i in range(n)]
+        if 'transitive_fan_in' in names:
+            counts = reach.ancestor_counts()
+            res['transitive_fan_in'] = [counts[i] - reach.reaches(i, i) for i in range(n)]
+        if 'depth' in names:
+            res['depth'] = _depth(reach)
+
+    if use_numpy and {'pagerank', 'betweenness'} & set(names):
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(fan_out, out=offsets[1:])
+        targets = np.fromiter((w for children in succ for w in children),
+                              dtype=np.int64, count=int(offsets[-1]))
+    if 'pagerank' in names:
+        res['pagerank'] = _pagerank_np(offsets, targets) if use_numpy else _pagerank_py(succ)
+    if 'betweenness' in names:
+        pivots = _pivots(n, samples)
+        if use_numpy:
+            betweenness = _betweenness_np(offsets, targets, pivots)
+        else:
+            betweenness = _betweenness_py(succ, pivots)
+        # scaled up if sampled, and normalized to 0..1
+        scale = float(n) / len(pivots) / ((n - 1) * (n - 2)) if n > 2 else 0.0
+        res['betweenness'] = [x * scale for x in betweenness]
+
+    return {name: res[name] for name in names}
+
+
+def compute(dep_graph, names=METRICS, samples=SAMPLES, use_numpy=None):
+    """The ``names`` metrics of the modules in ``dep_graph``, returns
+       ``{metric: {module name: value}}``.
+    """
+    srcs = sorted(dep_graph.sources.values(), key=lambda src: src.id)
+    index = {src.id: i for i, src in enumerate(srcs)}
+    succ = [
+        [index[j] for j in dep_graph.import_ids(src.id) if j in index]
+        for src in srcs
+    ]
+    values = graph_metrics(succ, names, samples, use_numpy)
+    return {
+        name: {src.name: value for src, value in zip(srcs, column)}
+        for name, column in values.items()
+    }
+
+
+def to_json(values):
+    """The metrics (from :func:`compute`) as json, ``{module: {metric:
+       value}}``.
+    """
+    modules = sorted(next(iter(values.values()), {}))
+    return json.dumps({
+        module: {name: column[module] for name, column in values.items()}
+        for module in modules
+    }, indent=4)
+
+
+def to_csv(values):
+    """The metrics (from :func:`compute`) as csv, a row per module.
+    """
+    fp = io.StringIO()
+    writer = csv.writer(fp, lineterminator='\n')
+    writer.writerow(['module'] + list(values))
+    for module in sorted(next(iter(values.values()), {})):
+        writer.writerow([module] + [column[module] for column in values.values()])
+    return fp.getvalue()
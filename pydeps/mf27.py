@@ -1,15 +1,16 @@
+import collections
 import sys
 import time
-import struct
 # from .mf.mf_next import *     # for debugging next version
 import modulefinder
 from modulefinder import (
     ModuleFinder as NativeModuleFinder
 )
-from importlib.util import MAGIC_NUMBER
 import marshal
 import dis
+from importlib import machinery
 from . import mfimp
+from . import importscan
 
 HAVE_ARGUMENT = dis.HAVE_ARGUMENT
 
@@ -30,39 +31,76 @@ def load_pyc(fp, mf=None):
     """
     # adapted from https://github.com/nedbat/coveragepy/blob/master/lab/show_pyc.py#L21
     data = fp.read()
-    pos = 0
-    if data[:4] != MAGIC_NUMBER:
-        raise ImportError("Bad magic number in .pyc file")
-
-    pos += 4
-    read_date_and_size = True
-    if sys.version_info >= (3, 7):
-        # 3.7 added a flags word
-        flags = struct.unpack('<L', data[4:8])[0]
-        pos += 4
-        hash_based = bool(flags & 0x01)
-        # check_source = bool(flags & 0x02)
-        if hash_based:
-            source_hash = data[pos:pos + 8]
-            pos += 8
-            read_date_and_size = False
-            # print(f"hash {binascii.hexlify(source_hash)}")
-            # print(f"check_source {check_source}")
-    if read_date_and_size:
-        moddate = data[pos:pos + 4]
-        pos += 4
-        # modtime = time.asctime(time.localtime(struct.unpack('<L', moddate)[0]))
-        # print(f"moddate {binascii.hexlify(moddate)} ({modtime})")
-        size = data[pos:pos + 4]
-        pos += 4
-        # size = fp.read(4)
-        # print("pysize %s (%d)" % (binascii.hexlify(size), struct.unpack('<L', size)[0]))
+    _flags, _source_hash, _mtime, _size, pos = importscan.read_pyc_header(data)
     assert len(data) >= pos
     co = marshal.loads(data[pos:])
     return co
 
 
 class ModuleFinder(NativeModuleFinder):
+    #: a :class:`pydeps.scancache.ScanCache` for the import records of
+    #: source files (None to always compile and scan)
+    scan_cache = None
+
+    #: the scanner engine used for source files (one of
+    #: :data:`pydeps.importscan.SCANNERS`)
+    scanner = 'bytecode'
+
+    #: import records of source files that have already been scanned, by
+    #: pathname (see :mod:`pydeps.parallel`)
+    prescanned = {}
+
+    #: scan modules in the order they were loaded (breadth-first), instead
+    #: of (roughly) the depth-first order of the stdlib finder
+    breadth_first = False
+
+    #: also record the static cost metrics of source files (``m.metrics``,
+    #: see :data:`pydeps.importscan.METRICS`)
+    static_metrics = False
+
+    def __init__(self, *args, **kwargs):
+        NativeModuleFinder.__init__(self, *args, **kwargs)
+        #: directory listings of the path entries we search for modules
+        self.path_index = mfimp.PathIndex()
+        #: modules that have been loaded, but whose import records haven't
+        #: been acted on yet: [(module, import records)]
+        self._unscanned = []
+        self._scanning = False
+
+    def find_module(self, name, path, parent=None):
+        # same as the stdlib version, but with our own index of the path
+        if parent is not None:
+            fullname = parent.__name__ + '.' + name
+        else:
+            fullname = name
+        if fullname in self.excludes:
+            self.msgout(3, "find_module -> Excluded", fullname)
+            raise ImportError(name)
+
+        if path is None:
+            if name in sys.builtin_module_names:
+                return (None, None, ("", "", mfimp.C_BUILTIN))
+            path = self.path
+
+        return mfimp.find_module(name, path, self.path_index)
+
+    def find_all_submodules(self, m):
+        # same as the stdlib version, but with our own index of the path
+        # (which can also list the packages in zip archives)
+        if not m.__path__:
+            return
+        modules = {}
+        suffixes = machinery.EXTENSION_SUFFIXES + machinery.SOURCE_SUFFIXES + machinery.BYTECODE_SUFFIXES
+        for dirname in m.__path__:
+            for name in self.path_index.listing(dirname).files:
+                for suff in suffixes:
+                    if name.endswith(suff):
+                        mod = name[:-len(suff)]
+                        if mod != "__init__":
+                            modules[mod] = mod
+                        break
+        return modules.keys()
+
     def import_hook(self, name, caller=None, fromlist=None, level=-1):
         self.msg(3, "import_hook: name(%s) caller(%s) fromlist(%s) level(%s)" % (name, caller, fromlist, level))
         parent = self.determine_parent(caller, level=level)
@@ -76,6 +114,32 @@ class ModuleFinder(NativeModuleFinder):
             self.ensure_fromlist(m, fromlist)
         return None
 
+    def _safe_import_hook(self, name, caller, fromlist, level=-1):
+        # same as the stdlib version, except that we don't skip imports of
+        # names that have failed before.  The stdlib version checks
+        # ``name in self.badmodules``, where ``name`` is relative for
+        # relative imports (i.e. a missing ``.compat`` in one package hides
+        # an existing ``.compat`` in another), and only the first importer
+        # of a missing ``a.b.c`` gets to import ``a`` and ``a.b``, so the
+        # result depended on the order modules were scanned in.
+        try:
+            self.import_hook(name, caller, level=level)
+        except ImportError as msg:
+            self.msg(2, "ImportError:", str(msg))
+            self._add_badmodule(name, caller)
+        except SyntaxError as msg:
+            self.msg(2, "SyntaxError:", str(msg))
+            self._add_badmodule(name, caller)
+        else:
+            if fromlist:
+                for sub in fromlist:
+                    fullname = name + "." + sub
+                    try:
+                        self.import_hook(name, caller, [sub], level=level)
+                    except ImportError as msg:
+                        self.msg(2, "ImportError:", str(msg))
+                        self._add_badmodule(fullname, caller)
+
     def load_module(self, fqname, fp, pathname, file_info):
         # fqname = dotted module name we're loading
         suffix, mode, kind = file_info
@@ -93,15 +157,10 @@ class ModuleFinder(NativeModuleFinder):
             self.msgout(2, "load_module ->", module)
             return module
 
+        co = None
+        imports = None
         if kind == _PY_SOURCE:
-            txt = fp.read()
-            txt += b'\n' if isinstance(txt, bytes) else '\n'
-            co = compile(
-                txt,
-                pathname,
-                'exec',            # compile code block
-                dont_inherit=True  # [pydeps] don't inherit future statements from current environment
-            )
+            imports = self.source_imports(pathname, fp)
 
         elif kind == _PY_COMPILED:
             # (see issue #191)
@@ -142,74 +201,137 @@ class ModuleFinder(NativeModuleFinder):
             #     # print("pysize %s (%d)" % (binascii.hexlify(size), struct.unpack('<L', size)[0]))
             # co = marshal.load(fp)
 
-        else:
-            co = None
         m = self.add_module(fqname)
         m.__file__ = pathname
         if co:
             if self.replace_paths:
                 co = self.replace_paths_in_code(co)
             m.__code__ = co
-            self.scan_code(co, m)
+            imports = importscan.code_imports(co)
+            if self.static_metrics:
+                imports.append(importscan.metrics_record(co))
+        if imports is not None:
+            self._unscanned.append((m, imports))
+        if not self._scanning:
+            self.scan_pending()
         self.msgout(2, "load_module ->", m)
         return m
 
-    def scan_code(self, co, m):
-        code = co.co_code   # noqa
-        # if sys.version_info >= (3, 4):
-        #     scanner = self.scan_opcodes
-        # elif sys.version_info >= (2, 5):
-        #     scanner = self.scan_opcodes_25
-        # else:
-        #     scanner = self.scan_opcodes_24
-        scanner = self.scan_opcodes
-        for what, args in scanner(co):
-            if what == "store":
-                name, = args
-                m.globalnames[name] = 1
-            elif what in ("import", "absolute_import"):
-                fromlist, name = args
-                have_star = 0
-                if fromlist is not None:
-                    if "*" in fromlist:
-                        have_star = 1
-                    fromlist = [f for f in fromlist if f != "*"]
-                if what == "absolute_import":
-                    level = 0
-                else:
-                    level = -1
-                self._safe_import_hook(name, m, fromlist, level=level)
-                if have_star:
-                    # We've encountered an "import *". If it is a Python module,
-                    # the code has already been parsed and we can suck out the
-                    # global names.
-                    mm = None
-                    if m.__path__:
-                        # At this point we don't know whether 'name' is a
-                        # submodule of 'm' or a global module. Let's just try
-                        # the full name first.
-                        mm = self.modules.get(m.__name__ + "." + name)
-                    if mm is None:
-                        mm = self.modules.get(name)
-                    if mm is not None:
-                        m.globalnames.update(mm.globalnames)
-                        m.starimports.update(mm.starimports)
-                        if mm.__code__ is None:
-                            m.starimports[name] = 1
+    def source_imports(self, pathname, fp=None):
+        """Return the import records for the source file ``pathname`` (read
+           from ``fp`` if it is given), using prescanned or cached records
+           when we have them.
+        """
+        imports = self.prescanned.get(pathname)
+        cache_key = None
+        if imports is None and self.scan_cache is not None:
+            cache_key = self.scan_cache.key(pathname, self.scanner, self.static_metrics)
+            imports = self.scan_cache.get(cache_key)
+        if imports is None:
+            imports = importscan.scan_file(pathname, self.scanner, fp, self.static_metrics)
+            if cache_key is not None:
+                self.scan_cache.put(cache_key, imports)
+        return imports
+
+    def scan_pending(self):
+        """Act on the import records of all loaded modules, including the
+           modules that are loaded while doing so.
+
+           The stdlib finder does this by recursing (load_module ->
+           scan_code -> import_hook -> load_module ...), which needs a stack
+           frame per level of the import chain.  We use an explicit stack of
+           ``(module, record iterator)`` instead.  The modules loaded while
+           acting on a record are put on top of the stack (the first one
+           loaded on top), so modules are scanned in (almost) the same
+           depth-first order as by the stdlib finder.
+
+           With :attr:`breadth_first` the stack is used as a queue instead,
+           i.e. all imports of a module are acted on before any of the
+           modules it loads are scanned.
+        """
+        self._scanning = True
+        pending = collections.deque()
+        try:
+            while True:
+                if self._unscanned:
+                    loaded = self._unscanned if self.breadth_first else reversed(self._unscanned)
+                    pending.extend((m, iter(imports)) for m, imports in loaded)
+                    del self._unscanned[:]
+                if not pending:
+                    break
+                m, records = pending[0] if self.breadth_first else pending[-1]
+                record = next(records, None)
+                if record is None:
+                    if self.breadth_first:
+                        pending.popleft()
                     else:
+                        pending.pop()
+                else:
+                    self.scan_import(record, m)
+        finally:
+            self._scanning = False
+
+    def scan_code(self, co, m):
+        self.scan_imports(importscan.code_imports(co), m)
+
+    def scan_imports(self, imports, m):
+        """Act on the import records (from :mod:`pydeps.importscan`) found
+           in module ``m``.
+        """
+        for record in imports:
+            self.scan_import(record, m)
+        if not self._scanning:
+            self.scan_pending()
+
+    def scan_import(self, record, m):
+        """Act on one import record found in module ``m``.  Modules that
+           are loaded by this are scanned later (by :meth:`scan_pending`).
+        """
+        what, args = record
+        if what == "store":
+            name, = args
+            m.globalnames[name] = 1
+        elif what in ("import", "absolute_import"):
+            fromlist, name = args
+            have_star = 0
+            if fromlist is not None:
+                if "*" in fromlist:
+                    have_star = 1
+                fromlist = [f for f in fromlist if f != "*"]
+            if what == "absolute_import":
+                level = 0
+            else:
+                level = -1
+            self._safe_import_hook(name, m, fromlist, level=level)
+            if have_star:
+                # We've encountered an "import *". If it is a Python module
+                # that has already been scanned we can suck out the global
+                # names.
+                mm = None
+                if m.__path__:
+                    # At this point we don't know whether 'name' is a
+                    # submodule of 'm' or a global module. Let's just try
+                    # the full name first.
+                    mm = self.modules.get(m.__name__ + "." + name)
+                if mm is None:
+                    mm = self.modules.get(name)
+                if mm is not None:
+                    m.globalnames.update(mm.globalnames)
+                    m.starimports.update(mm.starimports)
+                    if mm.__code__ is None:
                         m.starimports[name] = 1
-            elif what == "relative_import":
-                level, fromlist, name = args
-                if name:
-                    self._safe_import_hook(name, m, fromlist, level=level)
                 else:
-                    parent = self.determine_parent(m, level=level)
-                    # m is still the caller here... [bp]
-                    self._safe_import_hook(parent.__name__, m, fromlist, level=0)
+                    m.starimports[name] = 1
+        elif what == "relative_import":
+            level, fromlist, name = args
+            if name:
+                self._safe_import_hook(name, m, fromlist, level=level)
             else:
-                # We don't expect anything else from the generator.
-                raise RuntimeError(what)
-
-        for c in co.co_consts:
-            if isinstance(c, type(co)):
-                self.scan_code(c, m)
+                parent = self.determine_parent(m, level=level)
+                # m is still the caller here... [bp]
+                self._safe_import_hook(parent.__name__, m, fromlist, level=0)
+        elif what == "metrics":
+            m.metrics = args
+        else:
+            # We don't expect anything else from the generator.
+            raise RuntimeError(what)
@@ -7,14 +7,24 @@ right thing, ie. ignores namespace packages instead of crashing.
 
 This is vendorized/copied here to prevent the warning error that the regular 
 imp module causes.
+
+Looking for a module checks for a dozen file names in every path entry, so
+:class:`PathIndex` can be passed to :func:`find_module` to answer the checks
+from one (cached) directory listing per directory instead of a stat call
+per file name.  The index also lists the directories inside zip archives
+(see :mod:`pydeps.archive`), so modules can be found in wheels, eggs, and
+zip files on the path.
 """
 
 from _imp import is_builtin, is_frozen
+from collections import namedtuple
 from importlib import machinery
 import sys
 import os
 import tokenize
 
+from . import archive
+
 
 PY_SOURCE = 1
 PY_COMPILED = 2
@@ -32,7 +42,110 @@ def _get_suffixes():
     return extensions + source + bytecode
 
 
-def find_module(name, path=None):
+_Listing = namedtuple('_Listing', 'mtime files dirs archive member')
+_EMPTY = _Listing(None, frozenset(), frozenset(), None, None)
+
+
+class PathIndex(object):
+    """Cache of the directory listings find_module looks in.
+
+       Each directory is listed (with os.scandir, or from the archive's
+       central directory for a directory inside a zip archive) the first
+       time it is needed.  Call :meth:`refresh` to forget the listings of
+       directories that have changed since (e.g. in a long running
+       process).
+    """
+    def __init__(self):
+        self._listings = {}     # absolute dirname -> _Listing
+
+    def _key(self, dirname):
+        if os.path.isabs(dirname):
+            return dirname
+        return os.path.abspath(dirname or os.curdir)
+
+    def _scan(self, dirname):
+        files = set()
+        dirs = set()
+        try:
+            mtime = os.stat(dirname).st_mtime_ns
+            with os.scandir(dirname) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir():
+                            dirs.add(entry.name)
+                        elif entry.is_file():
+                            files.add(entry.name)
+                    except OSError:  # pragma: nocover
+                        pass
+        except OSError:     # missing, not a directory (e.g. a zip file), ...
+            arc, member = archive.split(dirname)
+            if arc is None:
+                return _EMPTY
+            files, dirs = arc.listing(member)
+            return _Listing(None, files, dirs, arc, member)
+        return _Listing(mtime, frozenset(files), frozenset(dirs), None, None)
+
+    def listing(self, dirname):
+        """Return the (cached) listing of ``dirname``.
+        """
+        key = self._key(dirname)
+        res = self._listings.get(key)
+        if res is None:
+            parent, base = os.path.split(key)
+            plisting = self._listings.get(parent)
+            if plisting is not None and base not in plisting.dirs and (
+                    plisting.archive is not None or base not in plisting.files):
+                return _EMPTY   # no need to look, and nothing to refresh
+            res = self._listings[key] = self._scan(key)
+        return res
+
+    def isfile(self, dirname, fname):
+        """Does the directory ``dirname`` contain the file ``fname``?
+        """
+        return fname in self.listing(dirname).files
+
+    def isdir(self, dirname, name):
+        """Does the directory ``dirname`` contain the directory ``name``?
+        """
+        return name in self.listing(dirname).dirs
+
+    def open(self, dirname, fname):
+        """Return a binary file object for the file ``fname`` in
+           ``dirname`` if ``dirname`` is inside a zip archive, otherwise
+           None (i.e. open it yourself).
+        """
+        listing = self.listing(dirname)
+        if listing.archive is None:
+            return None
+        return listing.archive.open(listing.member + '/' + fname if listing.member else fname)
+
+    def refresh(self):
+        """Forget the listings of directories that have changed (or been
+           created/removed) since they were listed.  The listings of
+           directories inside archives are always forgotten.
+        """
+        for key, listing in list(self._listings.items()):
+            if listing.archive is not None:
+                del self._listings[key]
+                continue
+            try:
+                mtime = os.stat(key).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime != listing.mtime:
+                del self._listings[key]
+
+    def clear(self):
+        self._listings.clear()
+
+
+def _isfile(dirname, fname, index):
+    if index is None:
+        return os.path.isfile(os.path.join(dirname, fname))
+    return index.isfile(dirname, fname)
+
+
+def find_module(name, path=None, index=None):
     if not isinstance(name, str):
         raise TypeError("'name' must be a str, not {}".format(type(name)))
     elif not isinstance(path, (type(None), list)):
@@ -50,15 +163,15 @@ def find_module(name, path=None):
 
     for entry in path:
         package_directory = os.path.join(entry, name)
-        for suffix in ['.py', machinery.BYTECODE_SUFFIXES[0]]:
-            package_file_name = '__init__' + suffix
-            file_path = os.path.join(package_directory, package_file_name)
-            if os.path.isfile(file_path):
-                return None, package_directory, ('', '', PKG_DIRECTORY)
+        if index is None or index.isdir(entry, name):
+            for suffix in ['.py', machinery.BYTECODE_SUFFIXES[0]]:
+                package_file_name = '__init__' + suffix
+                if _isfile(package_directory, package_file_name, index):
+                    return None, package_directory, ('', '', PKG_DIRECTORY)
         for suffix, mode, type_ in _get_suffixes():
             file_name = name + suffix
-            file_path = os.path.join(entry, file_name)
-            if os.path.isfile(file_path):
+            if _isfile(entry, file_name, index):
+                file_path = os.path.join(entry, file_name)
                 break
         else:
             continue
@@ -66,6 +179,11 @@ def find_module(name, path=None):
     else:
         raise ImportError('No module named {!r}'.format(name), name=name)
 
+    if index is not None and type_ in (PY_SOURCE, PY_COMPILED):
+        file = index.open(entry, file_name)
+        if file is not None:
+            return file, file_path, (suffix, 'rb', type_)
+
     encoding = None
     if 'b' not in mode:
         with open(file_path, 'rb') as file:
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Scan the source files reachable from a script in a process pool.
+
+Reading and compiling/parsing source files is independent for each file,
+while resolving module names to files needs the finder's state.  The
+:class:`Prescanner` therefore keeps resolution in the calling process and
+works through a frontier of resolved source files: every file is sent to a
+worker process as soon as it is resolved, and the imports found in it are
+resolved when the worker is done, which adds new files to the frontier.
+
+The result is a ``{pathname: import-records}`` dict that is handed to the
+(serial) finder as :attr:`pydeps.mf27.ModuleFinder.prescanned`, so the
+finder produces exactly the same graph as without prescanning, it just
+doesn't need to read or compile any file that has been prescanned.
+
+Like the finder, the prescanner doesn't scan standard library modules, or
+modules further than the finder's ``bacon_limit`` imports away from the
+script.
+"""
+import logging
+import sys
+import types
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from . import importscan
+from . import mfimp
+
+log = logging.getLogger(__name__)
+
+
+def scan_file(pathname, scanner, metrics=False):
+    """Return the import records for the source file ``pathname``, or None
+       if it can't be read or compiled (the finder will report the error).
+
+       This runs in the worker processes.
+    """
+    try:
+        return importscan.scan_file(pathname, scanner, metrics=metrics)
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+
+class Resolved(object):
+    """A module name that has been resolved to a file.
+    """
+    def __init__(self, fqname, pathname, kind, path=None):
+        self.fqname = fqname
+        self.pathname = pathname    # source file (__init__.py for packages)
+        self.kind = kind
+        self.path = path            # __path__ for packages, otherwise None
+
+    @property
+    def package(self):
+        """The package relative imports are relative to.
+        """
+        if self.path is not None:
+            return self.fqname
+        return self.fqname.rpartition('.')[0]
+
+
+class Prescanner(object):
+    def __init__(self, finder, jobs):
+        self.finder = finder
+        self.jobs = jobs
+        self.scanner = finder.scanner
+        self.metrics = finder.static_metrics
+        self.cache = finder.scan_cache
+        self.limit = getattr(finder, 'bacon_limit', None)
+        self.resolved = {}      # fqname -> Resolved or None
+        self.depth = {}         # fqname -> number of imports from the script
+        self.submitted = set()  # pathnames
+        self.imports = {}       # pathname -> import records
+        self._ready = []        # [(Resolved, import records)] waiting to be resolved
+        self._pending = {}      # future -> (Resolved, cache key)
+
+    def run(self, script):
+        """Prescan ``script`` and every source file it (transitively)
+           imports.  Returns ``{pathname: import-records}``.
+        """
+        with ProcessPoolExecutor(self.jobs) as pool:
+            self.pool = pool
+            self.depth['__main__'] = 0
+            self.submit(Resolved('__main__', script, mfimp.PY_SOURCE))
+            while self._ready or self._pending:
+                while self._ready:
+                    self.resolve_imports(*self._ready.pop())
+                if self._pending:
+                    done, _ = wait(self._pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        mod, key = self._pending.pop(future)
+                        imports = future.result()
+                        if imports is not None:
+                            if self.cache is not None:
+                                self.cache.put(key, imports)
+                            self._ready.append((mod, imports))
+        log.info("prescanned %d of %d files", len(self.imports), len(self.submitted))
+        return self.imports
+
+    def submit(self, mod):
+        if mod.pathname in self.submitted:
+            return
+        self.submitted.add(mod.pathname)
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(mod.pathname, self.scanner, self.metrics)
+            imports = self.cache.get(key)
+            if imports is not None:
+                self._ready.append((mod, imports))
+                return
+        future = self.pool.submit(scan_file, mod.pathname, self.scanner, self.metrics)
+        self._pending[future] = (mod, key)
+
+    def resolve_imports(self, mod, imports):
+        """Resolve the modules ``mod`` imports (submitting new source files).
+        """
+        self.imports[mod.pathname] = imports
+        depth = self.depth[mod.fqname] + 1
+        for what, args in imports:
+            if what == "absolute_import":
+                fromlist, name = args
+            elif what == "relative_import":
+                level, fromlist, name = args
+                parts = mod.package.split('.') if mod.package else []
+                if level - 1 >= len(parts):
+                    continue
+                base = '.'.join(parts[:len(parts) - (level - 1)])
+                name = base + '.' + name if name else base
+            else:
+                continue
+            if name in ('__future__', 'future'):
+                continue
+            self.reach(name, depth)
+            for sub in fromlist or ():
+                if sub != '*':
+                    self.reach(name + '.' + sub, depth)
+
+    def reach(self, fqname, depth):
+        """``fqname`` (and its parent packages) is imported ``depth``
+           imports away from the script: submit the source files that are
+           within the finder's limit.
+        """
+        parts = fqname.split('.')
+        for i in range(1, len(parts) + 1):
+            name = '.'.join(parts[:i])
+            mod = self.resolve(name)
+            if mod is None:
+                return
+            if depth >= self.depth.get(name, sys.maxsize):
+                continue
+            self.depth[name] = depth
+            if mod.kind != mfimp.PY_SOURCE or (self.limit is not None and depth > self.limit):
+                continue
+            if self.finder.is_pylib_module(name, mod.pathname):
+                continue
+            if mod.pathname in self.imports:
+                # already scanned from further away, its imports are closer now
+                self._ready.append((mod, self.imports[mod.pathname]))
+            else:
+                self.submit(mod)
+
+    def resolve(self, fqname):
+        """Resolve ``fqname`` (and its parent packages) the same way the
+           finder would.
+        """
+        if fqname in self.resolved:
+            return self.resolved[fqname]
+        self.resolved[fqname] = None
+
+        parent, _, partname = fqname.rpartition('.')
+        if parent:
+            pkg = self.resolve(parent)
+            if pkg is None or pkg.path is None:
+                return None
+            path, caller = pkg.path, types.SimpleNamespace(__name__=parent)
+        else:
+            path, caller = None, None
+
+        try:
+            fp, pathname, (_suffix, _mode, kind) = self.finder.find_module(partname, path, caller)
+            if fp:
+                fp.close()
+            path = None
+            if kind == mfimp.PKG_DIRECTORY:
+                path = [pathname]
+                fp, pathname, (_suffix, _mode, kind) = self.finder.find_module('__init__', path)
+                if fp:
+                    fp.close()
+        except ImportError:
+            return None
+
+        self.resolved[fqname] = Resolved(fqname, pathname, kind, path)
+        return self.resolved[fqname]
+
+
+def prescan(finder, script, jobs):
+    """Return ``{pathname: import-records}`` for ``script`` and all the
+       source files it imports, scanned in ``jobs`` worker processes.
+    """
+    return Prescanner(finder, jobs).run(script)
@@ -30,8 +30,12 @@ import enum
 
 from .dummymodule import DummyModule
 from .pystdlib import pystdlib
+from . import archive
 from . import depgraph
+from . import matcher
 from . import mf27
+from . import parallel
+from . import scancache
 from . import target
 import logging
 log = logging.getLogger(__name__)
@@ -39,6 +43,16 @@ log = logging.getLogger(__name__)
 PYLIB_PATH = depgraph.PYLIB_PATH
 
 
+def _is_pylib_path(pathname):
+    """Is ``pathname`` in the Python standard library (i.e. in
+       PYLIB_PATH, but not in site-packages)?
+    """
+    rpath = os.path.split(pathname)[0].lower()
+    if 'site-packages' in rpath:
+        return False
+    return any(rpath.startswith(pp) for pp in PYLIB_PATH)
+
+
 class imp(enum.IntEnum):
     C_BUILTIN = 6
     C_EXTENSION = 3
@@ -52,6 +66,9 @@ class imp(enum.IntEnum):
 
 
 class Module(object):
+    #: attributes that are not submodules
+    ATTRIBUTES = {'__name__', '__file__', '__path__', '__code__', 'globalnames', 'starimports', 'metrics'}
+
     def __init__(self, name, file=None, path=None):
         self.__name__ = name
         self.__file__ = file
@@ -64,6 +81,8 @@ class Module(object):
         # The set of starimports this module did that could not be
         # resolved, ie. a starimport from a non-Python module.
         self.starimports = {}
+        # The static cost metrics of the module (with --cost static).
+        self.metrics = None
 
     @property
     def shortname(self):
@@ -83,6 +102,13 @@ class MyModuleFinder(mf27.ModuleFinder):
     """
     ModuleFinder(https://docs.python.org/ja/3/library/modulefinder.html)の子クラス
     """
+    #: don't load standard library modules (and therefore never scan the
+    #: modules they import) when they aren't going to be in the graph.
+    prune_pylib = True
+
+    #: the (dummy) module that is run as ``__main__`` (set by find_modules)
+    dummyname = None
+
     def __init__(self, syspath: list[str], *args, **kwargs):
         self.args = kwargs
 
@@ -94,8 +120,13 @@ class MyModuleFinder(mf27.ModuleFinder):
 
         # include python std lib modules.
         # self.include_pylib = kwargs.pop('pylib', self.include_pylib_all)
+        # (finder_depgraph removes the rest of them from the graph)
+        self.graph_pylib = bool(kwargs.get('pylib'))
         self.include_pylib = kwargs.pop('pylib', self.include_pylib_all)
 
+        # names of the std lib modules (only needed when we exclude them)
+        self.pylib_names = set() if self.include_pylib else pystdlib()
+
         self._depgraph = defaultdict(dict)
         self._types = {}
         self._last_caller = None
@@ -110,6 +141,42 @@ class MyModuleFinder(mf27.ModuleFinder):
                                    # debug=3,
                                    excludes=kwargs.get('excludes', []))
 
+        # modules more than --max-bacon imports away from __main__ are
+        # removed from the graph, so they only need to be found (to record
+        # the import), not loaded.  Not with --max-module-depth (merges
+        # modules), --include-missing (adds imports from __main__),
+        # --show-raw-deps (shows the modules before removal), --watch
+        # (where distances can grow), --bacon-roots (distances from other
+        # modules than __main__), --cycles-output (cycles can go through
+        # any module) or a --noise-metric (which counts modules that are
+        # further away).  See also finish().
+        #: the max bacon distance of modules we load (None for no limit)
+        self.bacon_limit = None
+        max_bacon = kwargs.get('max_bacon') or 0
+        if 0 < max_bacon < sys.maxsize and not any(kwargs.get(k) for k in (
+                'max_module_depth', 'include_missing', 'show_raw_deps', 'watch', 'bacon_roots',
+                'cycles_out')) and kwargs.get('noise_metric', 'degree') in (None, 'degree'):
+            self.bacon_limit = max_bacon
+            self.breadth_first = True
+        # (the modules --exclude, --exclude-exact or --only remove from
+        # the graph are loaded like any other module, since the modules
+        # they import can still be in the graph.)
+        #: the --exclude/--exclude-exact names
+        self.skip = matcher.Matcher(kwargs.get('excludes') or [], kwargs.get('exclude_exact') or [])
+        #: the --only prefixes
+        self.only = matcher.PrefixMatcher(kwargs.get('only') or ())
+        #: the --noise-level of the graph (see finish)
+        self.noise_level = kwargs.get('noise_level', sys.maxsize)
+
+        #: number of imports between __main__ and the modules (with bacon_limit)
+        self.bacon = {}
+        self._deferred = {}     # fqname -> (pathname, file_info) for modules not loaded
+
+        self.scanner = kwargs.get('scanner') or 'bytecode'
+        self.static_metrics = kwargs.get('cost') == 'static'
+        if not kwargs.get('no_cache'):
+            self.scan_cache = scancache.ScanCache(kwargs.get('cache_dir'))
+
     def add_module(self, fqname):
         if fqname in self.modules:
             return self.modules[fqname]
@@ -121,7 +188,7 @@ class MyModuleFinder(mf27.ModuleFinder):
         # (the stdlig version hardcodes PY_SOURCE below)
         log.debug("run_script(%r)", pathname)
         self.msg(2, "run_script", pathname)
-        with open(pathname, 'rb') as fp:
+        with archive.open_file(pathname) as fp:
             stuff = (
                 "",
                 "rb",
@@ -143,26 +210,162 @@ class MyModuleFinder(mf27.ModuleFinder):
             if self._last_caller:
                 # self._depgraph[self._last_caller.__name__][module.__name__] = module.__file__
                 if hasattr(module, '__file__') or self.include_pylib_all:
-                    pylib_p = []
-                    if not module.__file__:
-                        pass
-                    else:
-                        rpath = os.path.split(module.__file__)[0].lower()
-                        if 'site-packages' not in rpath:
-                            pylib_p = [rpath.startswith(pp) for pp in PYLIB_PATH]
-                    if self.include_pylib or not any(pylib_p):
-                        # if self._last_caller.__name__ != module.__name__:
-                        #     self._depgraph[self._last_caller.__name__][module.__name__] = module.__file__
+                    # (a module importing from itself, like os does with
+                    # `from os.path import ...`, isn't an import of itself)
+                    if self._last_caller.__name__ == module.__name__:
+                        return
+                    if self.include_pylib or not (module.__file__ and _is_pylib_path(module.__file__)):
                         self._depgraph[self._last_caller.__name__][module.__name__] = module.__file__
+                        if self.bacon_limit is not None and self._last_caller.__name__ in self.bacon:
+                            self._relax(module.__name__, self.bacon[self._last_caller.__name__] + 1)
+
+    def _relax(self, name, bacon):
+        """``name`` is imported ``bacon`` imports away from __main__.  Update
+           the distance of it (and of the modules it imports), and load the
+           modules that have come within bacon_limit.
+        """
+        stack = [(name, bacon)]
+        while stack:
+            name, bacon = stack.pop()
+            if bacon >= self.bacon.get(name, sys.maxsize):
+                continue
+            self.bacon[name] = bacon
+            if name in self._deferred:
+                if bacon <= self.bacon_limit:
+                    self._load_deferred(name)
+            else:
+                stack.extend((imported, bacon + 1) for imported in self._depgraph.get(name, ()))
+
+    def _load_deferred(self, fqname):
+        """Load the module ``fqname`` that was found beyond bacon_limit.
+        """
+        pathname, file_info = self._deferred.pop(fqname)
+        try:
+            fp = archive.open_file(pathname) if file_info[2] in (imp.PY_SOURCE, imp.PY_COMPILED) else None
+        except OSError:
+            module = None
+        else:
+            try:
+                module = self.load_module(fqname, fp, pathname, file_info)
+            finally:
+                if fp:
+                    fp.close()
+        # the imports of the stub have the package directory as path (and
+        # a module that can't be loaded isn't imported at all).
+        for imports in self._depgraph.values():
+            if fqname in imports:
+                if module is None:
+                    del imports[fqname]
+                else:
+                    imports[fqname] = module.__file__
+        if module is None:
+            self._forget({fqname})
+
+    def finish(self):
+        """Load the modules that were left unloaded (in ``_deferred``) if
+           the graph can be different without their imports, i.e. if the
+           --noise-level can treat a module that is in the graph otherwise.
+
+           The unloaded modules are all beyond bacon_limit, so everything
+           they import is beyond it too, and all they can change is how
+           many modules import a module (at most one more per unloaded
+           module).
+        """
+        if not self._deferred or self._noise_is_exact(len(self._deferred)):
+            return
+        log.info("loading %d unloaded modules for --noise-level", len(self._deferred))
+        self.bacon_limit = None
+        while self._deferred:
+            self._load_deferred(next(iter(self._deferred)))
+
+    def _noise_is_exact(self, unknown):
+        """Is every module that can be in the graph noise (or not) whether
+           or not up to ``unknown`` more modules import it?
+        """
+        pylib = set() if self.graph_pylib else (self.pylib_names or pystdlib())
+        imports = defaultdict(set)
+        importers = defaultdict(set)
+        for name, imported in self._depgraph.items():
+            if name in pylib:
+                continue
+            for iname in imported:
+                if iname not in pylib:
+                    imports[name].add(iname)
+                    importers[iname].add(name)
+
+        noise = self.noise_level
+        for name, bacon in self.bacon.items():
+            if name not in self.modules or name in self._deferred or name in pylib:
+                continue
+            if bacon > self.bacon_limit or self.is_excluded(name):
+                continue
+            in_degree, out_degree = len(imports[name]), len(importers[name])
+            if in_degree == 0:
+                # a module that imports nothing is noise when it is imported
+                # by more than --noise-level modules
+                if out_degree <= noise < out_degree + unknown:
+                    return False
+            elif out_degree == 0 and in_degree > noise:
+                # ..and a module nothing imports is noise if it imports more
+                # than --noise-level modules, unless something imports it.
+                return False
+        return True
 
     def import_module(self, partnam, fqname, parent):
         module = mf27.ModuleFinder.import_module(self, partnam, fqname, parent)
         self._add_import(module)
         return module
 
+    def is_pylib_module(self, fqname, pathname):
+        """Is ``fqname``, found at ``pathname``, a standard library module
+           that isn't going to be in the graph?
+
+           Both the name and the location must match, so a project's own
+           module that happens to share a name with a std lib module is
+           not affected.
+        """
+        if not self.prune_pylib or self.include_pylib:
+            return False
+        if fqname not in self.pylib_names and fqname.partition('.')[0] not in self.pylib_names:
+            return False
+        return not pathname or _is_pylib_path(pathname)
+
+    def is_excluded(self, fqname):
+        """Is ``fqname`` going to be removed from the graph by --exclude,
+           --exclude-exact or --only (so it doesn't matter if it is noise)?
+        """
+        if fqname == '__main__':
+            return False
+        return self.skip.match(fqname) or bool(self.only) and not self.only.match(fqname)
+
+    def _stub_module(self, fqname, pathname, kind):
+        """Add ``fqname`` as a module that has been found, but isn't loaded.
+        """
+        module = self.add_module(fqname)
+        module.__file__ = pathname
+        if kind == imp.PKG_DIRECTORY:
+            module.__path__ = [pathname]   # so submodules can be found
+        self._types[fqname] = kind
+        return module
+
     def load_module(self, fqname, fp, pathname, suffix_mode_kind):
         # log.debug("load_module(%r, %r, %r, %r)", fqname, fp, pathname, suffix_mode_kind)
         (suffix, mode, kind) = suffix_mode_kind
+        if self.is_pylib_module(fqname, pathname):
+            # the importer still gets its edge (filtered like any other std
+            # lib edge), but we don't read the module or follow its imports.
+            return self._stub_module(fqname, pathname, kind)
+        if self.bacon_limit is not None:
+            if fqname not in self.bacon:
+                caller = self._last_caller
+                self.bacon[fqname] = 0 if caller is None else self.bacon[caller.__name__] + 1
+            if self.bacon[fqname] > self.bacon_limit:
+                # the importer gets its edge (to a module that is going to
+                # be excluded), but we only read the module if it turns out
+                # to be closer to __main__ (see _relax), or if it can
+                # change the noise (see finish).
+                self._deferred[fqname] = (pathname, suffix_mode_kind)
+                return self._stub_module(fqname, pathname, kind)
         try:
             module = mf27.ModuleFinder.load_module(
                 self,
@@ -185,6 +388,114 @@ class MyModuleFinder(mf27.ModuleFinder):
             self._types[module.__name__] = kind
         return module
 
+    def update(self, changed=(), added=(), removed=()):
+        """Bring the finder up to date after the source files in ``changed``
+           have been modified, the ones in ``added`` created, and the ones
+           in ``removed`` deleted (all absolute paths).
+
+           Only the modules in those files are scanned again, together with
+           the modules whose imports can resolve differently now (importers
+           of removed modules, importers of missing modules when files have
+           been added, and ``__main__``).  Modules that are no longer
+           imported are forgotten.
+        """
+        self.path_index.refresh()
+        self.prescanned = {}
+        by_path = {os.path.abspath(m.__file__): m for m in self.modules.values() if m.__file__}
+
+        rescan = {by_path[p].__name__ for p in changed if p in by_path}
+        # a changed file without a module is one that couldn't be loaded
+        # before (e.g. because of a syntax error), i.e. it is new to us.
+        added = set(added) | {p for p in changed if p not in by_path}
+
+        removed_names = {by_path[p].__name__ for p in removed if p in by_path}
+        rescan |= self._importers(removed_names)
+        self._forget(removed_names)
+
+        if added or removed:
+            # any import that failed can succeed now, and the dummy module
+            # for a package/directory target imports all its modules.
+            for callers in self.badmodules.values():
+                rescan.update(callers)
+            self.badmodules.clear()
+            rescan.add('__main__')
+            # import_module sets the package attribute for a submodule that
+            # failed to load to None, which ensure_fromlist wouldn't retry.
+            for m in self.modules.values():
+                for attr, value in list(vars(m).items()):
+                    if value is None and attr not in Module.ATTRIBUTES:
+                        delattr(m, attr)
+
+        while rescan:
+            broken = set()
+            for name in sorted(rescan):
+                m = self.modules.get(name)
+                if m is not None and not self._rescan(m):
+                    broken.add(name)
+            self.scan_pending()
+            # a module that can't be loaded anymore (e.g. a syntax error)
+            # must also be gone from the modules importing it.
+            rescan = self._importers(broken) - broken
+            self._forget(broken)
+
+        self._collect_garbage()
+
+    def _rescan(self, m):
+        """Queue the imports in ``m`` for scanning again, returns False if
+           ``m``'s source can't be read or compiled.
+        """
+        if not m.__file__ or os.path.splitext(m.__file__)[1] not in ('.py', '.pyw'):
+            return True
+        if self.is_pylib_module(m.__name__, m.__file__):
+            return True
+        try:
+            imports = self.source_imports(m.__file__)
+        except (OSError, SyntaxError, ValueError):
+            return False
+        self._depgraph.pop(m.__name__, None)
+        for callers in self.badmodules.values():
+            callers.pop(m.__name__, None)
+        m.globalnames.clear()
+        m.starimports.clear()
+        self._unscanned.append((m, imports))
+        return True
+
+    def _importers(self, names):
+        """Names of the modules that import any of ``names``.
+        """
+        return {caller for caller, imports in self._depgraph.items()
+                if not names.isdisjoint(imports)}
+
+    def _forget(self, names):
+        """Remove the modules ``names`` from the finder.
+        """
+        if not names:
+            return
+        for name in names:
+            m = self.modules.pop(name, None)
+            self._depgraph.pop(name, None)
+            self._types.pop(name, None)
+            parent, _, partname = name.rpartition('.')
+            if parent in self.modules and getattr(self.modules[parent], partname, None) is m:
+                delattr(self.modules[parent], partname)
+        for badname, callers in list(self.badmodules.items()):
+            for name in names:
+                callers.pop(name, None)
+            if not callers:
+                del self.badmodules[badname]
+
+    def _collect_garbage(self):
+        """Forget the modules that can't be reached from ``__main__``.
+        """
+        reachable = set()
+        stack = ['__main__']
+        while stack:
+            name = stack.pop()
+            if name not in reachable:
+                reachable.add(name)
+                stack.extend(self._depgraph.get(name, ()))
+        self._forget(set(self.modules) - reachable)
+
     def ensure_fromlist(self, module, fromlist, recursive=0):
         self.msg(4, "ensure_fromlist", module, fromlist, recursive)
         for sub in fromlist:
@@ -201,6 +512,9 @@ class MyModuleFinder(mf27.ModuleFinder):
                 submod = self.import_module(sub, subname, module)
                 if not submod:
                     raise ImportError("No module named " + subname)
+            elif getattr(module, sub) is None:
+                # import_module sets this for a submodule that failed to load
+                raise ImportError("No module named %s.%s" % (module.__name__, sub))
             else:
                 self._add_import(getattr(module, sub))
                 # print "  SUB:", sub, "lastcaller:", self._last_caller
@@ -222,9 +536,20 @@ def py2dep(target: target.Target, **kw) -> depgraph.DepGraph:
     依存関係を計算してDepGraphにして返す
     """
     log.info("py2dep(%r)", target)
+    mf = find_modules(target, **kw)
+    try:
+        return finder_depgraph(mf, target, **kw)
+    finally:
+        # the finder is done with the archives
+        archive.close_archives()
+
+
+def find_modules(target: target.Target, **kw) -> MyModuleFinder:
+    """Run the module finder on (a dummy module importing) ``target``, and
+       return it.  The raw dependency graph is in ``mf._depgraph``.
+    """
     dummy = DummyModule(target, **kw)
 
-    kw['dummyname'] = dummy.fname
     syspath = sys.path[:]
     syspath.insert(0, target.syspath_dir)
 
@@ -241,43 +566,67 @@ def py2dep(target: target.Target, **kw) -> depgraph.DepGraph:
         excludes=exclude,       # folders to exclude
         **kw
     )
+    # (the graph calls a zipapp's __main__ by the name of the archive)
+    mf.dummyname = target.fname if target.archive_main else dummy.fname
     mf.debug = max(mf.debug, kw.get('debug_mf', 0))
     if log.isEnabledFor(logging.DEBUG):
         log.debug("CURDIR: %s", os.getcwd())
         log.debug("FNAME: %r, CONTENT:\n%s\n", dummy.fname, dummy.text())
+    if kw.get('jobs', 1) > 1:
+        mf.prescanned = parallel.prescan(mf, dummy.fname, kw['jobs'])
     mf.run_script(dummy.fname)
+    mf.finish()
+    mf.prescanned = {}
     # これどういう意味…？
+    if mf.scan_cache is not None:
+        log.info("scan cache: %d hits, %d misses", mf.scan_cache.hits, mf.scan_cache.misses)
+        mf.scan_cache.prune()
+    return mf
 
-    log.info("mf._depgraph:\n%s", json.dumps(dict(mf._depgraph), indent=4))
-    log.info("mf.badmodules:\n%s", json.dumps(mf.badmodules, indent=4))
+
+def finder_depgraph(mf: MyModuleFinder, target: target.Target, **kw) -> depgraph.DepGraph:
+    """Return the DepGraph for the modules found by ``mf`` (which is not
+       changed, so it can be updated and used again, see
+       :mod:`pydeps.watch`).
+    """
+    kw['dummyname'] = mf.dummyname
+    exclude = ['migrations'] + kw.pop('exclude', [])
+    if 'fname' in kw:
+        del kw['fname']
+    mf_rawgraph = defaultdict(dict, ((k, dict(v)) for k, v in mf._depgraph.items()))
+
+    if log.isEnabledFor(logging.INFO):
+        log.info("mf._depgraph:\n%s", json.dumps(dict(mf_rawgraph), indent=4))
+        log.info("mf.badmodules:\n%s", json.dumps(mf.badmodules, indent=4))
 
     if kw.get('include_missing'):
         for k, vdict in list(mf.badmodules.items()):
-            if k not in mf._depgraph:
-                mf._depgraph[k] = {}
+            if k not in mf_rawgraph:
+                mf_rawgraph[k] = {}
             for v in vdict:
-                if not target.is_pysource and v not in mf._depgraph['__main__']:
-                    mf._depgraph['__main__'][v] = None
-                if v in mf._depgraph:
-                    mf._depgraph[v][k] = None
+                if not target.is_pysource and v not in mf_rawgraph['__main__']:
+                    mf_rawgraph['__main__'][v] = None
+                if v in mf_rawgraph:
+                    mf_rawgraph[v][k] = None
                 else:
-                    mf._depgraph[v] = {k: None}
+                    mf_rawgraph[v] = {k: None}
 
-    log.info("mf._depgraph:\n%s", json.dumps(dict(mf._depgraph), indent=4))
+    if log.isEnabledFor(logging.INFO):
+        log.info("mf._depgraph:\n%s", json.dumps(dict(mf_rawgraph), indent=4))
 
     # ModuleFinder回避のために退避させていたexcludeキーを辞書kwに書き戻す
     kw['exclude'] = exclude
 
     if kw.get('pylib'):
-        mf_depgraph = mf._depgraph
-        for k, v in list(mf._depgraph.items()):
+        mf_depgraph = mf_rawgraph
+        for k, v in list(mf_rawgraph.items()):
             log.debug('depgraph item: %r %r', k, v)
         # mf_modules = {k: os.syspath.abspath(v.__file__)
         #               for k, v in mf.modules.items()}
     else:
         pylib = pystdlib()
         mf_depgraph = {}
-        for k, v in list(mf._depgraph.items()):
+        for k, v in list(mf_rawgraph.items()):
             log.debug('depgraph item: %r %r', k, v)
             if k in pylib:
                 continue
@@ -289,16 +638,23 @@ def py2dep(target: target.Target, **kw) -> depgraph.DepGraph:
         #               for k, v in mf.modules.items()
         #               if k not in pylib}
 
-    try:
-        import yaml
-        log.info("mf_depgraph:\n%s",
-                 yaml.dump(dict(mf_depgraph), default_flow_style=False))
-        # log.error("mf._types:\n%s", yaml.dump(mf._types, default_flow_style=False))
-        # log.debug("mf_modules:\n%s", yaml.dump(mf_modules, default_flow_style=False))
-    except ImportError:
-        log.info("mf_depgraph:\n%s", json.dumps(dict(mf_depgraph), indent=4))
-
-    return depgraph.DepGraph(mf_depgraph, mf._types, target, **kw)
+    if log.isEnabledFor(logging.INFO):
+        try:
+            import yaml
+            log.info("mf_depgraph:\n%s",
+                     yaml.dump(dict(mf_depgraph), default_flow_style=False))
+            # log.error("mf._types:\n%s", yaml.dump(mf._types, default_flow_style=False))
+            # log.debug("mf_modules:\n%s", yaml.dump(mf_modules, default_flow_style=False))
+        except ImportError:
+            log.info("mf_depgraph:\n%s", json.dumps(dict(mf_depgraph), indent=4))
+
+    dep_graph = depgraph.DepGraph(mf_depgraph, mf._types, target, **kw)
+    if mf.static_metrics:
+        # (the dummy module of a package or directory isn't part of the program)
+        dummy = dep_graph.source_name('__main__') == '__main__'
+        dep_graph.add_metrics({name: m.metrics for name, m in mf.modules.items()
+                               if m.metrics and not (dummy and name == '__main__')})
+    return dep_graph
 
 
 def py2depgraph():
@@ -7,7 +7,7 @@ import os
 import sys
 
 from pydeps.configs import Config
-from . import py2depgraph, cli, dot, target
+from . import archive, py2depgraph, cli, contracts, cost, dot, graphdiff, impact, metrics, reachability, startup, target, watch, why
 from .depgraph2dot import dep2dot, cycles2dot
 import logging
 from . import colors
@@ -23,20 +23,96 @@ def _pydeps(trgt: target.Target, **kw):
     # print('target', trgt.workdir)
     # print('target', trgt)
     colors.START_COLOR = kw.get('start_color')
-    # show_cycles = kw.get('show_cycles')
-    nodot = kw.get('no_dot')
-    no_output = kw.get('no_output')
-    output = kw.get('output')
-    fmt = kw['format']
-    show_svg = kw.get('show')
-    deps_out = kw.get('deps_out')
-    dot_out = kw.get('dot_out')
-    # reverse = kw.get('reverse')
     if os.getcwd() != trgt.workdir:
         # the tests are calling _pydeps directoy
         os.chdir(trgt.workdir)
 
+    if kw.get('watch'):
+        def emit(dep_graph):
+            _write_output(trgt, dep_graph, **kw)
+            kw['show'] = False   # only start the viewer the first time
+        return watch.watch(trgt, emit, **kw)
+
+    if kw.get('lazy_imports'):
+        # everything loaded at start-up counts, however far away it is
+        kw = dict(kw, max_bacon=sys.maxsize, noise_level=sys.maxsize)
+        dep_graph = py2depgraph.py2dep(trgt, **kw)
+        if cost.cost_kind(**kw):
+            cost.add_costs(trgt, dep_graph, **kw)
+        print(startup.report(trgt, dep_graph, kw.get('startup_module')))
+        return
+
+    if kw.get('why'):
+        # however far away the module is
+        kw = dict(kw, max_bacon=sys.maxsize, noise_level=sys.maxsize)
+        dep_graph = py2depgraph.py2dep(trgt, **kw)
+        chains = why.why(dep_graph, kw['why'], kw.get('why_paths', 5))
+        print(why.report(dep_graph, kw['why'], chains))
+        if kw.get('why_graph') and chains:
+            dep_graph.restrict({name for chain in chains for name in chain})
+            _write_output(trgt, dep_graph, **kw)
+        return
+
+    if kw.get('query'):
+        # transitive imports, however far away they are
+        kw = dict(kw, max_bacon=sys.maxsize, noise_level=sys.maxsize)
+        dep_graph = py2depgraph.py2dep(trgt, **kw)
+        print(json.dumps(reachability.answer(dep_graph, kw['query']), indent=4))
+        return
+
+    if kw.get('check_contracts'):
+        # a contract is broken however far away the forbidden import is
+        kw = dict(kw, max_bacon=sys.maxsize, noise_level=sys.maxsize)
+        if not kw.get('contracts'):
+            raise RuntimeError("There are no contracts to check (add them to [tool.pydeps.contracts])")
+        dep_graph = py2depgraph.py2dep(trgt, **kw)
+        results = contracts.check(dep_graph, kw['contracts'])
+        print(contracts.report(results))
+        broken = sum(1 for _name, _kind, violations in results if violations)
+        if broken:
+            raise RuntimeError("%d contract%s broken" % (broken, '' if broken == 1 else 's'))
+        return
+
+    if kw.get('changed') or kw.get('changed_since'):
+        # a change affects every module that imports it, however far away
+        kw = dict(kw, max_bacon=sys.maxsize, noise_level=sys.maxsize)
+        paths = list(kw.get('changed') or [])
+        if kw.get('changed_since'):
+            paths += impact.git_changed_files(kw['changed_since'], trgt.calling_dir)
+        # (the finder knows which modules import the deleted modules)
+        try:
+            mf = py2depgraph.find_modules(trgt, **kw)
+            dep_graph = py2depgraph.finder_depgraph(mf, trgt, **kw)
+        finally:
+            archive.close_archives()
+        res = impact.impact(trgt, dep_graph, paths, mf.badmodules)
+        print(impact.report(res, kw.get('impact_format') or 'json'))
+        return
+
     dep_graph = py2depgraph.py2dep(trgt, **kw)
+    if kw.get('diff_against'):
+        old = graphdiff.load(os.path.join(trgt.calling_dir, kw['diff_against']))
+        new = json.loads(dep_graph.__json__())
+        d = graphdiff.diff(old, new)
+        print(graphdiff.report(d))
+        if not graphdiff.is_empty(d):
+            dotsrc = graphdiff.diff2dot(d, old, new, kw.get('diff_context', 0), kw.get('reverse'), kw.get('rankdir', 'TB'))
+            _write_dot(trgt.calling_dir, dotsrc, **kw)
+        return
+    _write_output(trgt, dep_graph, **kw)
+
+
+def _write_output(trgt, dep_graph, **kw):
+    """Write (and show) the output requested in ``kw`` for ``dep_graph``.
+    """
+    # show_cycles = kw.get('show_cycles')
+    deps_out = kw.get('deps_out')
+    # reverse = kw.get('reverse')
+
+    if cost.cost_kind(**kw):
+        cost.add_costs(trgt, dep_graph, **kw)
+        if kw.get('show_cost'):
+            print(cost.report(dep_graph))
 
     if kw.get('show_deps'):
         cli.verbose("DEPS:")
@@ -50,7 +126,42 @@ def _pydeps(trgt: target.Target, **kw):
         else:
             print(dep_graph.__json__())
 
+    cycles_out = kw.get('cycles_out')
+    if cycles_out:
+        directory, _fname = os.path.split(cycles_out)
+        if not directory:
+            cycles_out = os.path.join(trgt.calling_dir, cycles_out)
+        with open(cycles_out, 'w') as fp:
+            fp.write(dep_graph.cycles_json())
+
+    metrics_out = kw.get('metrics_out')
+    if metrics_out or kw.get('color_metric'):
+        names = metrics.METRICS if metrics_out else [kw['color_metric']]
+        dep_graph.module_metrics = metrics.compute(dep_graph, names)
+    if metrics_out:
+        directory, _fname = os.path.split(metrics_out)
+        if not directory:
+            metrics_out = os.path.join(trgt.calling_dir, metrics_out)
+        with open(metrics_out, 'w') as fp:
+            if metrics_out.endswith('.csv'):
+                fp.write(metrics.to_csv(dep_graph.module_metrics))
+            else:
+                fp.write(metrics.to_json(dep_graph.module_metrics))
+
     dotsrc = depgraph_to_dotsrc(trgt, dep_graph, **kw)
+    _write_dot(trgt.calling_dir, dotsrc, **kw)
+
+
+def _write_dot(calling_dir, dotsrc, **kw):
+    """Write (and show) the dot source ``dotsrc`` and the graph graphviz
+       renders from it, as requested in ``kw``.
+    """
+    nodot = kw.get('no_dot')
+    no_output = kw.get('no_output')
+    output = kw.get('output')
+    fmt = kw['format']
+    show_svg = kw.get('show')
+    dot_out = kw.get('dot_out')
 
     if not nodot:
         if kw.get('show_dot'):
@@ -59,7 +170,7 @@ def _pydeps(trgt: target.Target, **kw):
                 # make sure output files are written to sensible directories
                 directory, _fname = os.path.split(dot_out)
                 if not directory:
-                    dot_out = os.path.join(trgt.calling_dir, dot_out)
+                    dot_out = os.path.join(calling_dir, dot_out)
                 with open(dot_out, 'w') as fp:
                     fp.write(dotsrc)
             else:
@@ -127,12 +238,12 @@ def externals(trgt, **kwargs):
             continue
         if not k.startswith(pkgname):
             continue
-        if src.imports:
-            imps = [imp for imp in src.imports if not imp.startswith(pkgname)]
-            if imps:
-                for imp in imps:
-                    ext.add(imp.split('.')[0])
-                res[k] = imps
+        imps = [depgraph.name_of(i) for i in depgraph.import_ids(src.id)]
+        imps = [imp for imp in imps if not imp.startswith(pkgname)]
+        if imps:
+            for imp in imps:
+                ext.add(imp.split('.')[0])
+            res[k] = imps
     # return res  # debug
     return list(sorted(ext))
 
@@ -145,9 +256,6 @@ def pydeps(**args):
        execution path).
     """
 
-    # 再帰回数の上限設定
-    sys.setrecursionlimit(10000)
-
     _args = dict(iter(Config(**args))) if args else cli.parse_args(sys.argv[1:])
     # コマンドライン引数を解析して_argsに詰める。入力変数のargsは__main__.pyでは詰められていないので気にしなくてよし。
 
@@ -190,6 +298,26 @@ def pydeps(**args):
                     # we only want to log the exception if we're in debug mode
                     log.exception("While running pydeps:")
                 cli.error(str(cause))
+            finally:
+                archive.close_archives()
+
+
+def pydeps_diff(argv=None):
+    """Entry point for the ``pydeps-diff OLD NEW`` command: compare two
+       ``--deps-output`` snapshots.
+    """
+    _args = cli.parse_diff_args(sys.argv[1:] if argv is None else argv)
+    try:
+        old = graphdiff.load(_args['old'])
+        new = graphdiff.load(_args['new'])
+        d = graphdiff.diff(old, new)
+        print(graphdiff.report(d))
+        if (_args['output'] or _args['dot_out']) and not graphdiff.is_empty(d):
+            dotsrc = graphdiff.diff2dot(d, old, new, _args['diff_context'], _args['reverse'], _args['rankdir'])
+            _write_dot(os.getcwd(), dotsrc, **_args)
+    except (OSError, RuntimeError) as cause:
+        cli.error(str(cause))
+    return d
 
 
 def call_pydeps(file_or_dir, **kwargs):
@@ -197,7 +325,6 @@ def call_pydeps(file_or_dir, **kwargs):
 
        See :class:`pydeps.configs.Config` class for the available options.
     """
-    sys.setrecursionlimit(10000)
     inp = target.Target(file_or_dir)
     log.debug("Target: %r", inp)
     config = Config(**kwargs)
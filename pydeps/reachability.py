@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Which modules does a module (transitively) import, and which modules
+(transitively) import it?
+
+:class:`Reachability` condenses the import graph into its strongly
+connected components (a cycle of imports makes its modules reach each
+other), and stores for every component the set of components it reaches
+as a bitset (a Python int).  Tarjan's algorithm finds the components
+imported modules first, so a component only reaches components with lower
+numbers, and the bitsets are built in one pass over the imports.  After
+that ``reaches`` is a bit test, and ``descendants``/``ancestors`` take
+time proportional to the answer.
+
+``pydeps --query`` answers queries from the command line, see
+:func:`answer`.
+"""
+import re
+
+from . import cycles
+
+
+def _bits(n):
+    """The positions of the bits that are set in ``n``.
+    """
+    while n:
+        low = n & -n
+        yield low.bit_length() - 1
+        n ^= low
+
+
+class Reachability(object):
+    """Reachability index of the graph ``edges`` (``{node: [nodes it has
+       an edge to]}``).  ``a`` reaches ``b`` if there is a (non-empty) path
+       of edges from ``a`` to ``b``, so a node only reaches itself if it is
+       part of a cycle.
+    """
+    def __init__(self, edges):
+        self.edges = edges
+        #: the strongly connected components, successors first
+        self.components = cycles.strongly_connected_components(edges)
+        #: node -> number of its component
+        self.component = {}
+        for i, comp in enumerate(self.components):
+            for node in comp:
+                self.component[node] = i
+        #: the components each component reaches (as a bitset)
+        self.closure = self._closure(edges)
+        self._reverse = None
+
+    def _closure(self, edges):
+        res = []
+        for i, comp in enumerate(self.components):
+            bits = 0
+            for node in comp:
+                for child in edges[node]:
+                    j = self.component[child]
+                    if j == i:
+                        bits |= 1 << i      # a cycle, i reaches itself
+                    else:
+                        bits |= 1 << j | res[j]
+            res.append(bits)
+        return res
+
+    def _members(self, bits):
+        res = set()
+        for i in _bits(bits):
+            res.update(self.components[i])
+        return res
+
+    def reaches(self, a, b):
+        """Does ``a`` (transitively) have an edge to ``b``?
+        """
+        return bool(self.closure[self.component[a]] >> self.component[b] & 1)
+
+    def descendants(self, node):
+        """The nodes ``node`` reaches.
+        """
+        return self._members(self.closure[self.component[node]])
+
+    def ancestors(self, node):
+        """The nodes that reach ``node``.
+        """
+        return self.reverse().descendants(node)
+
+    def reverse(self):
+        """The reachability index of the reversed graph (built the first
+           time it is needed).
+        """
+        if self._reverse is None:
+            reverse = {n: [] for n in self.edges}
+            for n, children in self.edges.items():
+                for child in children:
+                    reverse[child].append(n)
+            self._reverse = Reachability(reverse)
+        return self._reverse
+
+    def descendant_counts(self):
+        """The number of nodes each node reaches, ``{node: count}``
+           (counting the bits, without building the sets).
+        """
+        # a bit stands for a whole component, count the extra members of
+        # the (few) components with more than one node separately
+        big = 0
+        for i, comp in enumerate(self.components):
+            if len(comp) > 1:
+                big |= 1 << i
+        res = {}
+        for i, comp in enumerate(self.components):
+            bits = self.closure[i]
+            count = bin(bits).count('1')
+            for j in _bits(bits & big):
+                count += len(self.components[j]) - 1
+            for node in comp:
+                res[node] = count
+        return res
+
+    def ancestor_counts(self):
+        """The number of nodes that reach each node, ``{node: count}``.
+        """
+        return self.reverse().descendant_counts()
+
+    def descendant_sums(self, weights):
+        """The sum of the ``weights`` (``{node: number}``, 0 for a missing
+           node) of every node and the nodes it reaches, ``{node: sum}``
+           (summed per component, over the bits of the components that
+           weigh something).
+        """
+        weight = [sum(weights.get(node, 0) for node in comp) for comp in self.components]
+        heavy = 0
+        for i, w in enumerate(weight):
+            if w:
+                heavy |= 1 << i
+        res = {}
+        for i, comp in enumerate(self.components):
+            total = sum(weight[j] for j in _bits((self.closure[i] | 1 << i) & heavy))
+            for node in comp:
+                res[node] = total
+        return res
+
+
+_QUERY = re.compile(r'^\s*(\S+?)\s*->\s*(\S+)\s*$')
+
+
+def answer(dep_graph, queries):
+    """Answer the ``--query`` ``queries`` about ``dep_graph``, returns
+       ``{query: answer}``.  A query is one of
+
+       ``A->B``
+           does module ``A`` (transitively) import module ``B``?
+       ``A->*``
+           all the modules ``A`` (transitively) imports.
+       ``*->B``
+           all the modules that (transitively) import ``B``.
+    """
+    res = {}
+    # the dummy module that imports a package's modules isn't part of it
+    dummy = {'__main__'} if dep_graph.source_name('__main__') == '__main__' else set()
+    for query in queries:
+        m = _QUERY.match(query)
+        if not m or m.groups() == ('*', '*'):
+            raise RuntimeError("Can't understand the query %r (use A->B, A->*, or *->B)" % query)
+        a, b = m.groups()
+        for name in (a, b):
+            if name != '*' and name not in dep_graph.sources:
+                raise RuntimeError("The module %r in the query %r is not in the graph" % (name, query))
+        if b == '*':
+            res[query] = sorted(set(dep_graph.descendants(a)) - dummy)
+        elif a == '*':
+            res[query] = sorted(set(dep_graph.ancestors(b)) - dummy)
+        else:
+            res[query] = dep_graph.reaches(a, b)
+    return res
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+On-disk cache of the import records found in Python source files.
+
+There is one cache entry per source file, keyed on the file's real path,
+and it is only used if the file's mtime and size (the CRC and size for a
+file in a zip archive), and the interpreter's bytecode magic number, are
+unchanged.  Unchanged files therefore never need to be compiled or
+scanned again.
+"""
+import hashlib
+import logging
+import marshal
+import os
+import sys
+import time
+from importlib.util import MAGIC_NUMBER
+
+from . import archive
+
+log = logging.getLogger(__name__)
+
+#: bump when the format of the cached import records changes.
+CACHE_VERSION = 2
+
+#: entries that haven't been used for this many days are evicted.
+MAX_AGE_DAYS = 30
+
+#: the least recently used entries are evicted when the cache grows
+#: beyond this many bytes (of disk space).
+MAX_SIZE = 64 * 1024 * 1024
+
+#: the cache is pruned at most this often (in seconds), since it means
+#: a stat of every entry.
+PRUNE_INTERVAL = 24 * 60 * 60
+
+# touched when the cache has been pruned
+_PRUNED_STAMP = '.pruned'
+
+
+def _disk_size(st):
+    """The disk space (in bytes) used by the file with stat result ``st``
+       (a small entry takes up a whole block).
+    """
+    blocks = getattr(st, 'st_blocks', None)    # (not on Windows)
+    return st.st_size if blocks is None else blocks * 512
+
+
+def default_cache_dir():
+    """Return the per-user cache directory for pydeps.
+    """
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'pydeps')
+
+
+class ScanCache(object):
+    """Cache of import records (see :mod:`pydeps.importscan`) per source file.
+
+       Usage::
+
+           key = cache.key(pathname)
+           imports = cache.get(key)
+           if imports is None:
+               imports = ...  # compile and scan pathname
+               cache.put(key, imports)
+    """
+    def __init__(self, cache_dir=None, max_age=MAX_AGE_DAYS, max_size=MAX_SIZE):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_age = max_age
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    def _entryname(self, realpath):
+        digest = hashlib.sha1(realpath.encode('utf-8', 'surrogateescape')).hexdigest()
+        return os.path.join(self.cache_dir, digest)
+
+    def key(self, pathname, *extra):
+        """Return the cache key for ``pathname`` (or None if the file can't
+           be stat'ed).  Call this *before* reading the file, so a
+           concurrent edit can't be cached under the new mtime.
+
+           For a file inside a zip archive the member's CRC and size are
+           used instead of the mtime and size.
+        """
+        try:
+            realpath = os.path.realpath(pathname)
+            st = os.stat(realpath)
+        except (OSError, ValueError):
+            arc, name = archive.split(os.path.abspath(pathname))
+            if arc is None or name not in arc.members:
+                return None
+            info = arc.members[name]
+            return (CACHE_VERSION, MAGIC_NUMBER, os.path.abspath(pathname), info.CRC, info.file_size) + extra
+        return (CACHE_VERSION, MAGIC_NUMBER, realpath, st.st_mtime_ns, st.st_size) + extra
+
+    def get(self, key):
+        """Return the cached import records for ``key``, or None.
+        """
+        if key is None:
+            return None
+        entryname = self._entryname(key[2])
+        try:
+            with open(entryname, 'rb') as fp:
+                cached_key, imports = marshal.load(fp)
+        except (OSError, EOFError, ValueError, TypeError):
+            self.misses += 1
+            return None
+        if cached_key != key:
+            self.misses += 1
+            return None
+        try:
+            os.utime(entryname)   # mark as recently used
+        except OSError:  # pragma: nocover
+            pass
+        self.hits += 1
+        return imports
+
+    def put(self, key, imports):
+        """Store ``imports`` under ``key``.
+        """
+        if key is None:
+            return
+        entryname = self._entryname(key[2])
+        tmpname = '%s.%d.tmp' % (entryname, os.getpid())
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmpname, 'wb') as fp:
+                marshal.dump((key, imports), fp)
+            os.replace(tmpname, entryname)
+        except (OSError, ValueError) as e:
+            log.debug("Couldn't write scan cache entry for %s: %s", key[2], e)
+
+    def prune(self, now=None, force=False):
+        """Evict entries older than ``max_age`` days, then the least recently
+           used entries until the cache takes up less than ``max_size``
+           bytes of disk.  Does nothing if the cache has been pruned in the
+           last PRUNE_INTERVAL seconds (unless ``force`` is true).
+        """
+        now = time.time() if now is None else now
+        stamp = os.path.join(self.cache_dir, _PRUNED_STAMP)
+        if not force:
+            try:
+                if os.stat(stamp).st_mtime > now - PRUNE_INTERVAL:
+                    return
+            except OSError:
+                pass
+        cutoff = now - self.max_age * 24 * 60 * 60
+        try:
+            entries = [e for e in os.scandir(self.cache_dir) if e.is_file() and e.name != _PRUNED_STAMP]
+        except OSError:
+            return
+        keep = []
+        for entry in entries:
+            try:
+                st = entry.stat()
+                if st.st_mtime < cutoff:
+                    os.remove(entry.path)
+                else:
+                    keep.append((st.st_mtime, _disk_size(st), entry.path))
+            except OSError:  # pragma: nocover
+                pass
+        try:
+            with open(stamp, 'w'):
+                pass
+            os.utime(stamp, (now, now))
+        except OSError:  # pragma: nocover
+            pass
+
+        total = sum(size for _mtime, size, _path in keep)
+        keep.sort(reverse=True)   # oldest last
+        while keep and total > self.max_size:
+            _mtime, size, path = keep.pop()
+            try:
+                os.remove(path)
+            except OSError:  # pragma: nocover
+                pass
+            total -= size
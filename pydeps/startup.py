@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+Which imports make the target slow to start (``pydeps --lazy-imports``)?
+
+Module ``d`` dominates module ``m`` if every chain of imports from the
+start-up module to ``m`` goes through ``d``, so deferring the import of
+``d`` (moving it into the function that needs it) means that none of the
+modules ``d`` dominates are loaded at start-up either.  The same holds for
+a single import statement ``u -> v``: if every other module that imports
+``v`` is itself dominated by ``v``, deferring that one import saves ``v``
+and everything ``v`` dominates.
+
+The dominator tree is computed with the iterative algorithm of Cooper,
+Harvey, and Kennedy ("A Simple, Fast Dominance Algorithm"), and each
+import in the target's own modules is scored by what it would save:
+the number of modules and their file sizes, and their import time if the
+graph has import-time costs (``--cost importtime``/``--importtime-log``).
+"""
+import os
+
+from . import archive
+from .cost import format_cost
+from .dummymodule import target_modules
+
+
+def file_size(path):
+    """The size of the file ``path`` (which can be inside a zip archive),
+       0 if there is no such file (e.g. for builtin modules).
+    """
+    if not path:
+        return 0
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        arc, name = archive.split(os.path.abspath(path))
+        if arc is not None and name in arc.members:
+            return arc.members[name].file_size
+        return 0
+
+
+def startup_module(target, dep_graph, name=None):
+    """The name of the source that is loaded first when the target starts:
+       ``name`` if given, the script for a script or zipapp, and the
+       package's ``__main__`` (or the package itself) for a package.
+    """
+    if name:
+        res = dep_graph.source_name(name)
+    elif target.is_module and target.modpath + '.__main__' in dep_graph.sources:
+        res = target.modpath + '.__main__'
+    elif target.is_module:
+        res = target.modpath
+    else:
+        res = dep_graph.source_name('__main__')
+    if res not in dep_graph.sources:
+        raise RuntimeError("The start-up module %r is not in the graph" % res)
+    return res
+
+
+def own_packages(target):
+    """The top level names of the target's own modules.
+    """
+    names = target_modules(target) or [target.modpath]
+    return {name.split('.')[0] for name in names}
+
+
+def import_edges(dep_graph):
+    """Return ``{module: [imported modules]}`` for the sources of
+       ``dep_graph``, including that a module loads its parent package.
+    """
+    res = {}
+    for name, src in dep_graph.sources.items():
+        imports = {dep_graph.name_of(i) for i in dep_graph.import_ids(src.id)}
+        parent = name.rpartition('.')[0]
+        if parent in dep_graph.sources:
+            imports.add(parent)
+        imports.discard(name)
+        res[name] = sorted(imports)
+    return res
+
+
+def dominators(edges, root):
+    """Return ``(idom, order)`` where ``idom`` maps every module reachable
+       from ``root`` to its immediate dominator (``root`` to itself), and
+       ``order`` is the reachable modules in reverse postorder.
+    """
+    # iterative depth first search for the postorder
+    postorder = []
+    visited = {root}
+    stack = [(root, iter(edges[root]))]
+    while stack:
+        node, children = stack[-1]
+        for child in children:
+            if child not in visited:
+                visited.add(child)
+                stack.append((child, iter(edges[child])))
+                break
+        else:
+            stack.pop()
+            postorder.append(node)
+
+    order = postorder[::-1]
+    index = {node: i for i, node in enumerate(order)}
+    preds = {node: [] for node in order}
+    for node in order:
+        for child in edges[node]:
+            preds[child].append(node)
+
+    def intersect(a, b):
+        while a != b:
+            while index[a] > index[b]:
+                a = idom[a]
+            while index[b] > index[a]:
+                b = idom[b]
+        return a
+
+    idom = {root: root}
+    changed = True
+    while changed:
+        changed = False
+        for node in order[1:]:
+            new = None
+            for p in preds[node]:
+                if p in idom:
+                    new = p if new is None else intersect(p, new)
+            if idom.get(node) != new:
+                idom[node] = new
+                changed = True
+    return idom, order
+
+
+class StartupAnalysis(object):
+    """The dominator tree of the modules loaded when the target starts, and
+       what each import in the target's own modules costs at start-up.
+    """
+    def __init__(self, target, dep_graph, startup=None):
+        self.dep_graph = dep_graph
+        self.root = startup_module(target, dep_graph, startup)
+        self.edges = import_edges(dep_graph)
+        self.idom, self.order = dominators(self.edges, self.root)
+
+        #: dominator tree, module -> modules it immediately dominates
+        self.children = {node: [] for node in self.order}
+        for node in self.order[1:]:
+            self.children[self.idom[node]].append(node)
+
+        # pre/post numbering of the dominator tree (a dominates b iff
+        # pre[a] <= pre[b] and post[b] <= post[a])
+        self.pre, self.post = {}, {}
+        counter = 0
+        stack = [(self.root, False)]
+        while stack:
+            node, done = stack.pop()
+            counter += 1
+            if done:
+                self.post[node] = counter
+                continue
+            self.pre[node] = counter
+            stack.append((node, True))
+            for child in reversed(self.children[node]):
+                stack.append((child, False))
+
+        # (module count, bytes, time) of each module's dominator subtree
+        self.weight = {}
+        timed = dep_graph.cost_unit is not None
+        for node in reversed(self.order):
+            src = dep_graph.sources[node]
+            count, size, time = 1, file_size(src.path), (src.cost or 0) if timed else None
+            for child in self.children[node]:
+                c, s, t = self.weight[child]
+                count, size = count + c, size + s
+                if timed:
+                    time += t
+            self.weight[node] = (count, size, time)
+
+        self.preds = {node: [] for node in self.order}
+        for node in self.order:
+            for child in self.edges[node]:
+                self.preds[child].append(node)
+
+        self.own = own_packages(target)
+
+    def dominates(self, a, b):
+        """Does module ``a`` dominate module ``b``?
+        """
+        return self.pre[a] <= self.pre[b] and self.post[b] <= self.post[a]
+
+    def deferred(self, importer, imported):
+        """The modules that are no longer loaded at start-up if ``importer``
+           imports ``imported`` lazily (``imported`` and the modules it
+           dominates, or nothing if ``imported`` is also loaded some other
+           way).
+        """
+        for p in self.preds[imported]:
+            if p != importer and not self.dominates(imported, p):
+                return []
+        res = []
+        stack = [imported]
+        while stack:
+            node = stack.pop()
+            res.append(node)
+            stack.extend(self.children[node])
+        return sorted(res)
+
+    def is_own(self, name):
+        return name == self.root or name.split('.')[0] in self.own
+
+    def candidates(self):
+        """Return ``[(importer, imported, (count, bytes, time))]`` for the
+           imports in the target's own modules that would keep modules from
+           being loaded at start-up if they were lazy, the best first.
+        """
+        res = []
+        for importer in self.order:
+            if not self.is_own(importer):
+                continue
+            for imported in self.edges[importer]:
+                if imported == importer.rpartition('.')[0]:
+                    continue    # loading a package's module loads the package
+                if self.deferred(importer, imported):
+                    res.append((importer, imported, self.weight[imported]))
+        res.sort(key=lambda c: (-(c[2][2] or 0), -c[2][1], -c[2][0], c[0], c[1]))
+        return res
+
+    def critical_path(self):
+        """The chain of modules from the start-up module that dominate the
+           most expensive parts of the start-up, i.e. following the most
+           expensive subtree of the dominator tree.
+        """
+        res = [self.root]
+        while self.children[res[-1]]:
+            res.append(max(self.children[res[-1]],
+                           key=lambda n: (self.weight[n][2] or 0, self.weight[n][1], n)))
+        return res
+
+
+def _format(weight, unit):
+    count, size, time = weight
+    res = '%8d %10s' % (count, '%.1fKB' % (size / 1024.0))
+    if time is not None:
+        res += ' %10s' % format_cost(time, unit)
+    return res
+
+
+def report(target, dep_graph, startup=None):
+    """Return the ``--lazy-imports`` report for ``dep_graph``.
+    """
+    analysis = StartupAnalysis(target, dep_graph, startup)
+    unit = dep_graph.cost_unit
+    header = '%8s %10s' % ('modules', 'size') + (' %10s' % 'cost' if unit else '')
+
+    count, size, time = analysis.weight[analysis.root]
+    total = '%d modules, %.1fKB' % (count, size / 1024.0)
+    if time is not None:
+        total += ', ' + format_cost(time, unit)
+    lines = ['Start-up of %s: %s' % (analysis.root, total), '']
+    lines.append('Lazy import candidates (importer -> imported):')
+    lines.append(header + '  import')
+    for importer, imported, weight in analysis.candidates():
+        lines.append('%s  %s -> %s' % (_format(weight, unit), importer, imported))
+
+    lines.append('')
+    lines.append('Critical path:')
+    lines.append(header + '  module')
+    for name in analysis.critical_path():
+        lines.append('%s  %s' % (_format(analysis.weight[name], unit), name))
+    return '\n'.join(lines)
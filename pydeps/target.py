@@ -11,6 +11,8 @@ import sys
 import tempfile
 from contextlib import contextmanager
 import logging
+
+from . import archive
 log = logging.getLogger(__name__)
 
 
@@ -23,6 +25,10 @@ class Target(object):
     is_pysource = False
     is_module = False
     is_dir = False
+    #: a zip archive (wheel, egg, zipapp, ...)
+    is_archive = False
+    #: the ``__main__.py`` of a zipapp (None for other targets)
+    archive_main = None
 
     def __init__(self, path):
         # log.debug("CURDIR: %s, path: %s, exists: %s", os.getcwd(), path, os.path.exists(path))
@@ -43,6 +49,7 @@ class Target(object):
         self.is_dir = os.path.isdir(self.path)
         self.is_module = self.is_dir and '__init__.py' in os.listdir(self.path)
         self.is_pysource = os.path.splitext(self.path)[1] in ('.py', '.pyc', '.pyo', '.pyw')
+        self.is_archive = not self.is_dir and archive.is_archive(self.path)
         self.fname = os.path.basename(self.path)
         if self.is_dir:
             self.dirname = self.fname
@@ -57,6 +64,17 @@ class Target(object):
         else:
             self.workdir = os.path.realpath(tempfile.mkdtemp())
 
+        if self.is_archive:
+            # the archive is the sys.path entry, like for zipimport
+            self.syspath_dir = self.path
+            self.relpath = ''
+            self.modpath = re.sub(r'\W', '_', self.modname)
+            self.package_root = self.path
+            arc = archive.open_archive(self.path)
+            if '__main__.py' in arc.members:
+                self.archive_main = os.path.join(self.path, '__main__.py')
+            return
+
         self.syspath_dir = self.get_package_root()
         # split path such that syspath_dir + relpath == path
         self.relpath = self.path[len(self.syspath_dir):].lstrip(os.path.sep)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Keep the dependency graph up to date while the source files change
+(``pydeps --watch``).
+
+The module finder is kept in memory, and the Python source files below the
+target are polled for changes.  Only the changed, added and removed files
+(and the modules whose imports can resolve differently because of them) are
+scanned again, see :meth:`pydeps.py2depgraph.MyModuleFinder.update`.  The
+output is written again only when the resulting graph is different.
+"""
+import logging
+import os
+import time
+
+from . import cli, py2depgraph
+from .dummymodule import DummyModule
+
+log = logging.getLogger(__name__)
+
+
+def source_files(directory):
+    """Return ``{pathname: (mtime_ns, size)}`` for all Python source files
+       below ``directory`` (dot-directories and ``__pycache__`` are skipped).
+    """
+    res = {}
+    stack = [directory]
+    while stack:
+        dirname = stack.pop()
+        try:
+            entries = list(os.scandir(dirname))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if not entry.name.startswith('.') and entry.name != '__pycache__':
+                        stack.append(entry.path)
+                elif entry.name.endswith(('.py', '.pyw')):
+                    st = entry.stat()
+                    res[entry.path] = (st.st_mtime_ns, st.st_size)
+            except OSError:  # pragma: nocover
+                pass
+    return res
+
+
+def watch_root(trgt):
+    """The directory to watch for ``trgt``.
+    """
+    if os.path.isdir(trgt.package_root):
+        return trgt.package_root
+    return trgt.syspath_dir
+
+
+class Watcher(object):
+    """Poll the Python source files below ``directory`` for changes.
+    """
+    def __init__(self, directory, interval=1.0):
+        self.directory = directory
+        self.interval = interval
+        self.files = source_files(directory)
+
+    def poll(self):
+        """Return the ``(changed, added, removed)`` sets of source files
+           since the last call.
+        """
+        files = source_files(self.directory)
+        old = self.files
+        self.files = files
+        changed = {p for p, st in files.items() if p in old and old[p] != st}
+        added = files.keys() - old.keys()
+        removed = old.keys() - files.keys()
+        return changed, added, removed
+
+    def wait(self):
+        """Block until some source file has changed, and return the
+           changes (like :meth:`poll`).
+        """
+        while True:
+            time.sleep(self.interval)
+            changes = self.poll()
+            if any(changes):
+                return changes
+
+
+def update(mf, trgt, modified, added, removed, **kw):
+    """Bring the finder ``mf`` for ``trgt`` up to date with the file changes.
+    """
+    log.info("changed: %r, added: %r, removed: %r", modified, added, removed)
+    if (added or removed) and not trgt.is_pysource:
+        DummyModule(trgt, **kw)   # re-create the dummy module for the new set of files
+    mf.update(modified, added, removed)
+
+
+def watch(trgt, emit, **kw):
+    """Analyse ``trgt`` and call ``emit(dep_graph)``, then keep analysing the
+       files that change, and call ``emit`` again whenever the graph has
+       changed.  Runs until interrupted.
+    """
+    mf = py2depgraph.find_modules(trgt, **kw)
+    dep_graph = py2depgraph.finder_depgraph(mf, trgt, **kw)
+    emit(dep_graph)
+    state = dep_graph.__json__()
+
+    watcher = Watcher(watch_root(trgt), kw.get('watch_interval', 1.0))
+    cli.verbose(1, "watching", watcher.directory, "for changes (Ctrl-C to stop)")
+    try:
+        while True:
+            changed, added, removed = watcher.wait()
+            update(mf, trgt, changed, added, removed, **kw)
+            dep_graph = py2depgraph.finder_depgraph(mf, trgt, **kw)
+            new_state = dep_graph.__json__()
+            if new_state != state:
+                cli.verbose(1, "the graph has changed, updating the output")
+                emit(dep_graph)
+                state = new_state
+    except KeyboardInterrupt:
+        pass
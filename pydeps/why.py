@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Why is a module imported (``pydeps --why MODULE``)?
+
+The chains of imports from the target (or the ``--bacon-roots``) to the
+module, the shortest first: a breadth first search finds the shortest
+chain, and Yen's algorithm the next shortest chains that are different
+from the ones found before (they don't visit a module twice).
+"""
+import collections
+import heapq
+
+#: the start of every chain (it imports all the roots)
+_START = object()
+
+
+def shortest_path(edges, start, goal, removed_nodes=(), removed_edges=()):
+    """The shortest path in ``edges`` (``{node: [nodes it has an edge
+       to]}``) from ``start`` to ``goal`` that doesn't go through
+       ``removed_nodes`` or ``removed_edges``, None if there is no such
+       path.
+    """
+    parent = {start: None}
+    queue = collections.deque([start])
+    while queue:
+        node = queue.popleft()
+        if node == goal:
+            res = []
+            while node is not None:
+                res.append(node)
+                node = parent[node]
+            return res[::-1]
+        for child in edges.get(node, ()):
+            if child not in parent and child not in removed_nodes and (node, child) not in removed_edges:
+                parent[child] = node
+                queue.append(child)
+    return None
+
+
+def shortest_paths(edges, roots, goal, k):
+    """The ``k`` shortest paths in ``edges`` from any of the ``roots`` to
+       ``goal`` (Yen's algorithm), shortest first.
+    """
+    edges = dict(edges)
+    edges[_START] = sorted(roots)
+    first = shortest_path(edges, _START, goal)
+    if first is None:
+        return []
+    found = [first]
+    candidates = []     # heap of (length, path)
+    seen = {tuple(first[1:])}
+    while len(found) < k:
+        prev = found[-1]
+        for i in range(len(prev) - 1):
+            spur, root_path = prev[i], prev[:i + 1]
+            # don't find the paths that start with root_path again
+            removed_edges = {(p[i], p[i + 1]) for p in found if p[:i + 1] == root_path}
+            spur_path = shortest_path(edges, spur, goal, set(root_path[:-1]), removed_edges)
+            if spur_path is not None:
+                path = root_path[:-1] + spur_path
+                if tuple(path[1:]) not in seen:
+                    seen.add(tuple(path[1:]))
+                    heapq.heappush(candidates, (len(path), path[1:], path))
+        if not candidates:
+            break
+        found.append(heapq.heappop(candidates)[2])
+    return [path[1:] for path in found]
+
+
+def why(dep_graph, name, k=5):
+    """The (at most ``k``) shortest chains of imports that import ``name``
+       in ``dep_graph``, as lists of module names starting with a root.
+    """
+    if name not in dep_graph.sources:
+        raise RuntimeError("The module %r is not in the graph" % name)
+    edges = {
+        src.name: sorted(dep_graph.name_of(i) for i in dep_graph.import_ids(src.id))
+        for src in dep_graph.sources.values()
+    }
+    roots = [src.name for src in dep_graph.bacon_roots()]
+    dummy = dep_graph.source_name('__main__') == '__main__' and '__main__' in edges
+    if dummy:
+        # the dummy module imports all the modules of a package, what
+        # matters is how the package's modules import ``name``.
+        edges['__main__'] = [imp for imp in edges['__main__'] if imp != name]
+    res = shortest_paths(edges, roots, name, k)
+    if dummy:
+        res = [path[1:] if path[0] == '__main__' else path for path in res]
+    return res
+
+
+def report(dep_graph, name, chains):
+    """Return the ``--why`` report of the ``chains`` that import ``name``.
+    """
+    if not chains:
+        roots = ', '.join(src.name for src in dep_graph.bacon_roots())
+        return "%s is not imported by %s" % (name, roots)
+    lines = ['Why is %s imported?' % name, '']
+    n = len(chains[0]) - 1
+    lines.append('shortest: %s  (%d import%s)' % (' -> '.join(chains[0]), n, '' if n == 1 else 's'))
+    if len(chains) > 1:
+        lines.append('')
+        for i, chain in enumerate(chains, 1):
+            lines.append('%3d. %s' % (i, ' -> '.join(chain)))
+    return '\n'.join(lines)
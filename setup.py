@@ -40,10 +40,15 @@ setuptools.setup(
         'enum34; python_version < "3.4"',
         'stdlib_list',
     ],
+    extras_require={
+        # faster pagerank/betweenness in --metrics-output
+        'metrics': ['numpy'],
+    },
     long_description=io.open('README.rst', encoding='utf8').read(),
     entry_points={
         'console_scripts': [
             'pydeps = pydeps.pydeps:pydeps',
+            'pydeps-diff = pydeps.pydeps:pydeps_diff',
         ]
     },
     url='https://github.com/thebjorn/pydeps',
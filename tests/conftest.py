@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+
+@pytest.fixture(autouse=True, scope='session')
+def scan_cache_dir(tmp_path_factory):
+    """Keep the scan cache of the tests out of the user's cache directory.
+    """
+    cache_home = str(tmp_path_factory.mktemp('cache'))
+    saved = {name: os.environ.get(name) for name in ('XDG_CACHE_HOME', 'LOCALAPPDATA')}
+    os.environ['XDG_CACHE_HOME'] = os.environ['LOCALAPPDATA'] = cache_home
+    yield cache_home
+    for name, value in saved.items():
+        if value is None:
+            del os.environ[name]
+        else:
+            os.environ[name] = value
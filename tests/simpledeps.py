@@ -22,3 +22,17 @@ def depgrf(item, args=""):
 
 def simpledeps(item, args=""):
     return {"%s -> %s" % (a.name, b.name) for a, b in depgrf(item, args)}
+
+
+def unpruned_depgrf(item, args=""):
+    """Like depgrf, but the finder loads every module it finds (it
+       doesn't leave any unloaded with --watch).
+    """
+    t = Target(item)
+    with t.chdir_work():
+        return py2dep(t, **empty(args, watch=True))
+
+
+def graph_summary(g):
+    return {src.name: (src.bacon, sorted(src.imports), sorted(src.imported_by))
+            for src in g.sources.values()}
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import os
+import zipfile
+
+import pytest
+
+from pydeps import archive, mfimp
+from tests.filemaker import create_files
+from tests.simpledeps import simpledeps
+
+
+FILES = """
+    relimp:
+        - __init__.py
+        - a.py: |
+            from . import b
+            from .c import d, e
+        - b.py: |
+            import relimp.c.e
+            from relimp.c import *
+        - c:
+            - __init__.py
+            - d.py: |
+                from .. import a
+            - e.py
+"""
+
+
+def _zip(fname, directory, compression=zipfile.ZIP_DEFLATED, extra=()):
+    with zipfile.ZipFile(fname, 'w', compression) as zf:
+        for root, _dirs, files in os.walk(directory):
+            for f in files:
+                pathname = os.path.join(root, f)
+                zf.write(pathname, os.path.relpath(pathname, os.path.dirname(directory)))
+        for name, txt in extra:
+            zf.writestr(name, txt)
+    return os.path.abspath(fname)
+
+
+def test_archive_read_and_list():
+    with create_files(FILES) as workdir:
+        for compression in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            fname = _zip('relimp.zip', 'relimp', compression)
+            arc = archive.open_archive(fname)
+            assert arc.listing('relimp') == (
+                frozenset(['__init__.py', 'a.py', 'b.py']), frozenset(['c']))
+            with open(os.path.join('relimp', 'a.py'), 'rb') as fp:
+                assert arc.read('relimp/a.py') == fp.read()
+            assert arc.modules() == ['relimp', 'relimp.a', 'relimp.b', 'relimp.c', 'relimp.c.d', 'relimp.c.e']
+            archive.close_archives()
+            os.remove(fname)
+
+
+def test_find_module_in_archive():
+    with create_files(FILES) as workdir:
+        fname = _zip('relimp.egg', 'relimp')
+        index = mfimp.PathIndex()
+        fp, pathname, (_suffix, _mode, kind) = mfimp.find_module('relimp', [fname], index)
+        assert (pathname, kind) == (os.path.join(fname, 'relimp'), mfimp.PKG_DIRECTORY)
+        fp, pathname, (_suffix, _mode, kind) = mfimp.find_module('d', [os.path.join(pathname, 'c')], index)
+        assert kind == mfimp.PY_SOURCE
+        assert fp.read() == b'from .. import a\n'
+
+
+def test_wheel_same_graph_as_directory():
+    with create_files(FILES) as workdir:
+        fname = _zip('relimp-1.0-py3-none-any.whl', 'relimp', extra=[
+            ('relimp-1.0.dist-info/METADATA', 'Name: relimp\n'),
+        ])
+        assert simpledeps(fname, '--no-cache') == simpledeps('relimp', '--no-cache')
+        assert simpledeps(fname, '--no-cache --jobs 2') == simpledeps('relimp', '--no-cache')
+
+
+def test_close_archives():
+    with create_files(FILES) as workdir:
+        fname = _zip('relimp.zip', 'relimp')
+        arc = archive.open_archive(fname)
+        assert archive.open_archive(fname) is arc
+        archive.close_archives()
+        with pytest.raises(ValueError):
+            arc.read('relimp/a.py')
+        assert archive.open_archive(fname) is not arc
+
+        # the archives are closed when the graph is done
+        simpledeps(fname, '--no-cache')
+        assert fname not in archive._archives
+
+
+def test_zipapp_main():
+    with create_files(FILES) as workdir:
+        fname = _zip('app.pyz', 'relimp', extra=[('__main__.py', 'import relimp.b\n')])
+        deps = simpledeps(fname, '--no-cache')
+        assert 'relimp.b -> app.pyz' in deps
+        assert 'relimp.c.e -> relimp.b' in deps
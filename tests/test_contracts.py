@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+from pydeps import contracts
+from pydeps.configs import Config, HAVE_TOML
+from tests.filemaker import create_files
+from tests.simpledeps import depgrf
+
+
+files = """
+    app:
+        - __init__.py
+        - core:
+            - __init__.py
+            - util.py
+            - bad.py: |
+                from app.web import views
+        - models:
+            - __init__.py
+            - m.py: |
+                from app.core import util
+        - web:
+            - __init__.py
+            - views.py: |
+                from app.core import util
+"""
+
+
+def _check(**kw):
+    with create_files(files):
+        g = depgrf('app', '--max-bacon 0')
+        return {name: violations for name, _kind, violations in contracts.check(g, kw)}
+
+
+def test_forbidden():
+    res = _check(
+        core_web=dict(type='forbidden', source=['app.core'], forbidden=['app.web']),
+        models_web=dict(type='forbidden', source='app.models', forbidden='app.web'),
+    )
+    assert ['app.core.bad', 'app.web'] in res['core_web']
+    assert ['app.core.bad', 'app.web.views'] in res['core_web']
+    assert res['models_web'] == []
+
+
+def test_allowed_layers_independence():
+    res = _check(
+        models=dict(type='allowed', source=['app.models'], allowed=['app.core']),
+        web=dict(type='allowed', source=['app.web'], allowed=[]),
+        layers=dict(type='layers', layers=['app.web', 'app.models', 'app.core']),
+        indep=dict(type='independence', modules=['app.models', 'app.web']),
+    )
+    assert res['models'] == []
+    assert ['app.web.views', 'app.core'] in res['web']
+    assert ['app.core.bad', 'app.web.views'] in res['layers']
+    assert all(chain[0].startswith('app.core') for chain in res['layers'])
+    assert res['indep'] == []
+
+
+def test_bad_contracts():
+    with pytest.raises(RuntimeError, match="unknown type"):
+        _check(c=dict(type='nope'))
+    with pytest.raises(RuntimeError, match="needs 'forbidden'"):
+        _check(c=dict(type='forbidden', source=['app.core']))
+    with pytest.raises(RuntimeError, match="not in the graph"):
+        _check(c=dict(type='forbidden', source=['app.kore'], forbidden=['app.web']))
+
+
+def test_report():
+    results = [('a', 'forbidden', [['x', 'y', 'z']]), ('b', 'layers', [])]
+    assert contracts.report(results).splitlines() == [
+        'Contracts: 1 kept, 1 broken',
+        '',
+        'BROKEN a (forbidden)',
+        '    x -> y -> z',
+        'KEPT   b (layers)',
+    ]
+
+
+@pytest.mark.skipif(not HAVE_TOML, reason="no toml library")
+def test_contracts_config():
+    files = """
+        - pyproject.toml: |
+            [tool.pydeps.contracts.core-is-not-web]
+            type = "forbidden"
+            source = ["app.core"]
+            forbidden = ["app.web"]
+    """
+    with create_files(files) as workdir:
+        conf = Config.load([os.path.join(workdir, 'pyproject.toml')])
+        assert conf.contracts == {
+            'core-is-not-web': dict(type='forbidden', source=['app.core'], forbidden=['app.web']),
+        }
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import os
+
+from pydeps import cost
+from pydeps.depgraph2dot import dep2dot
+from pydeps.target import Target
+from tests.filemaker import create_files
+from tests.simpledeps import depgrf, empty
+
+
+FILES = """
+    relimp:
+        - __init__.py
+        - a.py: |
+            from . import b
+        - b.py: |
+            from . import c
+        - c.py
+"""
+
+
+def test_parse_importtime():
+    lines = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 | site
+pydeps: importtime start
+import time:        50 |         50 |     relimp.c
+import time:       300 |        350 |   relimp.b
+import time:      1000 |       1350 | relimp.a
+""".splitlines()
+    assert cost.parse_importtime(lines) == [
+        ('relimp.c', 50, 50, 2),
+        ('relimp.b', 300, 350, 1),
+        ('relimp.a', 1000, 1350, 0),
+    ]
+    assert cost.parse_importtime(lines[:2]) == [('site', 120, 120, 0)]
+
+
+def test_importtime_log():
+    with create_files(FILES) as workdir:
+        with open('importtime.log', 'w') as fp:
+            fp.write(
+                "import time:       200 |        200 | relimp\n"
+                "import time:        50 |         50 |     relimp.c\n"
+                "import time:      2500 |       2600 |   relimp.b\n"
+                "import time:      1000 |       3600 | relimp.a\n"
+            )
+        kw = empty('--importtime-log importtime.log')
+        dep_graph = depgrf('relimp')
+        cost.add_costs(dep_graph.target, dep_graph, **kw)
+        dot = dep2dot(dep_graph.target, dep_graph, **kw)
+
+        src = dep_graph.sources['relimp.b']
+        assert (src.cost, src.cumulative_cost) == (2500, 2600)
+        assert dep_graph.total_cost == 3800
+        assert 'label="relimp.b\\n2.5ms (2.6ms)"' in dot
+        assert 'label="relimp.c\\n0.1ms"' in dot
+        report = cost.report(dep_graph).splitlines()
+        assert report[1].split() == ['2.5ms', '2.6ms', 'relimp.b']
+        assert report[-1].split() == ['3.8ms', 'total']
+
+
+def test_run_importtime():
+    with create_files(FILES) as workdir:
+        trgt = Target(os.path.join(workdir, 'relimp'))
+        costs, total = cost.importtime_costs(trgt)
+        assert set(costs) == {'relimp', 'relimp.a', 'relimp.b', 'relimp.c'}
+        assert total >= costs['relimp.a'][1] >= costs['relimp.b'][1]
+
+
+def test_static_cost():
+    with create_files(FILES) as workdir:
+        dep_graph = depgrf('relimp', '--cost static --no-cache')
+        cost.add_costs(dep_graph.target, dep_graph, cost='static')
+        a, b, c = [dep_graph.sources['relimp.' + name] for name in 'abc']
+        assert c.metrics['source_bytes'] == 0
+        assert b.metrics['statements'] == 1
+        assert a.cost == a.metrics['bytecode_bytes']
+        assert a.cumulative_cost == a.cost + b.cost + c.cost + dep_graph.sources['relimp'].cost
+        assert c.cumulative_cost == c.cost + dep_graph.sources['relimp'].cost
+        report = cost.report(dep_graph).splitlines()
+        assert report[1].endswith('relimp.a')
+
+
+def test_memory_cost():
+    files = """
+        relimp:
+            - __init__.py
+            - a.py: |
+                from . import b
+            - b.py: |
+                from . import c
+                DATA = [str(i) * 10 for i in range(20000)]
+            - c.py
+    """
+    with create_files(files) as workdir:
+        dep_graph = depgrf('relimp')
+        order = cost.import_order(dep_graph)
+        assert order.index('relimp.c') < order.index('relimp.b') < order.index('relimp.a')
+        assert order.index('relimp') < order.index('relimp.c')
+
+        cost.add_costs(dep_graph.target, dep_graph, cost='memory')
+        a, b, c = [dep_graph.sources['relimp.' + name] for name in 'abc']
+        assert b.cost > 20000 * 10 > a.cost
+        assert a.cumulative_cost == a.cost + b.cost + c.cost + dep_graph.sources['relimp'].cost
+        assert cost.report(dep_graph).splitlines()[1].endswith('relimp.b')
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
+import json
+
+from pydeps import cycles
 from tests.filemaker import create_files
-from tests.simpledeps import simpledeps
+from tests.simpledeps import depgrf, simpledeps
 
 
 def test_cycle():
@@ -17,3 +20,77 @@ def test_cycle():
         deps = simpledeps('relimp')
         assert 'relimp.a -> relimp.b' in deps
         assert 'relimp.b -> relimp.a' in deps
+
+
+def test_strongly_connected_components():
+    edges = {
+        'a': ['b'],
+        'b': ['a', 'c'],
+        'c': ['d'],
+        'd': ['c', 'd'],
+        'e': ['a'],
+        'f': ['f'],
+        'g': [],
+    }
+    sccs = sorted(sorted(comp) for comp in cycles.strongly_connected_components(edges))
+    assert sccs == [['a', 'b'], ['c', 'd'], ['e'], ['f'], ['g']]
+    assert [cycles.is_cyclic(edges, comp) for comp in sccs] == [True, True, False, True, False]
+
+
+def test_elementary_cycles():
+    edges = {n: [m for m in 'abcd' if m != n] for n in 'abcd'}
+    found = cycles.elementary_cycles(edges, list('abcd'), 1000)
+    assert len(found) == 6 + 8 + 6     # 2-, 3-, and 4-cycles of K4
+    assert len({tuple(c) for c in found}) == len(found)
+    assert all(c[0] == c[-1] and len(set(c)) == len(c) - 1 for c in found)
+    assert len(cycles.elementary_cycles(edges, list('abcd'), 5)) == 5
+
+
+def test_cycle_summary():
+    files = """
+        relimp:
+            - __init__.py
+            - a.py: |
+                from . import b, c
+            - b.py: |
+                from . import a, c
+            - c.py: |
+                from . import a
+            - d.py: |
+                from . import a
+    """
+    with create_files(files) as workdir:
+        g = depgrf('relimp', '--show-cycles')
+        assert g.cyclenodes == {'relimp.a', 'relimp.b', 'relimp.c'}
+        assert ('relimp.d', 'relimp.a') not in g.cyclerelations
+        assert len(g.cyclerelations) == 5
+        assert sorted(g.cycles) == [
+            ['relimp.a', 'relimp.b', 'relimp.a'],
+            ['relimp.a', 'relimp.b', 'relimp.c', 'relimp.a'],
+            ['relimp.a', 'relimp.c', 'relimp.a'],
+        ]
+        summary = json.loads(g.cycles_json())
+        assert len(summary) == 1
+        assert summary[0]['size'] == 3
+        assert summary[0]['members'] == ['relimp.a', 'relimp.b', 'relimp.c']
+        assert summary[0]['internal_edges'] == 5
+        assert len(summary[0]['cycles']) == 3
+
+        g = depgrf('relimp', '--show-cycles --max-cycles 1')
+        assert len(g.cycles) == 1
+
+
+def test_no_self_imports():
+    files = """
+        relimp:
+            - __init__.py
+            - a.py: |
+                import os
+                from os.path import join
+    """
+    with create_files(files) as workdir:
+        # os does `from os.path import ...`, which isn't an import of os
+        g = depgrf('relimp', '--pylib --max-bacon 0 --noise-level 1000 --show-cycles --no-cache')
+        assert 'os' in g.sources
+        assert all(name not in src.imports for name, src in g.sources.items())
+        assert all(len(set(cycle)) > 1 for cycle in g.cycles)
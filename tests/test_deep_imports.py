@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+import sys
+
+from tests.filemaker import create_files
+from tests.simpledeps import depgrf
+
+
+def _chain(n):
+    """A package where ``m<i>`` imports ``m<i+1>``, and the last module
+       imports ``m0``.
+    """
+    files = "deep:\n    - __init__.py\n"
+    for i in range(n):
+        files += "    - m%d.py: |\n        from . import m%d\n" % (i, (i + 1) % n)
+    return files
+
+
+def test_import_chain_deeper_than_recursion_limit():
+    n = 2 * sys.getrecursionlimit()
+    with create_files(_chain(n)) as workdir:
+        g = depgrf('deep', '--max-bacon 0 --show-cycles')
+        deps = {"%s -> %s" % (a.name, b.name) for a, b in g}
+        assert len(g.sources) == n
+        assert 'deep.m1 -> deep.m0' in deps
+        assert 'deep.m0 -> deep.m%d' % (n - 1) in deps
+        assert len(g.cycles) == 1
+        assert len(g.cycles[0]) == n + 1
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import sys
+
+from pydeps import graphdiff
+from pydeps.pydeps import pydeps_diff
+from tests.filemaker import create_files
+from tests.simpledeps import depgrf
+
+
+def _snapshot(edges, bacon=None):
+    bacon = bacon or {}
+    return {
+        name: dict(name=name, bacon=bacon.get(name, 1), imports=imports)
+        for name, imports in edges.items()
+    }
+
+
+def test_diff():
+    old = _snapshot({'a': ['b'], 'b': ['c'], 'c': [], 'gone': []}, {'c': 2})
+    new = _snapshot({'a': ['b'], 'b': ['c'], 'c': ['a'], 'new': ['a']}, {'c': sys.maxsize})
+    d = graphdiff.diff(old, new)
+    assert d['added_nodes'] == ['new']
+    assert d['removed_nodes'] == ['gone']
+    assert d['added_edges'] == [['c', 'a'], ['new', 'a']]
+    assert d['removed_edges'] == []
+    assert d['bacon_changes'] == {'c': [2, None]}
+    assert set(d['scc_changes']) == {'a', 'b', 'c'}
+    assert d['scc_changes']['a'] == {'old': [], 'new': ['a', 'b', 'c']}
+
+    assert graphdiff.neighbourhood(d, old, new) == {'a', 'b', 'c', 'gone', 'new'}
+    dotsrc = graphdiff.diff2dot(d, old, new)
+    assert 'a -> c [color="%s",penwidth="2"]' % graphdiff.EDGE_COLORS['added'] in dotsrc
+    assert 'gone [fillcolor="%s"' % graphdiff.COLORS['removed'] in dotsrc
+
+    assert graphdiff.is_empty(graphdiff.diff(new, new))
+
+
+def test_diff_snapshots():
+    files = """
+        app:
+            - __init__.py
+            - a.py: |
+                from . import b
+            - b.py
+    """
+    with create_files(files) as workdir:
+        with open(os.path.join(workdir, 'old.json'), 'w') as fp:
+            fp.write(depgrf('app', '--max-bacon 0').__json__())
+        with open(os.path.join(workdir, 'app', 'b.py'), 'w') as fp:
+            fp.write('from . import c\n')
+        with open(os.path.join(workdir, 'app', 'c.py'), 'w') as fp:
+            fp.write('')
+        with open(os.path.join(workdir, 'new.json'), 'w') as fp:
+            fp.write(depgrf('app', '--max-bacon 0').__json__())
+
+        dotfile = os.path.join(workdir, 'diff.dot')
+        d = pydeps_diff([
+            os.path.join(workdir, 'old.json'), os.path.join(workdir, 'new.json'),
+            '--dot-output', dotfile,
+        ])
+        assert d['added_nodes'] == ['app.c']
+        assert ['app.b', 'app.c'] in d['added_edges']
+        assert json.loads(graphdiff.report(d)) == d
+        with open(dotfile) as fp:
+            assert 'app_c -> app_b' in fp.read()
+
+        # the pydeps-diff command reads sys.argv
+        argv = sys.argv[:]
+        try:
+            sys.argv[:] = ['pydeps-diff', os.path.join(workdir, 'old.json'), os.path.join(workdir, 'new.json')]
+            assert pydeps_diff() == d
+        finally:
+            sys.argv[:] = argv
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+
+from pydeps import impact
+from pydeps.py2depgraph import find_modules, finder_depgraph
+from pydeps.target import Target
+from tests.filemaker import create_files
+from tests.simpledeps import empty
+
+
+files = """
+    pkg:
+        - __init__.py
+        - a.py: |
+            from pkg.sub import x
+        - b.py
+        - sub:
+            - __init__.py
+            - x.py
+    docs:
+        - index.rst
+    tests:
+        - __init__.py
+        - test_a.py: |
+            import pkg.a
+        - test_b.py: |
+            import pkg.b
+        - helpers_test.py: |
+            from pkg.sub import x
+"""
+
+
+def _impact(workdir, paths):
+    trgt = Target(os.path.join(workdir, 'tests'))
+    with trgt.chdir_work():
+        kw = empty('--max-bacon 0')
+        mf = find_modules(trgt, **kw)
+        dep_graph = finder_depgraph(mf, trgt, **kw)
+    return impact.impact(trgt, dep_graph, paths, mf.badmodules)
+
+
+def test_impact():
+    with create_files(files) as workdir:
+        res = _impact(workdir, [os.path.join('pkg', 'sub', 'x.py'), os.path.join('docs', 'index.rst')])
+        assert res['changed'] == ['pkg.sub.x']
+        assert res['affected'] == ['pkg.a', 'pkg.sub.x', 'tests.helpers_test', 'tests.test_a']
+        assert res['tests'] == [os.path.join('tests', 'helpers_test.py'), os.path.join('tests', 'test_a.py')]
+        assert res['ignored'] == [os.path.join('docs', 'index.rst')]
+        assert res['deleted'] == res['unknown'] == []
+        assert impact.report(res, 'tests').splitlines() == res['tests']
+
+
+def test_impact_package():
+    with create_files(files) as workdir:
+        # changing a package affects its modules (importing them loads it)
+        res = _impact(workdir, [os.path.join(workdir, 'pkg', '__init__.py')])
+        assert res['changed'] == ['pkg']
+        assert res['tests'] == [
+            os.path.join('tests', 'helpers_test.py'),
+            os.path.join('tests', 'test_a.py'),
+            os.path.join('tests', 'test_b.py'),
+        ]
+
+
+def test_impact_deleted_module():
+    with create_files(files) as workdir:
+        os.remove(os.path.join(workdir, 'pkg', 'sub', 'x.py'))
+        res = _impact(workdir, [os.path.join('pkg', 'sub', 'x.py')])
+        assert res['changed'] == []
+        assert res['deleted'] == ['pkg.sub.x']
+        assert res['unknown'] == []
+        assert res['affected'] == ['pkg.a', 'tests.helpers_test', 'tests.test_a']
+        assert res['tests'] == [os.path.join('tests', 'helpers_test.py'), os.path.join('tests', 'test_a.py')]
+        assert res['ignored'] == []
+
+        # nothing imports pkg.b anymore
+        os.remove(os.path.join(workdir, 'pkg', 'b.py'))
+        os.remove(os.path.join(workdir, 'tests', 'test_b.py'))
+        res = _impact(workdir, [os.path.join('pkg', 'b.py')])
+        assert res['deleted'] == res['unknown'] == ['pkg.b']
+        assert res['tests'] == []
+
+
+def test_git_changed_files():
+    with create_files(files) as workdir:
+        def git(*args):
+            subprocess.check_call(('git', '-c', 'user.name=pydeps', '-c', 'user.email=pydeps@example.com') + args,
+                                  cwd=workdir, stdout=subprocess.DEVNULL)
+        git('init', '-q')
+        git('add', '.')
+        git('commit', '-q', '-m', 'initial')
+        os.remove(os.path.join(workdir, 'pkg', 'b.py'))
+        git('mv', os.path.join('pkg', 'a.py'), os.path.join('pkg', 'c.py'))
+        with open(os.path.join(workdir, 'pkg', 'new.py'), 'w') as fp:
+            fp.write('')
+        top = os.path.realpath(workdir)
+        assert impact.git_changed_files('HEAD', workdir) == sorted(
+            os.path.join(top, 'pkg', name) for name in ['a.py', 'b.py', 'c.py', 'new.py'])
+
+
+def test_is_test_file():
+    assert impact.is_test_file('tests/test_foo.py')
+    assert impact.is_test_file('foo_test.py')
+    assert not impact.is_test_file('tests/conftest.py')
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import textwrap
+
+from pydeps import importscan
+from tests.filemaker import create_files
+from tests.simpledeps import simpledeps
+
+
+SOURCE = textwrap.dedent("""
+    import a.b as c, d
+    from . import x
+    from ..m import (y as z, w)
+    from q import *
+    try:
+        import h
+    except ImportError:
+        h = None
+    def fn():
+        import j
+        class K:
+            from k import l
+        return [i for i in range(3)]
+""")
+
+
+def _imports(records):
+    return {r for r in records if r[0] != 'store'}
+
+
+def test_engines_agree():
+    bytecode = importscan.code_imports(compile(SOURCE, 'x.py', 'exec'))
+    assert _imports(importscan.source_imports(SOURCE)) == _imports(bytecode)
+    assert ('relative_import', (2, ('y', 'w'), 'm')) in bytecode
+    assert ('absolute_import', (('l',), 'k')) in bytecode
+
+
+def test_ast_stores():
+    stores = {r[1][0] for r in importscan.source_imports(SOURCE) if r[0] == 'store'}
+    assert stores == {'c', 'd', 'x', 'z', 'w', 'h', 'fn'}
+
+
+def test_metrics():
+    records = importscan.scan_source(SOURCE, 'x.py', metrics=True)
+    assert records[:-1] == importscan.scan_source(SOURCE, 'x.py')
+    assert importscan.scan_source(SOURCE, 'x.py', 'ast', metrics=True)[-1] == records[-1]
+    what, values = records[-1]
+    metrics = dict(zip(importscan.METRICS, values))
+    assert what == 'metrics'
+    assert metrics['source_bytes'] == len(SOURCE)
+    assert metrics['statements'] == 8    # fn's body isn't run at import
+    assert metrics['code_objects'] >= 2  # fn, K (and the comprehension)
+    assert metrics['bytecode_bytes'] > metrics['constants_bytes'] > 0
+
+
+def test_ast_scanner():
+    files = """
+        relimp:
+            - __init__.py
+            - a.py: |
+                from . import b
+                def f():
+                    from .c import d
+            - b.py: |
+                import relimp.c
+            - c:
+                - __init__.py
+                - d.py
+    """
+    with create_files(files) as workdir:
+        bytecode = simpledeps('relimp', '--no-cache')
+        assert simpledeps('relimp', '--no-cache --scanner ast') == bytecode
+        assert 'relimp.c.d -> relimp.a' in bytecode
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from pydeps.matcher import Matcher, PrefixMatcher
+
+
+def test_matcher():
+    m = Matcher(['foo', 'bar.*', '*.tests'], ['baz', 'qu?x'])
+    assert m.names == {'foo', 'baz'}
+    assert m.match('foo') and not m.match('foo.a')
+    assert m.match('bar.a') and m.match('bar.a.b') and not m.match('bar')
+    assert m.match('pkg.tests') and not m.match('pkg.tests.x')
+    assert m.match('baz') and not m.match('baz.a')
+    assert m.match('quax') and not m.match('quuux')
+    assert not Matcher()
+    assert Matcher(['foo'])
+
+
+def test_prefix_matcher():
+    only = PrefixMatcher(['pkg.a', 'other'])
+    assert only.match('pkg.a') and only.match('pkg.a.b') and only.match('pkg.ab')
+    assert only.match('others')
+    assert not only.match('pkg') and not only.match('pkg.b')
+    assert only.is_prefix('pkg.') and only.is_prefix('oth')
+    assert not only.is_prefix('pkg.b.')
+    assert PrefixMatcher(['']).match('anything')
+    assert not PrefixMatcher()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from pydeps import metrics
+from tests.filemaker import create_files
+from tests.simpledeps import depgrf
+
+# 0 imports 1 and 2, which import 3, and 3 and 4 import each other
+SUCC = [[1, 2], [3], [3], [4], [3], []]
+
+
+def test_graph_metrics():
+    res = metrics.graph_metrics(SUCC, use_numpy=False)
+    assert res['fan_in'] == [0, 1, 1, 3, 1, 0]
+    assert res['fan_out'] == [2, 1, 1, 1, 1, 0]
+    assert res['instability'] == [1.0, 0.5, 0.5, 0.25, 0.5, 0.0]
+    assert res['transitive_fan_in'] == [0, 1, 1, 4, 4, 0]
+    assert res['transitive_fan_out'] == [4, 2, 2, 1, 1, 0]
+    assert res['depth'] == [2, 1, 1, 0, 0, 0]
+    assert abs(sum(res['pagerank']) - 1) < 1e-9
+    assert max(res['pagerank']) in (res['pagerank'][3], res['pagerank'][4])
+    # every shortest chain from 0, 1 and 2 to 4 goes through 3
+    assert res['betweenness'][3] == max(res['betweenness'])
+    assert res['betweenness'][0] == 0.0
+
+    assert metrics.graph_metrics([], ['depth']) == {'depth': []}
+
+
+@pytest.mark.skipif(not metrics.HAVE_NUMPY, reason="numpy is not installed")
+def test_graph_metrics_numpy():
+    py = metrics.graph_metrics(SUCC, use_numpy=False)
+    np = metrics.graph_metrics(SUCC, use_numpy=True)
+    for name in metrics.METRICS:
+        assert py[name] == pytest.approx(np[name]), name
+    # sampled betweenness is the same too
+    assert metrics.graph_metrics(SUCC, ['betweenness'], samples=3, use_numpy=False) == pytest.approx(
+        metrics.graph_metrics(SUCC, ['betweenness'], samples=3, use_numpy=True))
+
+
+def test_compute():
+    files = """
+        app:
+            - __init__.py
+            - a.py: |
+                from . import b, c
+            - b.py: |
+                from . import c
+            - c.py
+    """
+    with create_files(files):
+        g = depgrf('app', '--max-bacon 0')
+        res = metrics.compute(g, ['fan_in', 'fan_out', 'depth'])
+        assert res['fan_in']['app.c'] == g.sources['app.c'].out_degree == len(g.sources['app.c'].imported_by)
+        assert res['fan_out']['app.a'] == g.sources['app.a'].in_degree == len(g.sources['app.a'].imports)
+        assert res['depth']['app.a'] == res['depth']['app.b'] + 1
+
+        rows = metrics.to_csv(res).splitlines()
+        assert rows[0] == 'module,fan_in,fan_out,depth'
+        assert len(rows) == len(g.sources) + 1
+        assert json.loads(metrics.to_json(res))['app.c']['fan_out'] == res['fan_out']['app.c']
+
+
+def test_noise_metric():
+    files = """
+        app:
+            - __init__.py
+            - a.py: |
+                from . import b
+            - b.py: |
+                from . import c
+            - c.py
+    """
+    with create_files(files):
+        g = depgrf('app', '--max-bacon 0 --noise-level 2')
+        assert 'app.c' in g.sources
+        # app.c is a sink that app.a, app.b (and the dummy __main__) reach
+        g = depgrf('app', '--max-bacon 0 --noise-level 2 --noise-metric transitive_fan_in')
+        assert 'app.c' not in g.sources
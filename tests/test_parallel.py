@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import os
+
+from pydeps import parallel
+from pydeps.py2depgraph import MyModuleFinder
+from tests.filemaker import create_files
+from tests.simpledeps import simpledeps
+
+
+FILES = """
+    relimp:
+        - __init__.py
+        - a.py: |
+            from . import b
+            from .c import d, e
+        - b.py: |
+            import relimp.c.e
+            from relimp import *
+        - c:
+            - __init__.py
+            - d.py: |
+                from .. import a
+            - e.py
+        - broken.py: |
+            def (
+"""
+
+
+def test_jobs_same_graph():
+    with create_files(FILES) as workdir:
+        serial = simpledeps('relimp', '--no-cache')
+        assert simpledeps('relimp', '--no-cache --jobs 3') == serial
+        assert 'relimp.c.d -> relimp.a' in serial
+
+
+def test_prescan():
+    with create_files(FILES) as workdir:
+        with open('main.py', 'w') as fp:
+            fp.write("import relimp.a\nimport relimp.broken\n")
+        mf = MyModuleFinder([workdir], no_cache=True)
+        imports = parallel.prescan(mf, 'main.py', 2)
+        prescanned = {os.path.relpath(p, workdir) for p in imports}
+        assert prescanned == {
+            'main.py',
+            os.path.join('relimp', '__init__.py'),
+            os.path.join('relimp', 'a.py'),
+            os.path.join('relimp', 'b.py'),
+            os.path.join('relimp', 'c', '__init__.py'),
+            os.path.join('relimp', 'c', 'd.py'),
+            os.path.join('relimp', 'c', 'e.py'),
+        }
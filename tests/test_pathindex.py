@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import os
+
+from pydeps import mfimp
+from tests.filemaker import create_files
+
+
+FILES = """
+    - a.py
+    - b:
+        - __init__.py
+        - c.py
+    - d: []
+    - e.txt
+"""
+
+
+def _find(name, path, index=None):
+    fp, pathname, (_suffix, _mode, kind) = mfimp.find_module(name, path, index)
+    if fp:
+        fp.close()
+    return pathname, kind
+
+
+def test_index_same_as_stat():
+    with create_files(FILES) as workdir:
+        index = mfimp.PathIndex()
+        path = [os.path.join(workdir, 'd'), workdir]
+        for name in ['a', 'b']:
+            assert _find(name, path, index) == _find(name, path)
+        assert _find('c', [os.path.join(workdir, 'b')], index)[1] == mfimp.PY_SOURCE
+        for name in ['d', 'e', 'missing']:
+            try:
+                _find(name, path, index)
+            except ImportError:
+                pass
+            else:
+                assert False, name
+
+
+def test_index_refresh():
+    with create_files(FILES) as workdir:
+        index = mfimp.PathIndex()
+        assert not index.isfile(workdir, 'f.py')
+        with open(os.path.join(workdir, 'f.py'), 'w') as fp:
+            fp.write('')
+        os.utime(workdir, ns=(0, 0))    # make sure the mtime changes
+        assert not index.isfile(workdir, 'f.py')   # cached
+        index.refresh()
+        assert index.isfile(workdir, 'f.py')
+        assert index.isdir(workdir, 'b')
+        assert index.isfile(os.path.join(workdir, 'b'), '__init__.py')
+        assert index.listing(os.path.join(workdir, 'nonexisting')).files == frozenset()
@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 import os
+import sys
 # from devtools import debug
+from pydeps.py2depgraph import MyModuleFinder
 from pydeps.pydeps import call_pydeps
 from tests.filemaker import create_files
-from tests.simpledeps import simpledeps
+from tests.simpledeps import depgrf, simpledeps, unpruned_depgrf, graph_summary
 
 
 def test_py2depgraph(capsys):
@@ -30,3 +32,136 @@ def test_pydeps_api():
             dot = f.read()
             # debug(dot)
         assert 'b -> a_py' in dot
+
+
+def _finder(fname, **kw):
+    mf = MyModuleFinder([os.getcwd()] + sys.path, no_cache=True, **kw)
+    mf.run_script(fname)
+    return mf
+
+
+def test_pylib_modules_are_not_scanned():
+    files = """
+        - a.py: |
+            import json
+            import b
+        - b.py
+    """
+    with create_files(files) as workdir:
+        mf = _finder('a.py')
+        assert 'json' in mf.modules
+        assert 'json.decoder' not in mf.modules
+        assert mf._depgraph['__main__'] == {'b': os.path.join(workdir, 'b.py')}
+
+        mf = _finder('a.py', pylib=True)
+        assert 'json.decoder' in mf.modules
+        assert 'json' in mf._depgraph['__main__']
+
+
+def test_module_shadowing_pylib_name_is_scanned():
+    files = """
+        - a.py: |
+            import email
+        - email.py: |
+            import b
+        - b.py
+    """
+    with create_files(files) as workdir:
+        mf = _finder('a.py')
+        assert 'b' in mf._depgraph['email']
+
+
+def test_modules_beyond_max_bacon_are_not_scanned():
+    files = """
+        - a.py: |
+            import b
+            import x
+        - b.py: |
+            import c
+        - c.py: |
+            import d
+        - x.py: |
+            import d
+        - d.py: |
+            import e
+        - e.py: |
+            import f
+        - f.py
+    """
+    with create_files(files) as workdir:
+        mf = MyModuleFinder([workdir] + sys.path, no_cache=True, max_bacon=2)
+        mf.breadth_first = False    # find d through b, c before x
+        mf.run_script('a.py')
+        assert mf.bacon['d'] == 2
+        assert 'e' in mf._deferred
+        assert 'd' not in mf._deferred
+        assert 'f' not in mf.modules
+
+        assert simpledeps('a.py', '--max-bacon 2') == {
+            'b -> a.py', 'x -> a.py', 'c -> b', 'd -> c', 'd -> x',
+        }
+
+
+def test_unloaded_modules_and_noise():
+    files = """
+        - main.py: |
+            import a
+            import util
+        - a.py: |
+            import b
+        - b.py: |
+            import util
+            import c1
+            import c2
+            import c3
+        - c1.py: |
+            import util
+        - c2.py: |
+            import util
+        - c3.py: |
+            import util
+        - util.py
+    """
+    with create_files(files) as workdir:
+        # c1..c3 are beyond --max-bacon, but they make util noise
+        args = '--noise-level 3 --max-bacon 2 --show-deps'
+        g = depgrf('main.py', args)
+        assert sorted(g.sources) == ['a', 'b', 'main.py']
+        assert graph_summary(g) == graph_summary(unpruned_depgrf('main.py', args))
+
+        # ..and can't with a higher --noise-level, so they aren't loaded
+        mf = MyModuleFinder([workdir] + sys.path, no_cache=True, max_bacon=2, noise_level=10)
+        mf.run_script('main.py')
+        mf.finish()
+        assert 'c1' in mf._deferred
+        args = '--noise-level 10 --max-bacon 2 --show-deps'
+        assert graph_summary(depgrf('main.py', args)) == graph_summary(unpruned_depgrf('main.py', args))
+
+
+def test_bacon_roots():
+    files = """
+        app:
+            - __init__.py
+            - api.py: |
+                from . import a
+            - a.py: |
+                from . import b
+            - b.py: |
+                from . import c
+            - cli.py: |
+                from . import c
+            - c.py: |
+                from . import d
+            - d.py
+    """
+    with create_files(files) as workdir:
+        g = depgrf('app', '--max-bacon 1 --bacon-roots app.api app.cli --show-deps')
+        assert {(src.name, src.bacon, src.bacon_root) for src in g.sources.values()} == {
+            ('app.api', 0, 'app.api'),
+            ('app', 1, 'app.api'),      # (from . import a)
+            ('app.a', 1, 'app.api'),
+            ('app.cli', 0, 'app.cli'),
+            ('app.c', 1, 'app.cli'),
+        }
+        assert '"bacon_root": "app.cli"' in repr(g.sources['app.c'])
+        assert len(depgrf('app', '--max-bacon 1 --bacon-roots app').sources) == 7
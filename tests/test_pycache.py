@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import os
+import py_compile
+
+from pydeps import importscan
+
+
+def _make_source(tmpdir, text):
+    fname = str(tmpdir.join('mod.py'))
+    with open(fname, 'w') as fp:
+        fp.write(text)
+    return fname
+
+
+def test_fresh_timestamp_pyc(tmpdir):
+    fname = _make_source(tmpdir, "import os\n")
+    assert importscan.fresh_pyc_code(fname) is None   # no __pycache__ yet
+    py_compile.compile(fname, doraise=True)
+    co = importscan.fresh_pyc_code(fname)
+    assert co is not None
+    assert ('absolute_import', (None, 'os')) in importscan.code_imports(co)
+    assert importscan.scan_file(fname) == importscan.code_imports(co)
+
+
+def test_stale_timestamp_pyc(tmpdir):
+    fname = _make_source(tmpdir, "import os\n")
+    py_compile.compile(fname, doraise=True)
+    with open(fname, 'w') as fp:
+        fp.write("import sys, json\n")
+    assert importscan.fresh_pyc_code(fname) is None
+    imports = importscan.scan_file(fname)
+    assert ('absolute_import', (None, 'json')) in imports
+
+
+def test_hash_based_pyc(tmpdir):
+    fname = _make_source(tmpdir, "import os\n")
+    for mode in (py_compile.PycInvalidationMode.CHECKED_HASH,
+                 py_compile.PycInvalidationMode.UNCHECKED_HASH):
+        py_compile.compile(fname, doraise=True, invalidation_mode=mode)
+        assert importscan.fresh_pyc_code(fname) is not None
+        st = os.stat(fname)
+        with open(fname, 'w') as fp:
+            fp.write("import re\n")     # same size, different hash
+        os.utime(fname, ns=(st.st_atime_ns, st.st_mtime_ns))
+        assert importscan.fresh_pyc_code(fname) is None
+        with open(fname, 'w') as fp:
+            fp.write("import os\n")
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from pydeps import reachability
+from tests.filemaker import create_files
+from tests.simpledeps import depgrf
+
+
+def test_reachability():
+    edges = {
+        'a': ['b'],
+        'b': ['c'],
+        'c': ['b', 'd'],
+        'd': [],
+        'e': ['e'],
+    }
+    index = reachability.Reachability(edges)
+    assert index.reaches('a', 'd') and not index.reaches('d', 'a')
+    assert index.reaches('b', 'b') and not index.reaches('a', 'a')
+    assert index.reaches('e', 'e')
+    assert index.descendants('a') == {'b', 'c', 'd'}
+    assert index.descendants('c') == {'b', 'c', 'd'}
+    assert index.ancestors('d') == {'a', 'b', 'c'}
+    assert index.ancestors('a') == set()
+    # b and c import each other, so they are counted once
+    assert index.descendant_sums({'a': 1, 'b': 10, 'c': 100, 'd': 1000, 'e': 7}) == {
+        'a': 1111, 'b': 1110, 'c': 1110, 'd': 1000, 'e': 7,
+    }
+    assert index.descendant_sums({'d': 5})['a'] == 5
+
+
+def test_query():
+    files = """
+        relimp:
+            - __init__.py
+            - a.py: |
+                from . import b
+            - b.py: |
+                from . import c
+            - c.py
+    """
+    with create_files(files) as workdir:
+        g = depgrf('relimp', '--max-bacon 0')
+        assert g.reaches('relimp.a', 'relimp.c')
+        assert not g.reaches('relimp.c', 'relimp.a')
+        res = reachability.answer(g, ['relimp.a->relimp.c', 'relimp.b->*', '*->relimp.b'])
+        assert res == {
+            'relimp.a->relimp.c': True,
+            'relimp.b->*': ['relimp', 'relimp.c'],
+            # (not the dummy module that imports the package's modules)
+            '*->relimp.b': ['relimp.a'],
+        }
+        with pytest.raises(RuntimeError):
+            reachability.answer(g, ['relimp.x->*'])
+        with pytest.raises(RuntimeError):
+            reachability.answer(g, ['relimp.a'])
+
+
+def test_query_script():
+    files = """
+        - a.py: |
+            import b
+        - b.py
+    """
+    with create_files(files) as workdir:
+        # a script target is a real module (named after the file)
+        g = depgrf('a.py', '--max-bacon 0')
+        assert reachability.answer(g, ['*->b']) == {'*->b': ['a.py']}
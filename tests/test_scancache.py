@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+
+from pydeps import scancache
+from pydeps.scancache import ScanCache
+from tests.filemaker import create_files
+from tests.simpledeps import simpledeps
+
+
+def test_scancache_hit(tmpdir):
+    files = """
+        relimp:
+            - __init__.py
+            - a.py: |
+                from . import b
+            - b.py: |
+                from . import c
+            - c.py
+    """
+    cachedir = str(tmpdir.join('cache'))
+    with create_files(files) as workdir:
+        first = simpledeps('relimp', '--cache-dir ' + cachedir)
+        assert os.listdir(cachedir)
+        assert simpledeps('relimp', '--cache-dir ' + cachedir) == first
+        assert first == {'relimp.b -> relimp.a', 'relimp.c -> relimp.b'}
+
+
+def test_scancache_invalidated(tmpdir):
+    files = """
+        relimp:
+            - __init__.py
+            - a.py: |
+                from . import b
+            - b.py
+            - c.py
+    """
+    cachedir = str(tmpdir.join('cache'))
+    with create_files(files) as workdir:
+        assert simpledeps('relimp', '--cache-dir ' + cachedir) == {'relimp.b -> relimp.a'}
+        with open(os.path.join('relimp', 'a.py'), 'w') as fp:
+            fp.write("from . import b, c\n")
+        assert simpledeps('relimp', '--cache-dir ' + cachedir) == {
+            'relimp.b -> relimp.a',
+            'relimp.c -> relimp.a',
+        }
+
+
+def test_scancache_roundtrip(tmpdir):
+    fname = str(tmpdir.join('a.py'))
+    with open(fname, 'w') as fp:
+        fp.write("import os\n")
+    cache = ScanCache(str(tmpdir.join('cache')))
+    key = cache.key(fname)
+    assert cache.get(key) is None
+    imports = [('absolute_import', (None, 'os')), ('store', ('os',))]
+    cache.put(key, imports)
+    assert cache.get(key) == imports
+    assert cache.key(str(tmpdir.join('missing.py'))) is None
+
+
+def test_scancache_prune(tmpdir):
+    cache = ScanCache(str(tmpdir.join('cache')), max_age=1)
+    for i in range(4):
+        fname = str(tmpdir.join('m%d.py' % i))
+        with open(fname, 'w') as fp:
+            fp.write("import os\n")
+        cache.put(cache.key(fname), [('absolute_import', (None, 'x' * 40))])
+    entries = sorted(os.path.join(cache.cache_dir, e) for e in os.listdir(cache.cache_dir))
+    # the size on disk (a whole block per entry)
+    cache.max_size = 2 * scancache._disk_size(os.stat(entries[1]))
+    old = time.time() - 3 * 24 * 60 * 60
+    os.utime(entries[0], (old, old))
+    cache.prune()
+    remaining = [e for e in os.listdir(cache.cache_dir) if e != scancache._PRUNED_STAMP]
+    assert os.path.basename(entries[0]) not in remaining
+    assert len(remaining) == 2
+
+
+def test_scancache_prune_interval(tmpdir):
+    cache = ScanCache(str(tmpdir.join('cache')), max_age=1)
+    fname = str(tmpdir.join('m.py'))
+    with open(fname, 'w') as fp:
+        fp.write("import os\n")
+    cache.put(cache.key(fname), [])
+    cache.prune()
+    entry, = [os.path.join(cache.cache_dir, e) for e in os.listdir(cache.cache_dir)
+              if e != scancache._PRUNED_STAMP]
+    old = time.time() - 3 * 24 * 60 * 60
+    os.utime(entry, (old, old))
+    cache.prune()       # pruned a moment ago
+    assert os.path.exists(entry)
+    cache.prune(now=time.time() + scancache.PRUNE_INTERVAL + 1)
+    assert not os.path.exists(entry)
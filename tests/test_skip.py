@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 from __future__ import print_function
 from tests.filemaker import create_files
-from tests.simpledeps import simpledeps, depgrf
+from pydeps.py2depgraph import MyModuleFinder
+from tests.simpledeps import simpledeps, depgrf, unpruned_depgrf, graph_summary
 
 
 def test_no_skip():
@@ -120,3 +121,92 @@ def test_rawdeps():
         assert simpledeps('relimp', '--show-raw-deps -x relimp.c') == {
             'relimp.b -> relimp.a'
         }
+
+
+def test_excluded_modules_are_scanned():
+    files = """
+        - main.py: |
+            import relimp.a
+        - relimp:
+            - __init__.py
+            - a.py: |
+                from . import b
+                from .vendor import v
+            - b.py
+            - vendor:
+                - __init__.py
+                - v.py: |
+                    import relimp.b
+                    import relimp.vendor.w
+                - w.py
+    """
+    with create_files(files) as workdir:
+        # the modules an excluded module imports can be in the graph
+        mf = MyModuleFinder([workdir], excludes=['relimp.vendor.*'], max_bacon=3, no_cache=True)
+        mf.run_script('main.py')
+        assert 'relimp.vendor.w' in mf._depgraph['relimp.vendor.v']
+        assert mf.is_excluded('relimp.vendor.v')
+
+        mf = MyModuleFinder([workdir], only=['relimp.b'], max_bacon=2, no_cache=True)
+        mf.run_script('main.py')
+        assert 'relimp.b' in mf._depgraph['relimp.a']
+        assert mf.is_excluded('relimp') and not mf.is_excluded('relimp.b')
+
+        assert simpledeps('main.py', '-x relimp.vendor.*') == {
+            'relimp -> main.py', 'relimp.a -> main.py', 'relimp.b -> relimp.a',
+            'relimp.vendor -> relimp.a',
+        }
+        assert simpledeps('main.py', '--only relimp.b') == set()
+
+
+def test_excluded_modules_and_the_graph():
+    files = """
+        - main.py: |
+            import a
+            import util
+            import x1
+            import x2
+            import x3
+        - a.py: |
+            import util
+        - x1.py: |
+            import util
+            import y
+        - x2.py: |
+            import util
+        - x3.py: |
+            import util
+        - y.py: |
+            import z
+        - z.py
+        - util.py
+    """
+    with create_files(files) as workdir:
+        for args in ['--noise-level 4 -x x*', '--max-bacon 3 -x x*', '--max-bacon 3 --only y z',
+                     '--max-bacon 0 -x x*', '--noise-level 2 -xx x2 x3']:
+            g = depgrf('main.py', args + ' --show-deps')
+            assert graph_summary(g) == graph_summary(unpruned_depgrf('main.py', args + ' --show-deps')), args
+        # x1..x3 make util noise
+        assert 'util' not in depgrf('main.py', '--noise-level 4 -x x*').sources
+        # y is only imported by x1
+        assert sorted(depgrf('main.py', '--max-bacon 3 -x x*').sources) == ['a', 'main.py', 'util', 'y', 'z']
+
+
+def test_excluded_modules_are_removed_from_the_imports():
+    files = """
+        foo:
+            - __init__.py
+            - a.py: |
+                from . import b, c
+            - b.py: |
+                from . import c
+            - c.py
+    """
+    with create_files(files) as workdir:
+        g = depgrf('foo', '-xx foo.c')
+        a, b = g.sources['foo.a'], g.sources['foo.b']
+        assert 'foo.c' not in g.sources
+        assert a.imports == {'foo', 'foo.b'}
+        assert b.imported_by == {'__main__', 'foo.a'}
+        assert (a.in_degree, b.out_degree) == (2, 2)
+        assert [g.name_of(i) for i in g.import_ids(b.id)] == ['foo']
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+from pydeps import startup
+from tests.filemaker import create_files
+from tests.simpledeps import depgrf
+
+
+def test_dominators():
+    edges = {
+        'r': ['a', 'b'],
+        'a': ['c'],
+        'b': ['c', 'd'],
+        'c': ['e'],
+        'd': ['e'],
+        'e': [],
+        'x': ['a'],     # not reachable from r
+    }
+    idom, order = startup.dominators(edges, 'r')
+    assert idom == {'r': 'r', 'a': 'r', 'b': 'r', 'c': 'r', 'd': 'b', 'e': 'r'}
+    assert order[0] == 'r' and set(order) == set(idom)
+
+
+def test_lazy_import_candidates():
+    files = """
+        app:
+            - __init__.py
+            - __main__.py: |
+                from . import cli
+            - cli.py: |
+                from . import heavy, light, shared
+            - heavy.py: |
+                from . import big1
+            - big1.py: |
+                from . import big2
+            - big2.py: |
+                x = 42
+            - light.py: |
+                from . import shared
+            - shared.py
+    """
+    with create_files(files) as workdir:
+        dep_graph = depgrf('app', '--max-bacon 0')
+        analysis = startup.StartupAnalysis(dep_graph.target, dep_graph)
+        assert analysis.root == 'app.__main__'
+        candidates = {(a, b): weight[0] for a, b, weight in analysis.candidates()}
+        assert candidates == {
+            ('app.__main__', 'app.cli'): 6,
+            ('app.cli', 'app.heavy'): 3,
+            ('app.heavy', 'app.big1'): 2,
+            ('app.big1', 'app.big2'): 1,
+            ('app.cli', 'app.light'): 1,    # app.shared is still imported by app.cli
+        }
+        assert analysis.weight['app.big2'][1] == len('x = 42\n')
+        assert analysis.critical_path() == ['app.__main__', 'app.cli', 'app.heavy', 'app.big1', 'app.big2']
+        assert 'app.cli -> app.heavy' in startup.report(dep_graph.target, dep_graph)
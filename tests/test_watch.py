@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import os
+
+from pydeps.py2depgraph import find_modules, finder_depgraph
+from pydeps.target import Target
+from pydeps.watch import Watcher, update, watch_root
+from tests.filemaker import create_files
+from tests.simpledeps import empty, simpledeps
+
+
+def _write(fname, txt):
+    with open(fname, 'w') as fp:
+        fp.write(txt)
+
+
+def test_watcher_poll():
+    files = """
+        - a.py
+        - b.py
+        - .hidden:
+            - c.py
+    """
+    with create_files(files) as workdir:
+        w = Watcher(workdir)
+        assert w.poll() == (set(), set(), set())
+        _write('a.py', 'import b\n')
+        os.remove('b.py')
+        _write('d.py', '')
+        _write('.hidden/c.py', 'import a\n')
+        a, b, d = [os.path.join(workdir, f) for f in ('a.py', 'b.py', 'd.py')]
+        assert w.poll() == ({a}, {d}, {b})
+        assert w.poll() == (set(), set(), set())
+
+
+def test_update_gives_same_graph_as_new_analysis():
+    files = """
+        relimp:
+            - __init__.py
+            - a.py: |
+                from . import b
+            - b.py: |
+                from . import c
+            - c.py
+    """
+    with create_files(files) as workdir:
+        pkg = os.path.join(workdir, 'relimp')
+        edits = [
+            # (file, new content or None to remove it)
+            [('b.py', 'from . import d\n'), ('d.py', 'from . import c\nimport relimp.a\n')],
+            [('d.py', 'from . import (\n')],        # syntax error
+            [('d.py', 'from . import c\n')],        # ..fixed
+            [('c.py', None)],
+            [('a.py', 'import relimp.c\n')],        # missing module
+            [('c.py', '')],
+        ]
+        kw = empty('--max-bacon 0')
+        t = Target(pkg)
+        with t.chdir_work():
+            mf = find_modules(t, **kw)
+            watcher = Watcher(watch_root(t))
+            for edit in edits:
+                for fname, txt in edit:
+                    if txt is None:
+                        os.remove(os.path.join(pkg, fname))
+                    else:
+                        _write(os.path.join(pkg, fname), txt)
+                update(mf, t, *watcher.poll(), **kw)
+                deps = {"%s -> %s" % (a.name, b.name) for a, b in finder_depgraph(mf, t, **kw)}
+                assert deps == simpledeps(pkg, '--max-bacon 0'), edit
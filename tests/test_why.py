@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from pydeps import why
+from tests.filemaker import create_files
+from tests.simpledeps import depgrf
+
+
+def test_shortest_paths():
+    edges = {
+        'r': ['a', 'b'],
+        'a': ['c'],
+        'b': ['c', 'd'],
+        'c': ['x'],
+        'd': ['x'],
+        's': ['x'],
+    }
+    assert why.shortest_path(edges, 'r', 'x') == ['r', 'a', 'c', 'x']
+    assert why.shortest_path(edges, 'x', 'r') is None
+    assert why.shortest_paths(edges, ['r'], 'x', 5) == [
+        ['r', 'a', 'c', 'x'],
+        ['r', 'b', 'c', 'x'],
+        ['r', 'b', 'd', 'x'],
+    ]
+    assert why.shortest_paths(edges, ['r', 's'], 'x', 2) == [['s', 'x'], ['r', 'a', 'c', 'x']]
+    assert why.shortest_paths(edges, ['a'], 'd', 2) == []
+
+
+def test_why():
+    files = """
+        app:
+            - __init__.py
+            - api.py: |
+                from . import models
+            - models.py: |
+                from . import heavy
+            - views.py: |
+                from . import models, heavy
+            - heavy.py
+    """
+    with create_files(files) as workdir:
+        g = depgrf('app', '--max-bacon 0')
+        chains = why.why(g, 'app.heavy', 3)
+        assert chains[0] == ['app.models', 'app.heavy']
+        assert ['app.api', 'app.models', 'app.heavy'] in chains
+        assert ['app.views', 'app.heavy'] in chains
+        report = why.report(g, 'app.heavy', chains)
+        assert 'shortest: app.models -> app.heavy  (1 import)' in report
+
+        g.restrict({'app.views', 'app.heavy'})
+        assert set(g.sources) == {'app.views', 'app.heavy'}
+        assert g.sources['app.views'].imports == {'app.heavy'}